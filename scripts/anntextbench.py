@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""anntextbench.py -- measure Page.annotation_text() on dense pages
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+
+This script creates a blank page with the given number of text, link and
+stamp annotations, and calls Page.annotation_text() repeatedly.  For each
+round it prints elapsed time and XDW_GetAnnotationAttributeW() calls per
+annotation; the first round includes building Annotation objects and
+resolving codepages.  DocuWorks is required.
+
+Example:
+
+    C:\\> python anntextbench.py --annotations 500 --rounds 5
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+import xdwlib.annotation
+from xdwlib import xdwopen, create, Point, AnnotationSpec
+
+
+def parse():
+
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="Usage: %prog [options]")
+    parser.add_option("-a", "--annotations", dest="annotations", type="int",
+            default=500,
+            help="annotations on page (default=500)")
+    parser.add_option("-r", "--rounds", dest="rounds", type="int",
+            default=5,
+            help="times to call annotation_text() (default=5)")
+    return parser.parse_args()
+
+
+class CallCounter(object):
+
+    """Count calls of a function."""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, *args, **kw):
+        self.calls += 1
+        return self.func(*args, **kw)
+
+
+def dense_page(path, annotations):
+    specs = []
+    for i in range(annotations):
+        pos = Point(5 + (i % 10) * 20, 5 + (i // 10) % 25 * 11)
+        if i % 3 == 0:
+            specs.append(AnnotationSpec("TEXT", position=pos, text=f"T{i}"))
+        elif i % 3 == 1:
+            specs.append(AnnotationSpec("LINK", position=pos,
+                                        caption=f"L{i}"))
+        else:
+            specs.append(AnnotationSpec("STAMP", position=pos, width=15,
+                                        top_field=f"S{i}"))
+    doc = xdwopen(path)
+    doc.page(0).add_many(specs)
+    doc.save()
+    doc.close()
+
+
+def run(options):
+    tempdir = tempfile.mkdtemp(prefix="anntextbench-")
+    counter = CallCounter(xdwlib.annotation.XDW_GetAnnotationAttributeW)
+    xdwlib.annotation.XDW_GetAnnotationAttributeW = counter
+    try:
+        path = create(output_path=os.path.join(tempdir, "dense.xdw"))
+        dense_page(path, options.annotations)
+        doc = xdwopen(path)
+        try:
+            pg = doc.page(0)
+            for n in range(options.rounds):
+                counter.calls = 0
+                t0 = time.perf_counter()
+                pg.annotation_text()
+                elapsed = time.perf_counter() - t0
+                print(f"round {n + 1}: {elapsed:8.3f} s "
+                      f"{pg.annotations / elapsed:9.1f} annotations/s "
+                      f"{counter.calls / pg.annotations:5.2f} calls/annotation")
+        finally:
+            doc.close()
+    finally:
+        xdwlib.annotation.XDW_GetAnnotationAttributeW = counter.func
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+
+    options, args = parse()
+    run(options)
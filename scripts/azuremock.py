@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""azuremock.py -- local stand-in for Azure AI Vision Read API v3.2
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+
+This server accepts images at /vision/v3.2/read/analyze and returns a
+canned result after the given latency, so that throughput, rate limiting
+and failure handling of Page.ocr_azure() and BaseDocument.ocr_batch() can
+be examined offline.  It does not depend on xdwlib nor DocuWorks.
+
+Example:
+
+    $ python3 azuremock.py --port 8765 --latency 2 --capacity 16 &
+    >>> doc.ocr_batch(endpoint="http://127.0.0.1:8765/",
+    ...               subscription_key="mock", concurrency=16)
+"""
+
+import sys
+import time
+import json
+import uuid
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+ANALYZE = "/vision/v3.2/read/analyze"
+RESULTS = "/vision/v3.2/read/analyzeResults/"
+
+
+def parse():
+
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="Usage: %prog [options]")
+    parser.add_option("--host", dest="host", default="127.0.0.1",
+            help="address to listen on (default=127.0.0.1)")
+    parser.add_option("-p", "--port", dest="port", type="int", default=8765,
+            help="port to listen on (default=8765)")
+    parser.add_option("-l", "--latency", dest="latency", type="float",
+            default=2.0,
+            help="seconds until each result gets ready (default=2.0)")
+    parser.add_option("-c", "--capacity", dest="capacity", type="int",
+            default=0,
+            help="max. operations running at a time; "
+                 "more submissions get HTTP 429 (default=0, unlimited)")
+    parser.add_option("-r", "--retry-after", dest="retry_after", type="int",
+            default=1,
+            help="Retry-After seconds sent with HTTP 429 (default=1)")
+    parser.add_option("-f", "--failure-rate", dest="failure_rate",
+            type="float", default=0.0,
+            help="ratio of operations ending with status 'failed' "
+                 "(default=0.0)")
+    parser.add_option("-k", "--key", dest="key", default="",
+            help="required subscription key; empty means any")
+    parser.add_option("-t", "--text", dest="text", default="MOCK OCR",
+            help="text to return for every line (default='MOCK OCR')")
+    parser.add_option("-n", "--lines", dest="lines", type="int", default=10,
+            help="lines to return for every image (default=10)")
+    parser.add_option("-q", action="store_true", dest="quiet",
+            help="quiet mode; no request log")
+    return parser.parse_args()
+
+
+class ReadAPIServer(ThreadingHTTPServer):
+
+    """Mock Read API server."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=2.0, capacity=0, retry_after=1,
+                 failure_rate=0.0, key="", text="MOCK OCR", lines=10,
+                 quiet=False):
+        ThreadingHTTPServer.__init__(self, address, ReadAPIHandler)
+        self.latency = latency
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self.key = key
+        self.text = text
+        self.lines = lines
+        self.quiet = quiet
+        self.operations = dict()  # {id: (ready_time, failed)}
+        self.lock = threading.Lock()
+        self.stats = dict(submitted=0, throttled=0, polled=0, failed=0,
+                          succeeded=0)
+
+    def running(self, now):
+        return sum(1 for ready, _ in self.operations.values() if now < ready)
+
+    def result(self):
+        lines = []
+        for i in range(self.lines):
+            top = 100 + i * 60
+            lines.append(dict(
+                    boundingBox=[100, top, 900, top, 900, top + 40, 100,
+                                 top + 40],
+                    text=f"{self.text} {i + 1}"))
+        return dict(readResults=[dict(page=1, lines=lines)])
+
+
+class ReadAPIHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def reply(self, status, body=None, headers=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def authorized(self):
+        key = self.headers.get("Ocp-Apim-Subscription-Key")
+        if not key or (self.server.key and key != self.server.key):
+            self.reply(401, dict(error=dict(code="401",
+                    message="Access denied due to invalid subscription key")))
+            return False
+        return True
+
+    def do_POST(self):
+        size = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(size)
+        if not self.authorized():
+            return
+        if self.path.split("?")[0] != ANALYZE:
+            return self.reply(404, dict(error=dict(code="NotFound")))
+        if not size:
+            return self.reply(400, dict(error=dict(code="InvalidImage")))
+        server = self.server
+        now = time.time()
+        with server.lock:
+            if server.capacity and server.capacity <= server.running(now):
+                server.stats["throttled"] += 1
+                return self.reply(429, dict(error=dict(code="429",
+                        message="Rate limit is exceeded.")),
+                        headers={"Retry-After": str(server.retry_after)})
+            opid = str(uuid.uuid4())
+            failed = random.random() < server.failure_rate
+            server.operations[opid] = (now + server.latency, failed)
+            server.stats["submitted"] += 1
+        host, port = server.server_address[:2]
+        self.reply(202, headers={
+                "Operation-Location": f"http://{host}:{port}{RESULTS}{opid}"})
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.server.lock:
+                return self.reply(200, self.server.stats)
+        if not self.authorized():
+            return
+        if not self.path.startswith(RESULTS):
+            return self.reply(404, dict(error=dict(code="NotFound")))
+        opid = self.path[len(RESULTS):]
+        server = self.server
+        with server.lock:
+            server.stats["polled"] += 1
+            try:
+                ready, failed = server.operations[opid]
+            except KeyError:
+                return self.reply(404, dict(error=dict(code="NotFound")))
+            if time.time() < ready:
+                return self.reply(200, dict(status="running"))
+            del server.operations[opid]
+            server.stats["failed" if failed else "succeeded"] += 1
+        if failed:
+            return self.reply(200, dict(status="failed"))
+        self.reply(200, dict(status="succeeded",
+                             analyzeResult=server.result()))
+
+
+if __name__ == "__main__":
+
+    options, args = parse()
+    server = ReadAPIServer((options.host, options.port),
+            latency=options.latency,
+            capacity=options.capacity,
+            retry_after=options.retry_after,
+            failure_rate=options.failure_rate,
+            key=options.key,
+            text=options.text,
+            lines=options.lines,
+            quiet=options.quiet)
+    sys.stderr.write("Mock Read API listening on http://{0}:{1}/\n".format(
+            *server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""binderbench.py -- measure conversion between binder and document
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+
+This script creates a binder of the given number of blank documents and
+converts it into a document, and a document of the same pages back into
+a binder of single-page documents, by:
+
+    flatten0    Binder.export() and Document.append() for each document
+    flatten     Binder.flatten()
+    flattenN    Binder.flatten() with worker processes
+    split0      PageCollection.export(flat=False, group=False)
+    split       Document.split_to_binder()
+    splitN      Document.split_to_binder() with worker processes
+
+then prints documents per second for each.  DocuWorks is required.
+
+Example:
+
+    C:\\> python binderbench.py --documents 500 --workers 4
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+from xdwlib import xdwopen, create, create_binder, PageCollection
+
+
+def parse():
+
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="Usage: %prog [options]")
+    parser.add_option("-d", "--documents", dest="documents", type="int",
+            default=500,
+            help="documents in test binder (default=500)")
+    parser.add_option("-w", "--workers", dest="workers", type="int",
+            default=4,
+            help="worker processes for flattenN and splitN (default=4)")
+    parser.add_option("-m", "--methods", dest="methods",
+            default="flatten0,flatten,flattenN,split0,split,splitN",
+            help="comma-separated methods to measure")
+    return parser.parse_args()
+
+
+def blank_binder(tempdir, documents):
+    blank = create(output_path=os.path.join(tempdir, "blank.xdw"))
+    path = create_binder(os.path.join(tempdir, "base.xbd"))
+    bdr = xdwopen(path)
+    for _ in range(documents):
+        bdr.append(blank)
+    bdr.save()
+    bdr.close()
+    return path
+
+
+def flatten0(bdr, output_path, workers):
+    tempdir = os.path.dirname(output_path)
+    first = bdr.export(0, os.path.join(tempdir, "first.xdw"))
+    shutil.move(first, output_path)
+    doc = xdwopen(output_path)
+    for pos in range(1, bdr.documents):
+        path = bdr.export(pos, os.path.join(tempdir, "part.xdw"))
+        doc.append(path)
+        os.remove(path)
+    doc.save()
+    doc.close()
+
+
+def flatten(bdr, output_path, workers):
+    bdr.flatten(output_path)
+
+
+def flattenN(bdr, output_path, workers):
+    bdr.flatten(output_path, concurrency=workers)
+
+
+def split0(doc, output_path, workers):
+    PageCollection(doc).export(output_path, flat=False, group=False)
+
+
+def split(doc, output_path, workers):
+    doc.split_to_binder(output_path=output_path)
+
+
+def splitN(doc, output_path, workers):
+    doc.split_to_binder(output_path=output_path, concurrency=workers)
+
+
+METHODS = dict(flatten0=flatten0, flatten=flatten, flattenN=flattenN,
+               split0=split0, split=split, splitN=splitN)
+
+
+def run(options):
+    tempdir = tempfile.mkdtemp(prefix="binderbench-")
+    try:
+        base = blank_binder(tempdir, options.documents)
+        bdr = xdwopen(base, readonly=True)
+        flat = bdr.flatten(os.path.join(tempdir, "base.xdw"))
+        bdr.close()
+        for name in options.methods.split(","):
+            source = base if name.startswith("flatten") else flat
+            ext = ".xdw" if name.startswith("flatten") else ".xbd"
+            output_path = os.path.join(tempdir, name + ext)
+            src = xdwopen(source, readonly=True)
+            try:
+                t0 = time.perf_counter()
+                METHODS[name](src, output_path, options.workers)
+                elapsed = time.perf_counter() - t0
+            finally:
+                src.close()
+            os.remove(output_path)
+            print(f"{name:8s} {options.documents:7d} documents "
+                  f"{elapsed:8.2f} s "
+                  f"{options.documents / elapsed:9.1f} documents/s")
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+
+    options, args = parse()
+    run(options)
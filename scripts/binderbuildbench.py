@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""binderbuildbench.py -- measure building binders of many documents
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+
+This script builds binders of the given numbers of blank documents by:
+
+    append  Binder.append() for each document
+    extend  create_binder(documents=...) i.e. Binder.extend()
+
+then prints elapsed time and XDWAPI calls for each.  Appending costs
+O(D^2) calls since every insertion renews page offsets of all documents
+in binder.  DocuWorks is required.
+
+Example:
+
+    C:\\> python binderbuildbench.py --documents 100,1000,5000
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+import xdwlib.binder
+import xdwlib.documentinbinder
+from xdwlib import xdwopen, create, create_binder
+
+
+def parse():
+
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="Usage: %prog [options]")
+    parser.add_option("-d", "--documents", dest="documents",
+            default="100,1000,5000",
+            help="comma-separated numbers of documents "
+                 "(default=100,1000,5000)")
+    parser.add_option("-m", "--methods", dest="methods",
+            default="append,extend",
+            help="comma-separated methods to measure (default=append,extend)")
+    return parser.parse_args()
+
+
+class CallCounter(object):
+
+    """Count calls of a function."""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, *args, **kw):
+        self.calls += 1
+        return self.func(*args, **kw)
+
+
+def build_append(path, documents):
+    path = create_binder(path)
+    bdr = xdwopen(path)
+    for doc in documents:
+        bdr.append(doc)
+    bdr.save()
+    bdr.close()
+
+
+def build_extend(path, documents):
+    create_binder(path, documents=documents)
+
+
+METHODS = dict(append=build_append, extend=build_extend)
+
+
+def run(options):
+    tempdir = tempfile.mkdtemp(prefix="binderbuildbench-")
+    modules = (xdwlib.binder, xdwlib.documentinbinder)
+    counter = CallCounter(xdwlib.binder.XDW_GetDocumentInformationInBinder)
+    for module in modules:
+        module.XDW_GetDocumentInformationInBinder = counter
+    try:
+        blank = create(output_path=os.path.join(tempdir, "blank.xdw"))
+        for n in map(int, options.documents.split(",")):
+            for name in options.methods.split(","):
+                path = os.path.join(tempdir, f"{name}{n}.xbd")
+                counter.calls = 0
+                t0 = time.perf_counter()
+                METHODS[name](path, [blank] * n)
+                elapsed = time.perf_counter() - t0
+                os.remove(path)
+                print(f"{name:6s} {n:6d} documents {elapsed:8.2f} s "
+                      f"{n / elapsed:9.1f} documents/s "
+                      f"{counter.calls:9d} info calls")
+    finally:
+        for module in modules:
+            module.XDW_GetDocumentInformationInBinder = counter.func
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+
+    options, args = parse()
+    run(options)
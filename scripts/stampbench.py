@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""stampbench.py -- measure throughput of pasting annotations
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+
+This script creates a blank document of the given pages, and pastes the
+same text, rectangle and stamp annotations on every page by:
+
+    add     Annotatable.add_text() etc. with keyword attributes
+    many    Page.add_many() with precompiled AnnotationSpec's
+    stamp   BaseDocument.stamp()
+
+then prints annotations per second for each.  DocuWorks is required.
+
+Example:
+
+    C:\\> python stampbench.py --pages 1000
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from xdwlib import xdwopen, create, Point, Rect, AnnotationSpec
+
+
+def parse():
+
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="Usage: %prog [options]")
+    parser.add_option("-p", "--pages", dest="pages", type="int",
+            default=1000,
+            help="pages of test document (default=1000)")
+    parser.add_option("-m", "--methods", dest="methods",
+            default="add,many,stamp",
+            help="comma-separated methods to measure (default=add,many,stamp)")
+    return parser.parse_args()
+
+
+TEXT = dict(text="CONFIDENTIAL", font_size=24, font_name="Arial")
+RECT = Rect(10, 10, 60, 30)
+RECT_ATTRS = dict(fill_style=0, border_width=1)
+STAMP = dict(top_field="RECEIVED", bottom_field="xdwlib")
+
+SPECS = [
+        AnnotationSpec("TEXT", position=Point(10, 40), **TEXT),
+        AnnotationSpec("RECTANGLE", rect=RECT, **RECT_ATTRS),
+        AnnotationSpec("STAMP", position=Point(150, 10), width=30, **STAMP),
+        ]
+
+
+def blank_document(path, pages):
+    blank = create(output_path=os.path.join(os.path.dirname(path), "b.xdw"))
+    shutil.copy(blank, path)
+    doc = xdwopen(path)
+    while doc.pages < pages:
+        doc.append(blank)
+    doc.save()
+    doc.close()
+    os.remove(blank)
+
+
+def paste_add(doc):
+    for pg in doc:
+        pg.add_text(position=Point(10, 40), **TEXT)
+        pg.add_rectangle(rect=RECT, **RECT_ATTRS)
+        pg.add_stamp(position=Point(150, 10), width=30, **STAMP)
+    doc.save()
+    return doc.pages * len(SPECS)
+
+
+def paste_many(doc):
+    count = 0
+    for pg in doc:
+        count += len(pg.add_many(SPECS))
+    doc.save()
+    return count
+
+
+def paste_stamp(doc):
+    return doc.stamp(SPECS)
+
+
+METHODS = dict(add=paste_add, many=paste_many, stamp=paste_stamp)
+
+
+def run(options):
+    tempdir = tempfile.mkdtemp(prefix="stampbench-")
+    try:
+        base = os.path.join(tempdir, "base.xdw")
+        blank_document(base, options.pages)
+        for name in options.methods.split(","):
+            path = os.path.join(tempdir, f"{name}.xdw")
+            shutil.copy(base, path)
+            doc = xdwopen(path)
+            try:
+                t0 = time.perf_counter()
+                count = METHODS[name](doc)
+                elapsed = time.perf_counter() - t0
+            finally:
+                doc.close()
+            print(f"{name:5s} {count:7d} annotations {elapsed:8.2f} s "
+                  f"{count / elapsed:9.1f} annotations/s")
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+
+    options, args = parse()
+    run(options)
@@ -16,13 +16,21 @@ FOR A PARTICULAR PURPOSE.
 import sys
 
 from .__setup__ import *
-from .struct import Point, Rect
+from .struct import Point, Rect, Affine, PointArray, RectArray
 from .common import environ
-from .xdwtemp import XDWTemp
+from .xdwtemp import XDWTemp, XDWWorkspace, workspace
 from .xdwfile import xdwopen, view, optimize, copy, create_sfx, extract_sfx
 from .xdwfile import protection_info, protect, unprotect, sign
+from .xdwfile import ProtectionPolicy, PageFormTemplate
 from .document import Document, create, merge, Container
 from .binder import Binder, create_binder
 from .documentinbinder import DocumentInBinder
 from .page import Page, PageCollection
-from .annotation import Annotation, AnnotationCache
+from .annotation import Annotation, AnnotationCache, AnnotationSpec
+from .markup import AnnotationMarkup
+from .diff import diff_annotations, AnnotationDiff
+from .transform import TransformPipeline, protect_many, unprotect_many
+from .transform import configure_pageforms
+from .verify import verify_signatures, SignatureCache
+from .ocr import OCRCache
+from .spatial import SpatialIndex
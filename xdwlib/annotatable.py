@@ -15,6 +15,8 @@ FOR A PARTICULAR PURPOSE.
 
 import os
 import warnings
+from io import BytesIO
+from array import array
 
 from .xdwapi import *
 from .common import *
@@ -51,6 +53,19 @@ def relative_points(points):
     return tuple([p0] + [p - p0 for p in points[1:]])
 
 
+def xdw_points(points):
+    """Convert point sequence in absolute coordinate to XDW_POINT array.
+
+    points  (sequence of Point or PointArray, unit=mm)
+
+    Conversion is vectorised through PointArray; the result is copied
+    into a ctypes array at once instead of point by point.
+    """
+    points = (PointArray(points).relative() * 100).int()
+    data = array("l", (int(v) for p in points for v in p))
+    return (XDW_POINT * len(points)).from_buffer_copy(data)
+
+
 class Annotatable(Subject):
 
     """Annotatable objects i.e. page or annotation."""
@@ -76,6 +91,16 @@ class Annotatable(Subject):
     def __len__(self):
         return self.annotations
 
+    def _reset_annotation_info(self):
+        """Invalidate cached information of descendant annotations."""
+        for ann in self.observers.values():
+            ann._changed()
+            ann._reset_annotation_info()
+
+    def _indexed_page(self):
+        """Page which holds spatial index for self and descendants."""
+        return getattr(self, "page", self)
+
     def __getitem__(self, pos):
         if isinstance(pos, slice):
             pos = self._slice(pos)
@@ -158,8 +183,48 @@ class Annotatable(Subject):
         pos = self.annotations  # TODO: Ensure this is correct.
         self.annotations += 1
         ann = self.annotation(pos)
+        self._indexed_page()._annotation_added(ann)
         return ann
 
+    def add_many(self, specs, wrap=False):
+        """Paste annotations in bulk.
+
+        specs       (sequence of AnnotationSpec or dict) annotations to paste;
+                    dict is passed to AnnotationSpec() with 'type' key
+        wrap        (bool) return Annotation objects instead of handles
+
+        Specs are compiled once, and no Annotation object is built unless
+        wrap is True.  Compile specs in advance with AnnotationSpec() to
+        paste the same ones on many pages.
+
+        Returns a list of annotation handles, or Annotation objects if wrap
+        is True.
+        """
+        from .annotation import AnnotationSpec
+        specs = [AnnotationSpec.compile(spec) for spec in specs]
+        pg = self._indexed_page()
+        doc_handle = pg.doc.handle
+        handles = []
+        first = self.annotations
+        done = False
+        try:
+            for spec in specs:
+                handles.append(
+                        self._add(spec.ann_type, spec.position, spec.init_dat))
+                spec.apply(doc_handle, handles[-1])
+            done = True
+        finally:
+            # Count what was pasted even if failed halfway.
+            self.annotations += len(handles)
+            if handles and not (wrap and done):
+                pg.reset_annotation_index()  # to be rebuilt on demand
+        if not wrap:
+            return handles
+        anns = [self.annotation(pos) for pos in range(first, self.annotations)]
+        for ann in anns:
+            pg._annotation_added(ann)
+        return anns
+
     def add_text(self, position=_POSITION, **kw):
         """Paste a text annotation.
 
@@ -314,18 +379,14 @@ class Annotatable(Subject):
     def add_marker(self, points=_POINTS, **kw):
         """Paste a marker annotation.
 
-        points      (sequence of Point, unit=mm)
+        points      (sequence of Point or PointArray, unit=mm)
         kw          (dict) initial attributes
 
         Note that `position' attribute is determined automatically.
         """
-        points = relative_points(points)
-        c_points = (XDW_POINT * len(points))()
-        for i, p in enumerate(points):
-            c_points[i].x = int(p.x * 100)
-            c_points[i].y = int(p.y * 100)
+        c_points = xdw_points(points)
         ann = self.add(XDW_AID_MARKER, _POSITION,  # position is dummy
-                nCounts=len(points), pPoints=c_points)
+                nCounts=len(c_points), pPoints=c_points)
         for k, v in kw.items():
             setattr(ann, k, v)
         return ann
@@ -335,29 +396,32 @@ class Annotatable(Subject):
     def add_polygon(self, points=_POINTS, **kw):
         """Paste a polygon annotation.
 
-        points      (sequence of Point, unit=mm)
+        points      (sequence of Point or PointArray, unit=mm)
         kw          (dict) initial attributes
 
         Note that `position' attribute is determined automatically.
         """
-        points = relative_points(points)
-        c_points = (XDW_POINT * len(points))()
-        for i, p in enumerate(points):
-            c_points[i].x = int(p.x * 100)
-            c_points[i].y = int(p.y * 100)
+        c_points = xdw_points(points)
         ann = self.add(XDW_AID_POLYGON, _POSITION,  # position is dummy
-                nCounts=len(points), pPoints=c_points)
+                nCounts=len(c_points), pPoints=c_points)
         for k, v in kw.items():
             setattr(ann, k, v)
         return ann
 
-    def copy_annotation(self, ann, strategy=1):
+    def copy_annotation(self, ann, strategy=1, renders=None):
         """Copy an annotation with the same position and attributes.
 
         ann         (Annotation)
-
-        BITMAP can be copied, but it takes great time to process image.
-        PAGEFORM, OLE, CUSTOM and RECEIVEDSTAMP are not copyable.
+        strategy    (int) how to copy image of BITMAP
+                    1 = crop page image as it is, save in BMP
+                    2 = crop page image, save in TIFF (PIL required)
+        renders     (dict) page images to share; see Page.bitmap()
+
+        BITMAP can be copied, but the image is cropped from its page since
+        XDWAPI provides no way to get the image stored in annotation.  To
+        copy many annotations, use copy_annotations() to render each page
+        only once.  PAGEFORM, OLE, CUSTOM and RECEIVEDSTAMP are not
+        copyable.
         """
         t = XDW_ANNOTATION_TYPE.normalize(ann.type)
         if t == XDW_AID_TEXT:
@@ -376,30 +440,25 @@ class Annotatable(Subject):
         elif t == XDW_AID_LINK:
             copy = self.add_link(position=ann.position)
         elif t == XDW_AID_BITMAP:
-            if not PIL_ENABLED:
-                warnings.warn("install Pillow before copying bitmap annotation",
+            if strategy == 2 and not PIL_ENABLED:
+                warnings.warn("install Pillow to copy bitmap in TIFF",
                         UserWarning, stacklevel=2)
                 return None
-            pg = ann.page
-            dpi = max(pg.resolution)
-            lt, rb = ann.position, ann.position + ann.size
-            rect = [int(round(mm2px(v, dpi))) for v in (lt.x, lt.y, rb.x, rb.y)]
+            image = ann.bitmap(renders=renders)
             if strategy == 1:
                 with XDWTemp(suffix=".bmp") as temp:
-                    pg.doc.export_image(pg.pos, temp.path,
-                            dpi=dpi, format="bmp", compress="nocompress")
-                    Image.open(temp.path).crop(rect).save(temp.path, "BMP")
-                    # PIL BmpImagePlugin sets resolution to 1, so fix it.
-                    self._fix_bmp_resolution(temp.path, dpi)
+                    image.save(temp.path)
+                    copy = self.add_bitmap(position=ann.position,
+                                           path=temp.path)
             elif strategy == 2:
+                dpi = int(max(10, min(600, max(ann.page.resolution))))
                 with XDWTemp(suffix=".tif") as temp:
-                    in_ = StringIO(pg.doc.bitmap(pg.pos).octet_stream())
-                    Image.open(in_).crop(rect).\
+                    Image.open(BytesIO(image.octet_stream())).\
                             save(temp.path, "TIFF", resolution=dpi)
-                    in_.close()
+                    copy = self.add_bitmap(position=ann.position,
+                                           path=temp.path)
             else:
                 raise ValueError("illegal strategy")
-            copy = self.add(t, position=ann.position, szImagePath=temp.path)
         else:  # XDW_AID_PAGEFORM, XDW_AID_OLE, XDW_AID_RECEIVEDSTAMP, XDW_AID_CUSTOM
             warnings.warn(
                     f"copying {ann.type} annotation is not supported",
@@ -420,23 +479,20 @@ class Annotatable(Subject):
                 pass
         return copy
 
-    @staticmethod
-    def _fix_bmp_resolution(path, dpi):
-        """Fix resolutions stored in BMP file.
+    def copy_annotations(self, anns, strategy=1):
+        """Copy annotations with the same positions and attributes.
+
+        anns        (sequence of Annotation)
+        strategy    (int) see copy_annotation()
+
+        Each source page is rendered at most once for BITMAP annotations.
 
-        path    (str) path to Windows Bitmap file
-        dpi     (int) resolution in DPI
+        Returns a list of copied Annotation objects, or None for ones
+        not copyable.
         """
-        ppm = int(round(dpi * mm2in(1000)))
-        ppms = []
-        for _ in range(4):
-            ppms.append(chr(ppm & 0xff))
-            ppm >>= 8
-        ppm = "".join(ppms)
-        with open(path, "r+b") as im:
-            im.seek(0x26)
-            im.write(ppm)  # horizontal resolution
-            im.write(ppm)  # vertical resolution
+        renders = dict()
+        return [self.copy_annotation(ann, strategy=strategy, renders=renders)
+                for ann in anns]
 
     def _delete(self, pos):
         """Abstract method as a stub for delete()."""
@@ -450,6 +506,7 @@ class Annotatable(Subject):
         pos = self._pos(pos)
         ann = self.annotation(pos)
         self._delete(ann)
+        self._indexed_page()._annotation_removed(ann)
         self.detach(ann, EV_ANN_REMOVED)
         self.annotations -= 1
 
@@ -498,11 +555,12 @@ class Annotatable(Subject):
                 types = [types]
         if rect and not half_open:
             rect = rect.half_open()
+        if rect:
+            inside = set(self._indexed_page().annotation_index().contains(
+                    rect))
         ann_list = []
         for ann in self:
-            # TODO: test by rect is currently done in relative coordinate.
-            # Absolute coordinate would be preferable.
-            if not ((not rect or ann.inside(rect)) and
+            if not ((not rect or ann in inside) and
                     (not types or ann.type in types) and
                     (not handles or ann.handle in handles) and
                     (not criteria or criteria(ann))):
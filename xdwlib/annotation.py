@@ -20,9 +20,13 @@ from .common import *
 from .observer import *
 from .struct import *
 from .annotatable import Annotatable
+from .annotatable import relative_points, xdw_points
+from .annotatable import _POSITION, _SIZE, _POINTS, _WIDTH
+from .annotatable import MIN_ANN_SIZE, ANN_TOO_SMALL
+from .annotatable import MIN_FUSEN_SIZE, FUSEN_TOO_SMALL
 
 
-__all__ = ("Annotation", "AnnotationCache")
+__all__ = ("Annotation", "AnnotationCache", "AnnotationSpec")
 
 
 def absolute_points(points):
@@ -33,6 +37,310 @@ def absolute_points(points):
     return tuple([p0] + [p0 + p for p in points[1:]])
 
 
+_VALID_ATTRIBUTES = dict()  # {annotation type id: (attribute name, ...)}
+
+
+def valid_attributes(anntype):
+    """Get attribute names (bytes) valid for annotation type id."""
+    try:
+        return _VALID_ATTRIBUTES[anntype]
+    except KeyError:
+        names = _VALID_ATTRIBUTES[anntype] = tuple(
+                k for (k, v) in XDW_ANNOTATION_ATTRIBUTE.items()
+                if anntype in v[2])
+        return names
+
+
+def get_attribute(handle, anntype, attrname, codepage=CP):
+    """Get an annotation attribute value.
+
+    handle      annotation handle
+    anntype     (str) annotation type e.g. 'TEXT'
+    attrname    (bytes) inner attribute name e.g. b'%Text'
+    codepage    (int) codepage for string attribute
+
+    Returns (value, is_unicode) where is_unicode is None for non-text.
+    """
+    try:
+        data_type, value, text_type = XDW_GetAnnotationAttributeW(
+                handle, attrname, codepage=codepage)
+    except InfoNotFoundError:
+        return (None, None)
+    if data_type == XDW_ATYPE_INT:
+        if anntype == "STICKEY" and attrname.endswith(b"Color"):
+            try:
+                return (XDW_COLOR_FUSEN[value], None)
+            except KeyError:
+                if isinstance(value, int):
+                    return (value, None)
+                raise
+        elif anntype == "LINK" and attrname.endswith(b"XdwPage"):
+            return (value - 1, None)  # So, -1 for profile view.
+        return (scale(attrname, value, store=False), None)
+    elif data_type == XDW_ATYPE_STRING:
+        return (value, text_type == XDW_TEXT_UNICODE)
+    #elif data_type == XDW_ATYPE_DATE:  # unsupported in SDK
+    #    return f"<<DATE:{value}>>"
+    #elif data_type == XDW_ATYPE_BOOL:  # unsupported in SDK
+    #    return f"<<BOOL:{value}>>"
+    #elif data_type == XDW_ATYPE_OCTS:  # unsupported in SDK
+    #    return f"<<OCTS:{value}>>"
+    elif data_type == XDW_ATYPE_POINTS:  # Quick hack for points.
+        points = [Point(
+                scale(attrname, p.x),
+                scale(attrname, p.y)) for p in value]
+        return (absolute_points(points), None)
+    else:
+        return (f"<<TYPE{data_type}:{value}>>", None)
+
+
+def get_attributes(handle, anntype):
+    """Get all attributes valid for the annotation type in one pass.
+
+    handle      annotation handle
+    anntype     (str) annotation type e.g. 'TEXT'
+
+    Font charset is read only once for all string attributes.
+
+    Returns (dict of outer attribute names and values, is_unicode) where
+    is_unicode is None if annotation has no string attribute.
+    """
+    names = valid_attributes(XDW_ANNOTATION_TYPE.normalize(anntype))
+    codepage = CP
+    if any(XDW_ANNOTATION_ATTRIBUTE[k][0] == XDW_ATYPE_STRING
+           for k in names):
+        codepage = charset_to_codepage(
+                get_attribute(handle, anntype, XDW_ATN_FontCharSet)[0])
+    attrs = dict()
+    is_unicode = None
+    for k in names:
+        if XDW_ANNOTATION_ATTRIBUTE[k][0] == XDW_ATYPE_STRING:
+            value, u = get_attribute(handle, anntype, k, codepage=codepage)
+            if u is not None:
+                is_unicode = u
+        else:
+            value = get_attribute(handle, anntype, k)[0]
+        attrs[outer_attribute_name(k)] = value
+    return (attrs, is_unicode)
+
+
+def snapshot(doc_handle, page, parent_handle=None, annotations=0):
+    """Read annotation tree into AnnotationCache objects.
+
+    doc_handle      document handle
+    page            (int) absolute page number; starts with 1
+    parent_handle   parent annotation handle; None for page
+    annotations     (int) number of annotations under the parent
+
+    Each annotation costs one XDW_GetAnnotationInformation() and one
+    XDW_GetAnnotationAttributeW() per valid attribute.
+
+    Returns a list of AnnotationCache objects.
+    """
+    result = []
+    for pos in range(annotations):
+        info = XDW_GetAnnotationInformation(
+                doc_handle, page, parent_handle or NULL, pos + 1)
+        anntype = XDW_ANNOTATION_TYPE[info.nAnnotationType]
+        attrs, _ = get_attributes(info.handle, anntype)
+        attrs["position"] = Point(info.nHorPos, info.nVerPos) / 100.0
+        attrs["size"] = Point(info.nWidth, info.nHeight) / 100.0
+        children = snapshot(doc_handle, page, info.handle,
+                            info.nChildAnnotations)
+        result.append(AnnotationCache(anntype, children=children, **attrs))
+    return result
+
+
+def encode_attribute(anntype, attrname, value, is_unicode=False):
+    """Convert an attribute value into arguments for XDWAPI.
+
+    anntype     (str) annotation type e.g. 'TEXT'
+    attrname    (bytes) inner attribute name e.g. b'%Text'
+    value       attribute value in outer (user) representation
+    is_unicode  (bool) store text as Unicode
+
+    Returns (attribute_type, value, text_type) where value is a c_int for
+    XDW_ATYPE_INT, or str for XDW_ATYPE_STRING.
+    """
+    if attrname == XDW_ATN_Points:
+        raise AttributeError(
+                "Points of polygon or marker cannot be updated.")
+    if anntype == "STICKEY" and attrname.endswith(b"Color"):
+        value = XDW_COLOR_FUSEN.normalize(value)
+    elif anntype == "LINK" and attrname.endswith(b"Page"):
+        value += 1  # So, specify -1 for profile view.
+    t, unit, limited = XDW_ANNOTATION_ATTRIBUTE[attrname]
+    if limited and XDW_ANNOTATION_TYPE.inner(anntype) not in limited:
+        raise AttributeError("illegal attribute {0}.{1}".format(
+                anntype, outer_attribute_name(attrname)))
+    if t == 0 or isinstance(unit, XDWConst):
+        if not isinstance(unit, XDWConst):
+            if not isinstance(value, (int, float)):
+                raise ValueError("numeric data required, text given")
+        return (XDW_ATYPE_INT,
+                c_int(int(scale(attrname, value, store=True))), 0)
+    elif t == 1:
+        if not isinstance(value, str):
+            raise ValueError(f'text data required, non-text {value} given')
+        if (is_unicode and
+            XDW_ANNOTATION_TYPE.normalize(anntype) in (
+                XDW_ATN_Text,
+                XDW_ATN_Caption, XDW_ATN_Url, XDW_ATN_XdwPath,
+                XDW_ATN_XdwNameInXbd, XDW_ATN_Tooltip_String,
+                XDW_ATN_LinkAtn_Title, XDW_ATN_OtherFilePath,
+                XDW_ATN_MailAddress,
+                XDW_ATN_TopField, XDW_ATN_BottomField,
+                )):
+            texttype = XDW_TEXT_UNICODE
+        else:
+            texttype = XDW_TEXT_MULTIBYTE
+        return (XDW_ATYPE_STRING, value, texttype)
+    raise TypeError("Invalid type to set attribute value: " + str(value))
+
+
+def set_attribute(doc_handle, handle, attrname, encoded):
+    """Store an attribute value encoded by encode_attribute()."""
+    t, value, texttype = encoded
+    if t == XDW_ATYPE_INT:
+        XDW_SetAnnotationAttributeW(
+                doc_handle, handle, attrname, t, byref(value), 0, 0)
+    else:
+        XDW_SetAnnotationAttributeW(
+                doc_handle, handle, attrname, t, value, texttype,
+                codepage=CP)
+
+
+class AnnotationSpec(object):
+
+    """Declarative annotation, compiled once to paste many times.
+
+    Geometry is given in the same way as Annotatable.add_*() i.e.
+
+        TEXT, LINK          position, optionally size
+        STICKEY             position, size or rect
+        RECTANGLE, ARC      rect or position and size
+        STRAIGHTLINE        points (2 points)
+        MARKER, POLYGON     points
+        STAMP               position, width
+        BITMAP              position, path
+
+    and other keywords are taken as initial attributes.  Initialization
+    data and attribute values are converted into XDWAPI representation
+    here, so that pasting costs only XDW_AddAnnotation() and one
+    XDW_SetAnnotationAttributeW() per attribute.
+
+    Example:
+
+        spec = AnnotationSpec("TEXT", position=Point(10, 10),
+                              text="CONFIDENTIAL", font_size=24)
+        doc.stamp(spec)
+    """
+
+    def __init__(self, ann_type, position=None, size=None, rect=None,
+                 points=None, width=_WIDTH, path=None, **kw):
+        """Initiator.
+
+        ann_type    annotation type e.g. 'TEXT' or XDW_AID_TEXT
+        position    (Point, unit=mm)
+        size        (Point, unit=mm)
+        rect        (Rect, unit=mm)
+        points      (sequence of Point, unit=mm)
+        width       (float, unit=mm) width of STAMP
+        path        (str) path to image file of BITMAP
+        kw          (dict) initial attributes
+        """
+        t = XDW_ANNOTATION_TYPE.normalize(ann_type)
+        self.type = XDW_ANNOTATION_TYPE[t]
+        self.ann_type = t
+        if rect is not None:
+            position, size = Rect(*rect).position_and_size()
+        # Resized after attributes e.g. word_wrap are set.
+        self.size = None
+        if t in (XDW_AID_TEXT, XDW_AID_LINK) and size is not None:
+            self.size = Point(*size)
+        position = Point(*(position or _POSITION))
+        size = Point(*(size or _SIZE))
+        self._points = None  # keep ctypes array alive
+        init = dict()
+        if t == XDW_AID_FUSEN:
+            if size.x < MIN_FUSEN_SIZE or size.y < MIN_FUSEN_SIZE:
+                raise ValueError(FUSEN_TOO_SMALL)
+            init = dict(nWidth=(size.x * 100), nHeight=(size.y * 100))
+        elif t in (XDW_AID_RECTANGLE, XDW_AID_ARC):
+            if size.x < MIN_ANN_SIZE or size.y < MIN_ANN_SIZE:
+                raise ValueError(ANN_TOO_SMALL)
+            init = dict(nWidth=(size.x * 100), nHeight=(size.y * 100))
+        elif t == XDW_AID_STRAIGHTLINE:
+            points = points or _POINTS[:2]
+            if 2 < len(points):
+                raise ValueError("> 2 points given; consider MARKER")
+            points = relative_points([Point(*p) for p in points])
+            position = points[0]
+            init = dict(nHorVec=(points[1].x * 100),
+                        nVerVec=(points[1].y * 100))
+        elif t in (XDW_AID_MARKER, XDW_AID_POLYGON):
+            c_points = xdw_points(points or _POINTS)
+            self._points = c_points
+            position = _POSITION  # dummy
+            init = dict(nCounts=len(c_points), pPoints=c_points)
+        elif t == XDW_AID_STAMP:
+            init = dict(nWidth=(width * 100))
+        elif t == XDW_AID_BITMAP:
+            if 8 <= XDWVER:
+                init = dict(wszImagePath=path)
+            else:
+                init = dict(szImagePath=path)
+        self.position = position
+        self.init_dat = Annotatable.initial_data(t, **init)
+        self.attributes = [
+                (inner_attribute_name(k),
+                 encode_attribute(self.type, inner_attribute_name(k), v))
+                for (k, v) in kw.items()]
+
+    def __repr__(self):
+        return "{cls}({type}, {pos})".format(
+                cls=self.__class__.__name__,
+                type=self.type,
+                pos=self.position)
+
+    @staticmethod
+    def compile(spec):
+        """Get an AnnotationSpec from AnnotationSpec or dict.
+
+        spec    (AnnotationSpec) returned as is
+                (dict) keywords for AnnotationSpec() with 'type' key
+        """
+        if isinstance(spec, AnnotationSpec):
+            return spec
+        spec = dict(spec)
+        return AnnotationSpec(spec.pop("type"), **spec)
+
+    def paste(self, doc_handle, page=0, parent_handle=None):
+        """Paste annotation and returns its handle.
+
+        doc_handle      document handle
+        page            (int) absolute page number; starts with 1
+        parent_handle   parent annotation handle; None for page
+        """
+        x, y = int(self.position.x * 100), int(self.position.y * 100)
+        if parent_handle:
+            handle = XDW_AddAnnotationOnParentAnnotation(doc_handle,
+                    parent_handle, self.ann_type, x, y, self.init_dat)
+        else:
+            handle = XDW_AddAnnotation(doc_handle,
+                    self.ann_type, page, x, y, self.init_dat)
+        self.apply(doc_handle, handle)
+        return handle
+
+    def apply(self, doc_handle, handle):
+        """Store precompiled attributes (and size) to annotation."""
+        for (attrname, encoded) in self.attributes:
+            set_attribute(doc_handle, handle, attrname, encoded)
+        if self.size:
+            XDW_SetAnnotationSize(doc_handle, handle,
+                    int(self.size.x * 100), int(self.size.y * 100))
+
+
 class AnnotationCache(object):
 
     """Annotation cache.
@@ -42,12 +350,15 @@ class AnnotationCache(object):
     Annotation's type and attributes, such as text, fore_color, fill_style,
     points, position and size, will be kept as read-only.  Note that custom
     user defined properties and user defined attributes are not supported.
+
+    Child annotations are kept as a tuple of AnnotationCache objects in
+    children attribute if given.  AnnotationCache objects are picklable.
     """
 
-    def __init__(self, arg, **kw):
+    def __init__(self, arg, children=(), **kw):
         """Initiator.
 
-        __init__(ann) or __init__(type, **kw)
+        __init__(ann) or __init__(type, children=(), **kw)
         """
         _set = object.__setattr__
         if isinstance(arg, str):
@@ -58,6 +369,10 @@ class AnnotationCache(object):
             assert len(kw) == 0
             _set(self, "_t", arg.type)
             _set(self, "_a", arg.attributes())
+        _set(self, "_c", tuple(children))
+
+    def __reduce__(self):
+        return (_restore_annotation_cache, (self._t, self._a, self._c))
 
     def __repr__(self):
         return "{cls}('{typ}', {attr})".format(
@@ -79,12 +394,16 @@ class AnnotationCache(object):
 
     def rect(self):
         """Returns display region for handiness."""
-        return Rect(self.position, self.position + self.size)
+        return Rect(*self.position, *(self.position + self.size))
 
     @property
     def type(self):
         return self._t
 
+    @property
+    def children(self):
+        return self._c
+
     def content_text(self):
         """Returns content text of annotation cache."""
         if self._t == "TEXT":
@@ -100,6 +419,10 @@ class AnnotationCache(object):
         return self._a
 
 
+def _restore_annotation_cache(t, a, c):
+    return AnnotationCache(t, children=c, **a)
+
+
 class Annotation(Annotatable, Observer):
 
     """Annotation on DocuWorks document page."""
@@ -129,18 +452,57 @@ class Annotation(Annotatable, Observer):
         self.reset_attr()
 
     def reset_attr(self):
-        info = XDW_GetAnnotationInformation(
-                self.page.doc.handle,
-                self.page.absolute_page() + 1,
-                self.parent.handle if self.parent else NULL,
-                self.pos + 1)
+        info = self._get_info()
         self.handle = info.handle
         self.type = XDW_ANNOTATION_TYPE[info.nAnnotationType]
         self.annotations = info.nChildAnnotations
         self.is_unicode = False
+        self._codepage = None  # for string attributes; see codepage
         self._set_property_count()
         #self.locked = unknown  # XDWAPI provides no information on this.
 
+    def _get_info(self):
+        """Fetch XDW_ANNOTATION_INFO and keep it until invalidated."""
+        self._info = XDW_GetAnnotationInformation(
+                self.page.doc.handle,
+                self.page.absolute_page() + 1,
+                self.parent.handle if self.parent else NULL,
+                self.pos + 1)
+        return self._info
+
+    @property
+    def info(self):
+        """Cached XDW_ANNOTATION_INFO."""
+        return self._info or self._get_info()
+
+    @property
+    def codepage(self):
+        """Codepage for string attributes, given by font_char_set.
+
+        The value is kept until font_char_set is set through xdwlib or
+        refresh() is called.
+        """
+        if self._codepage is None:
+            self._codepage = charset_to_codepage(get_attribute(
+                    self.handle, self.type, XDW_ATN_FontCharSet)[0])
+        return self._codepage
+
+    def _changed(self):
+        """Invalidate cached information after position or size change."""
+        self._info = None
+        self.page._annotation_changed(self)
+
+    def refresh(self):
+        """Reload annotation information.
+
+        Position, size and the number of child annotations are cached and
+        updated automatically after changes through xdwlib.  Call this
+        method after changes by other means e.g. DocuWorks Viewer.
+        """
+        self.reset_attr()
+        self._changed()
+        self._reset_annotation_info()
+
     def __repr__(self):
         parents = []
         ann = self
@@ -182,14 +544,11 @@ class Annotation(Annotatable, Observer):
             XDW_SetAnnotationAttributeW(
                     self.page.doc.handle, self.handle,
                     cp(f"%{d}Margin"), XDW_ATYPE_INT, byref(v), 0, 0)
+        self._changed()
 
     @property
     def position(self):
-        info = XDW_GetAnnotationInformation(
-                self.page.doc.handle,
-                self.page.absolute_page() + 1,
-                self.parent.handle if self.parent else NULL,
-                self.pos + 1)
+        info = self.info
         return Point(info.nHorPos, info.nVerPos) / 100.0
 
     @position.setter
@@ -197,14 +556,12 @@ class Annotation(Annotatable, Observer):
         XDW_SetAnnotationPosition(
                 self.page.doc.handle, self.handle,
                 int(value.x * 100), int(value.y * 100))
+        self._changed()
+        self._reset_annotation_info()
 
     @property
     def size(self):
-        info = XDW_GetAnnotationInformation(
-                self.page.doc.handle,
-                self.page.absolute_page() + 1,
-                self.parent.handle if self.parent else NULL,
-                self.pos + 1)
+        info = self.info
         return Point(info.nWidth, info.nHeight) / 100.0
 
     @size.setter
@@ -216,6 +573,7 @@ class Annotation(Annotatable, Observer):
         XDW_SetAnnotationSize(
                 self.page.doc.handle, self.handle,
                 int(value.x * 100), int(value.y * 100))
+        self._changed()
 
     def __getattribute__(self, name):
         attrname = inner_attribute_name(name)
@@ -223,101 +581,27 @@ class Annotation(Annotatable, Observer):
             return Annotatable.__getattribute__(self, name)
         self_handle = Annotatable.__getattribute__(self, "handle")
         self_type = Annotatable.__getattribute__(self, "type")
-        self_is_unicode = Annotatable.__getattribute__(self, "is_unicode")
         attrtype = XDW_ANNOTATION_ATTRIBUTE[attrname][0]
         if attrtype == XDW_ATYPE_STRING:
-            codepage = charset_to_codepage(self.font_char_set)
+            codepage = Annotatable.__getattribute__(self, "codepage")
         else:
             codepage = CP
-        try:
-            data_type, value, text_type = XDW_GetAnnotationAttributeW(
-                    self_handle, attrname, codepage=codepage)
-        except InfoNotFoundError:
-            return None
-        if data_type == XDW_ATYPE_INT:
-            if self_type == "STICKEY" and attrname.endswith(b"Color"):
-                try:
-                    return XDW_COLOR_FUSEN[value]
-                except KeyError:
-                    if isinstance(value, int):
-                        return value
-                    raise
-            elif self_type == "LINK" and attrname.endswith(b"XdwPage"):
-                return value - 1  # So, -1 for profile view.
-            return scale(attrname, value, store=False)
-        elif data_type == XDW_ATYPE_STRING:
-            self.is_unicode = (text_type == XDW_TEXT_UNICODE)
-            return value
-        #elif data_type == XDW_ATYPE_DATE:  # unsupported in SDK
-        #    return f"<<DATE:{value}>>"
-        #elif data_type == XDW_ATYPE_BOOL:  # unsupported in SDK
-        #    return f"<<BOOL:{value}>>"
-        #elif data_type == XDW_ATYPE_OCTS:  # unsupported in SDK
-        #    return f"<<OCTS:{value}>>"
-        elif data_type == XDW_ATYPE_POINTS:  # Quick hack for points.
-            points = [Point(
-                    scale(attrname, p.x),
-                    scale(attrname, p.y)) for p in value]
-            return absolute_points(points)
-        else:
-            return f"<<TYPE{data_type}:{value}>>"
+        value, is_unicode = get_attribute(
+                self_handle, self_type, attrname, codepage=codepage)
+        if is_unicode is not None:
+            self.is_unicode = is_unicode
+        return value
 
     def __setattr__(self, name, value):
         attrname = inner_attribute_name(name)
-        if attrname == XDW_ATN_Points:
-            raise AttributeError(
-                    "Points of polygon or marker cannot be updated.")
         if attrname in XDW_ANNOTATION_ATTRIBUTE:
-            if self.type == "STICKEY" and attrname.endswith(b"Color"):
-                value = XDW_COLOR_FUSEN.normalize(value)
-            elif self.type == "LINK" and attrname.endswith(b"Page"):
-                value += 1  # So, specify -1 for profile view.
-            t, unit, limited = XDW_ANNOTATION_ATTRIBUTE[attrname]
-            anntype = XDW_ANNOTATION_TYPE.inner(self.type)
-            if limited and anntype not in limited:
-                raise AttributeError(
-                        f"illegal attribute {self.type}.{name}")
-            if t == 0 or isinstance(unit, XDWConst):
-                if not isinstance(unit, XDWConst):
-                    if not isinstance(value, (int, float)):
-                        raise ValueError(
-                                "numeric data required, text given")
-                value = c_int(int(scale(attrname, value, store=True)))
-                XDW_SetAnnotationAttributeW(
-                        self.page.doc.handle,
-                        self.handle,
-                        attrname,
-                        XDW_ATYPE_INT,
-                        byref(value),
-                        0,
-                        0)
-            elif t == 1:
-                if not isinstance(value, str):
-                    raise ValueError(
-                            f'text data required, non-text {value} given')
-                if (self.is_unicode and
-                    XDW_ANNOTATION_TYPE.normalize(self.type) in (
-                        XDW_ATN_Text,
-                        XDW_ATN_Caption, XDW_ATN_Url, XDW_ATN_XdwPath,
-                        XDW_ATN_XdwNameInXbd, XDW_ATN_Tooltip_String,
-                        XDW_ATN_LinkAtn_Title, XDW_ATN_OtherFilePath,
-                        XDW_ATN_MailAddress,
-                        XDW_ATN_TopField, XDW_ATN_BottomField,
-                        )):
-                    texttype = XDW_TEXT_UNICODE
-                else:
-                    texttype = XDW_TEXT_MULTIBYTE
-                XDW_SetAnnotationAttributeW(
-                        self.page.doc.handle,
-                        self.handle,
-                        attrname,
-                        XDW_ATYPE_STRING,
-                        value,
-                        texttype,
-                        codepage=CP)
-            else:
-                raise TypeError(
-                        "Invalid type to set attribute value: " + str(value))
+            set_attribute(self.page.doc.handle, self.handle, attrname,
+                    encode_attribute(self.type, attrname, value,
+                                     is_unicode=self.is_unicode))
+            if attrname == XDW_ATN_FontCharSet:
+                self._codepage = None
+            # Attributes e.g. text or font size may resize annotation.
+            self._changed()
         else:
             Annotatable.__setattr__(self, name, value)
 
@@ -455,31 +739,57 @@ class Annotation(Annotatable, Observer):
                 self.pos += 1
         else:
             raise ValueError(f"Illegal event type: {event.type}")
+        self._info = None
 
     def attributes(self):
         """Returns dict of annotation attribute names and values."""
-        tv = XDW_ANNOTATION_TYPE.normalize(self.type)
-        d = dict((outer_attribute_name(k), getattr(self, uc(k)))
-                for (k, v) in XDW_ANNOTATION_ATTRIBUTE.items()
-                if tv in v[2])
-        d["position"] = self.position
-        d["size"] = self.size
+        d, is_unicode = get_attributes(self.handle, self.type)
+        if is_unicode is not None:
+            self.is_unicode = is_unicode
+        info = self.info
+        d["position"] = Point(info.nHorPos, info.nVerPos) / 100.0
+        d["size"] = Point(info.nWidth, info.nHeight) / 100.0
         return d
 
+    def snapshot(self):
+        """Returns an AnnotationCache object with child annotations.
+
+        See Page.snapshot_annotations() for details.
+        """
+        return AnnotationCache(self.type,
+                children=snapshot(self.page.doc.handle,
+                                  self.page.absolute_page() + 1,
+                                  self.handle, self.annotations),
+                **self.attributes())
+
+    def bitmap(self, renders=None):
+        """Returns page image in the region of annotation as a Bitmap object.
+
+        renders     (dict) page images to share; see Page.bitmap()
+        """
+        return self.page.bitmap(rect=self.bbox(), renders=renders)
+
+    def bbox(self):
+        """Returns bounding box as a Rect.
+
+        Points are used for straightline, marker and polygon, while
+        position and size are used for others.
+        """
+        if XDW_ATN_Points in valid_attributes(
+                XDW_ANNOTATION_TYPE.normalize(self.type)):
+            points = self.points
+            if points:
+                xs = [p.x for p in points]
+                ys = [p.y for p in points]
+                return Rect(min(xs), min(ys), max(xs), max(ys))
+        (l, t), (w, h) = self.position, self.size
+        return Rect(l, t, l + w, t + h)
+
     def inside(self, rect):  # Assume rect is half-open.
         """Returns if annotation is placed inside rect."""
         if isinstance(rect, (list, tuple)):
             rect = Rect(*rect[:4])
-        if hasattr(self, "points"):
-            xs = [p.x for p in self.points]
-            ys = [p.y for p in self.points]
-            l, t = min(xs), min(ys)
-            r, b = max(xs), max(ys)
-        elif hasattr(self, "size"):
-            l, t = self.position
-            r, b = self.position + self.size
-        rect = Rect(*(x * 100 for x  in rect))
-        l, t, r, b = l * 100, t * 100, r * 100, b * 100
+        l, t, r, b = self.bbox()
         return (rect.left <= l and r < rect.right and
                 rect.top <= t and b < rect.bottom)
 
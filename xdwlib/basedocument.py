@@ -15,7 +15,7 @@ FOR A PARTICULAR PURPOSE.
 
 import sys
 import os
-from io import StringIO
+from io import BytesIO
 
 from .xdwapi import *
 from .common import *
@@ -24,6 +24,7 @@ from .observer import *
 from .struct import Point
 from .xdwfile import xdwopen
 from .page import Page, PageCollection
+from .ocr import *
 
 
 __all__ = ("BaseDocument",)
@@ -240,7 +241,7 @@ class BaseDocument(Subject):
         for p in range(pos, pos + (self.pages - prev_pages)):
             Page(self, p)
 
-    def export(self, pos, path=None):
+    def export(self, pos, path=None, overwrite=False):
         """Export page to another document.
 
         pos     (int) page number; starts with 0
@@ -248,19 +249,23 @@ class BaseDocument(Subject):
                       with no dir, export to {document/binder dir}/{path}
                 (None) export to
                       {document/binder dir}/{document name}_P{num}.xdw
+        overwrite   (bool) overwrite existing file instead of exporting to
+                    a derivative e.g. {document name}_P{num}-2.xdw
 
         Returns the exported pathname which may differ from path.
         """
-        path = newpath(path or f"{self.name}_P{pos + 1}.xdw", dir=self.dirname())
-        if XDWVER < 8:
-            XDW_GetPage(self.handle, self.absolute_page(pos) + 1, cp(path))
-        else:
-            XDW_GetPageW(self.handle, self.absolute_page(pos) + 1, path)
+        path = newpath(path or f"{self.name}_P{pos + 1}.xdw",
+                       dir=self.dirname(), overwrite=overwrite)
+        with replacing(path) as out:
+            if XDWVER < 8:
+                XDW_GetPage(self.handle, self.absolute_page(pos) + 1, cp(out))
+            else:
+                XDW_GetPageW(self.handle, self.absolute_page(pos) + 1, out)
         return path
 
     def export_image(self, pos, path=None,
             pages=1, dpi=600, color="COLOR", format=None, compress="NORMAL",
-            direct=False):
+            direct=False, overwrite=False):
         """Export page(s) to image file.
 
         pos         (int or tuple (start stop) in half-open style like slice)
@@ -290,11 +295,13 @@ class BaseDocument(Subject):
                         the exported image.  Image orientation depends
                         on the internal state, so check 'degree' attribute
                         of the page if needed.
+        overwrite   (bool) overwrite existing file instead of exporting to
+                    a derivative e.g. {document name}_P{num}-2.bmp
 
         Returns the exported pathname which may differ from path.
         """
         if direct:
-            return self._export_direct_image(pos, path)
+            return self._export_direct_image(pos, path, overwrite=overwrite)
         if isinstance(pos, (list, tuple)):
             pos, pages = pos
             pages -= pos
@@ -307,7 +314,7 @@ class BaseDocument(Subject):
         path = newpath(path or (
                        f"{self.name}_P{pos + 1}.{format}" if pages == 1 else
                        f"{self.name}_P{pos + 1}-{pos + pages}.{format}"),
-                       dir=self.dirname())
+                       dir=self.dirname(), overwrite=overwrite)
         if not (10 <= dpi <= 600):
             raise ValueError("specify resolution between 10 and 600")
         opt = XDW_IMAGE_OPTION_EX()
@@ -355,17 +362,19 @@ class BaseDocument(Subject):
             # Compression method option is deprecated.
             dopt.nConvertMethod = XDW_CONVERT_MRC_OS
             opt.pDetailOption = cast(pointer(dopt), c_void_p)
-        if XDWVER < 8:
-            XDW_ConvertPageToImageFile(
-                    self.handle, self.absolute_page(pos) + 1, cp(path), opt)
-        else:
-            XDW_ConvertPageToImageFileW(
-                    self.handle, self.absolute_page(pos) + 1, path, opt)
+        with replacing(path) as out:
+            if XDWVER < 8:
+                XDW_ConvertPageToImageFile(
+                        self.handle, self.absolute_page(pos) + 1, cp(out), opt)
+            else:
+                XDW_ConvertPageToImageFileW(
+                        self.handle, self.absolute_page(pos) + 1, out, opt)
         return path
 
-    def _export_direct_image(self, pos, path=None):
+    def _export_direct_image(self, pos, path=None, overwrite=False):
         pos = self._pos(pos)
-        path = newpath(path or f"{self.name}_P{pos + 1}", dir=self.dirname())
+        path = newpath(path or f"{self.name}_P{pos + 1}", dir=self.dirname(),
+                       overwrite=overwrite)
         path, _ = os.path.splitext(path)
         if XDWVER < 8:
             fmt = XDW_GetCompressedPageImage(
@@ -374,7 +383,7 @@ class BaseDocument(Subject):
             fmt = XDW_GetCompressedPageImageW(
                     self.handle, self.absolute_page(pos) + 1, path)
         new_path = path + "." + XDW_IMAGE_FORMAT[fmt].lower()
-        os.rename(path, new_path)
+        (os.replace if overwrite else os.rename)(path, new_path)
         return new_path
 
     def bitmap(self, pos):
@@ -445,12 +454,16 @@ class BaseDocument(Subject):
         abspos = self.absolute_page(pos)
         if auto:
             XDW_RotatePageAuto(self.handle, abspos + 1)
+            if pos in self.observers:
+                self.observers[pos]._reset_annotation_info()
             return
         degree %= 360
         if degree == 0:
             return
         if degree in (90, 180, 270):
             XDW_RotatePage(self.handle, abspos + 1, degree)
+            if pos in self.observers:
+                self.observers[pos]._reset_annotation_info()
             return
         # Angle other than 90, 180 or 270 requires some imaging library.
         if not PIL_ENABLED:
@@ -460,7 +473,7 @@ class BaseDocument(Subject):
             out, orig_degree = self._preprocess(pos, direct=direct)
             in_ = out.path
         elif strategy == 2:
-            in_ = StringIO(self.bitmap(pos).octet_stream())
+            in_ = BytesIO(self.bitmap(pos).octet_stream())
             orig_degree = 0
             out = XDWTemp(suffix=".tif")
         else:
@@ -488,6 +501,255 @@ class BaseDocument(Subject):
             in_.close()
         self._postprocess(pos, out, orig_degree)
 
+    def ocr_batch(self, pages=None, concurrency=8, callback=None,
+            charset="DEFAULT", errors="replace", cache=None, **options):
+        """Process pages with Azure OCR concurrently.
+
+        pages       (sequence of int) page numbers; starts with 0
+                    (None) all image pages
+        concurrency (int) max. number of pages in flight
+        callback    function(pos, error) called as each page is done,
+                    where error is None on success
+        charset     see Page.ocr_azure()
+        errors      see Page.ocr_azure()
+        cache       (OCRCache) reuse OCR results for identical page images
+        **options   options for AzureReadClient i.e. endpoint,
+                    subscription_key, version, model_version, language,
+                    timeout, poll_interval, max_poll_interval and retries
+
+        OCR results are set to pages as they arrive.  Page images are
+        exported and OCR text is set in the caller's thread; only requests
+        to Azure run in worker threads.
+
+        Returns a dict {pos: exception} for failed pages.
+        """
+        client = AzureReadClient(**options)
+        if pages is None:
+            pages = [pg.pos for pg in self if pg.type == "IMAGE"]
+        failures = dict()
+
+        params = dict((k, options.get(k, v)) for (k, v) in (
+                ("version", "3.2"), ("model_version", "latest"),
+                ("language", None)))
+        keys = dict()  # {pos: key} of cache misses to put results
+
+        def prepare(pos):
+            image = self.page(pos)._ocr_image()
+            if cache is None:
+                return (image, None)
+            key = cache.key(image, "azure", **params)
+            rtlist = cache.get(key)
+            if rtlist is None:
+                keys[pos] = key
+            return (image, rtlist)
+
+        def work(arg):
+            image, rtlist = arg
+            return client.analyze(image) if rtlist is None else rtlist
+
+        def finish(pos, rtlist, error):
+            if not error:
+                try:
+                    pg = self.page(pos)
+                    pg.sort_rtlist(rtlist)
+                    key = keys.pop(pos, None)
+                    if key is not None:  # Not to refresh hits.
+                        cache.put(key, rtlist)
+                    pg.set_ocr_text(rtlist,
+                            charset=charset, errors=errors, unit="px")
+                except Exception as e:
+                    error = e
+            if error:
+                keys.pop(pos, None)
+                failures[pos] = error
+            if callback:
+                callback(pos, error)
+
+        run_pipeline(pages, prepare, work, finish,
+                     concurrency=concurrency)
+        return failures
+
+    def ocr_gcloud_batch(self, pages=None, batch_size=GCLOUD_MAX_IMAGES,
+            concurrency=2, callback=None, language=None, charset="DEFAULT",
+            errors="replace", credentials=None, cache=None, client=None):
+        """Process pages with Google Cloud Vision OCR in batches.
+
+        pages       (sequence of int) page numbers; starts with 0
+                    (None) all image pages
+        batch_size  (int) max. number of pages per request; up to 16
+        concurrency (int) max. number of requests in flight
+        callback    function(pos, error) called as each page is done,
+                    where error is None on success
+        language    see Page.ocr_gcloud()
+        charset     see Page.ocr_gcloud()
+        errors      see Page.ocr_gcloud()
+        credentials see Page.ocr_gcloud()
+        cache       (OCRCache) reuse OCR results for identical page images
+        client      (ImageAnnotatorClient) client to use instead of
+                    the one shared in the process
+
+        Several pages are sent in a batch_annotate_images request and OCR
+        results are set to pages as each response arrives.  Page images
+        are exported and OCR text is set in the caller's thread.
+
+        Returns a dict {pos: exception} for failed pages.
+        """
+        if not (GCVISION or client):
+            raise NotImplementedError("google-cloud-vision is not installed")
+        client = client or gcloud_client(credentials)
+        language = language and language.casefold()
+        if pages is None:
+            pages = [pg.pos for pg in self if pg.type == "IMAGE"]
+        pages = list(pages)
+        batch_size = max(1, min(batch_size, GCLOUD_MAX_IMAGES))
+        batches = [tuple(pages[i:i + batch_size])
+                   for i in range(0, len(pages), batch_size)]
+        failures = dict()
+
+        def done(pos, rtlist=None, key=None, error=None):
+            if not error:
+                try:
+                    pg = self.page(pos)
+                    if key:
+                        cache.put(key, rtlist)
+                    pg.set_ocr_text(rtlist,
+                            charset=charset, errors=errors, unit="px")
+                except Exception as e:
+                    error = e
+            if error:
+                failures[pos] = error
+            if callback:
+                callback(pos, error)
+
+        sent = dict()  # {batch number: [(pos, key, image), ...]}
+
+        def prepare(n):
+            sent[n] = []
+            for pos in batches[n]:
+                try:
+                    image = self.page(pos)._ocr_image()
+                except Exception as e:
+                    done(pos, error=e)
+                    continue
+                key = None
+                if cache is not None:
+                    key = cache.key(image, "gcloud", language=language)
+                    rtlist = cache.get(key)
+                    if rtlist is not None:
+                        done(pos, rtlist)
+                        continue
+                sent[n].append((pos, key, image))
+            return [gcloud_request(image) for (_, _, image) in sent[n]]
+
+        def work(requests):
+            if not requests:
+                return []
+            return client.batch_annotate_images(requests=requests).responses
+
+        def finish(n, responses, error):
+            for i, (pos, key, _) in enumerate(sent.pop(n)):
+                rtlist = None
+                if not error:
+                    try:
+                        rtlist = gcloud_rtlist(responses[i], language=language)
+                        Page.sort_rtlist(rtlist)
+                    except Exception as e:
+                        done(pos, error=e)
+                        continue
+                done(pos, rtlist, key, error)
+
+        run_pipeline(range(len(batches)), prepare, work, finish,
+                     concurrency=concurrency)
+        return failures
+
+    def stamp(self, spec, pages=None, save=True):
+        """Paste the same annotations on many pages.
+
+        spec        (AnnotationSpec or dict) annotation to paste
+                    (list) annotations to paste
+        pages       (sequence of int) page numbers; None means all pages
+        save        (bool) save document (or binder) after all pages
+
+        Specs are compiled only once.  No Page nor Annotation object is
+        built for pages which have not been accessed yet, and document is
+        saved once at the end.
+
+        Returns number of annotations pasted.
+        """
+        from .annotation import AnnotationSpec
+        if not isinstance(spec, (list, tuple)):
+            spec = [spec]
+        specs = [AnnotationSpec.compile(s) for s in spec]
+        if pages is None:
+            pages = range(self.pages)
+        count = 0
+        for pos in pages:
+            pos = self._pos(pos)
+            if pos in self.observers:
+                count += len(self.observers[pos].add_many(specs))
+                continue
+            abspos = self.absolute_page(pos) + 1
+            for s in specs:
+                s.paste(self.handle, abspos)
+            count += len(specs)
+        if save:
+            getattr(self, "binder", self).save()
+        return count
+
+    def export_annotations(self, path=None, pages=None, format=None,
+                           overwrite=False):
+        """Export annotations into an AnnotationMarkup object.
+
+        path        (str) pathname to save markup; None means not to save
+        pages       (sequence of int) page numbers; None means all pages
+        format      'json' | 'msgpack' | None; see AnnotationMarkup.save()
+        overwrite   (bool) overwrite existing file
+
+        Returns an AnnotationMarkup object.
+        """
+        from .markup import AnnotationMarkup
+        if pages is None:
+            pages = range(self.pages)
+        markup = AnnotationMarkup.from_pages(self.page(pos) for pos in pages)
+        if path:
+            markup.save(path, format=format, overwrite=overwrite)
+        return markup
+
+    def import_annotations(self, markup, pages=None, save=True):
+        """Paste annotations in markup given by export_annotations().
+
+        markup      (AnnotationMarkup, dict or str) markup, or pathname
+                    of saved markup
+        pages       (sequence of int) page numbers; None means all pages
+        save        (bool) save document (or binder) after all pages
+
+        Pages in markup are pasted on pages in order, and repeated if
+        markup has fewer pages e.g. single-page markup goes to every page.
+        Like stamp(), no Page object is built for pages not accessed yet.
+
+        Returns the number of top-level annotations pasted.
+        """
+        from .markup import AnnotationMarkup
+        markup = AnnotationMarkup.get(markup)
+        if not len(markup):
+            return 0
+        if pages is None:
+            pages = range(self.pages)
+        count = 0
+        for (i, pos) in enumerate(pages):
+            pos = self._pos(pos)
+            index = i % len(markup)
+            if pos in self.observers:
+                count += self.observers[pos].import_annotations(markup,
+                                                                index=index)
+            else:
+                count += markup.paste(self.handle,
+                                      self.absolute_page(pos) + 1,
+                                      index=index)
+        if save:
+            getattr(self, "binder", self).save()
+        return count
+
     def view(self, light=False, wait=True, page=0, fullscreen=False, zoom=0):
         """View document with DocuWorks Viewer (Light).
 
@@ -13,23 +13,47 @@ WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
 FOR A PARTICULAR PURPOSE.
 """
 
+import os
+import shutil
+from collections import namedtuple
+
 from .xdwapi import *
 from .common import *
 from .observer import *
-from .xdwfile import XDWFile
+from .xdwtemp import XDWTemp
+from .xdwfile import XDWFile, xdwopen, export_parallel
 from .documentinbinder import DocumentInBinder
 from .page import Page, PageCollection
 
 
-__all__ = ("Binder", "create", "create_binder")
+__all__ = ("Binder", "ExportedDocument", "create", "create_binder")
+
+
+ExportedDocument = namedtuple("ExportedDocument", "pos name pages path")
+ExportedDocument.__doc__ = """\
+A document exported from binder.
+
+pos     (int) position in binder; starts with 0
+name    (str) document name in binder
+pages   (int) number of pages
+path    (str) pathname of exported document
+"""
 
 
-def create(path, color="RED", size="FREE", coding=CODEPAGE):
+def create(path, color="RED", size="FREE", coding=CODEPAGE, documents=None,
+           derive=True):
     """The XBD generator.
 
+    documents   (sequence of str) pathnames of documents to put in binder,
+                which is saved once after all are inserted
+    derive      (bool) create a derivative e.g. {name}-2.xbd instead of
+                path if it exists; False means path has been allocated
+                by newpath() etc. already
+
     Returns the created pathname which may differ from path.
     """
-    path = derivative_path(path)
+    if derive:
+        path = derivative_path(path)
     data = XDW_BINDER_INITIAL_DATA()
     data.nBinderColor = XDW_BINDER_COLOR.normalize(color)
     data.nBinderSize = XDW_BINDER_SIZE.normalize(size)
@@ -37,6 +61,13 @@ def create(path, color="RED", size="FREE", coding=CODEPAGE):
         XDW_CreateBinder(cp(path), data)
     else:
         XDW_CreateBinderW(path, data)
+    if documents:
+        bdr = xdwopen(path)
+        try:
+            bdr.extend(documents)
+            bdr.save()
+        finally:
+            bdr.close()
     return path
 
 
@@ -189,6 +220,40 @@ class Binder(Subject, XDWFile):
         doc = self.document(pos)
         self.attach(doc, EV_DOC_INSERTED)
 
+    def extend(self, paths, pos=None):
+        """Insert documents by path in one pass.
+
+        paths   (sequence of str) paths to files to insert
+        pos     (int) position to insert; starts with 0
+                None means to append at the end of binder
+
+        Unlike repeated insert(), DocumentInBinder objects are not created
+        for the inserted documents, and positions and page offsets of
+        existing DocumentInBinder objects are updated only once at the
+        end.  Save the binder afterwards to store them all at once.
+
+        Returns the number of inserted documents.
+        """
+        pos = self._pos(self.documents if pos is None else pos, append=True)
+        count = 0
+        try:
+            for path in paths:
+                XDW_InsertDocumentToBinder(self.handle, pos + count + 1,
+                                           cp(path))
+                count += 1
+        finally:
+            if count:
+                self.documents += count
+                self.shift_keys(pos - 1, count=count)
+                offsets = [0]
+                for pages in self.document_pages():
+                    offsets.append(offsets[-1] + pages)
+                for (p, doc) in self.observers.items():
+                    if pos <= p:
+                        doc.pos = p
+                        doc.page_offset = offsets[p]
+        return count
+
     def delete(self, pos):
         """Delete a document.
 
@@ -200,24 +265,125 @@ class Binder(Subject, XDWFile):
         self.detach(doc, EV_DOC_REMOVED)
         self.documents -= 1
 
-    def export(self, pos, path=None):
+    def export(self, pos, path=None, overwrite=False):
         """Export a document in binder.
 
         pos     (int) position to export; starts with 0
         path    (str) export to {path};
                       with no dir, export to {binder dir}/{path}
                 (None) export to {binder dir}/{document name}
+        overwrite   (bool) overwrite existing file instead of exporting to
+                    a derivative e.g. {document name}-2.xdw
 
         Returns the exported pathname which may differ from path.
         """
         pos = self._pos(pos)
-        path = newpath(path or self.document(pos).name + ".xdw", dir=self.dir)
-        if XDWVER < 8:
-            XDW_GetDocumentFromBinder(self.handle, pos + 1, cp(path))
-        else:
-            XDW_GetDocumentFromBinderW(self.handle, pos + 1, path)
+        path = newpath(path or self.document(pos).name + ".xdw", dir=self.dir,
+                       overwrite=overwrite)
+        with replacing(path) as out:
+            if XDWVER < 8:
+                XDW_GetDocumentFromBinder(self.handle, pos + 1, cp(out))
+            else:
+                XDW_GetDocumentFromBinderW(self.handle, pos + 1, out)
         return path
 
+    def export_all(self, dir=None, overwrite=False, concurrency=1,
+                   callback=None):
+        """Export all documents in binder.
+
+        dir         (str) directory to export to;
+                    None means {binder dir}
+        overwrite   (bool) overwrite existing files instead of exporting
+                    to derivatives e.g. {document name}-2.xdw
+        concurrency (int) worker processes to export documents;
+                    1 means to export in the caller's process
+        callback    function(ExportedDocument) called as each document
+                    is exported
+
+        Documents are exported to {dir}/{document name}.xdw, where
+        pathnames are allocated at once beforehand; documents of the same
+        name are exported to derivatives even if overwrite is True.
+        Existing files are not removed beforehand but replaced as each
+        document is exported.  With concurrency > 1, each worker process
+        opens the binder file as saved read-only and exports consecutive
+        documents; save changes beforehand.
+
+        Returns a list of ExportedDocument in order of position.
+        """
+        dir = dir or self.dir
+        pages = self.document_pages()
+        manifest = []
+        overwritten = set()
+        for pos in range(self.documents):
+            name = XDW_GetDocumentNameInBinderW(
+                    self.handle, pos + 1, codepage=CP)[0]
+            path = adjust_path(name + ".xdw", dir=dir)
+            # Only the first document of the name overwrites the file.
+            if (overwrite and os.path.exists(path) and
+                    os.path.normcase(path) not in overwritten):
+                overwritten.add(os.path.normcase(path))
+            else:
+                path = newpath(path)
+            manifest.append(ExportedDocument(pos, name, pages[pos], path))
+
+        def done(pos, path):
+            if callback:
+                callback(manifest[pos])
+
+        items = [(entry.pos, entry.path) for entry in manifest]
+        if 1 < concurrency and 1 < len(items):
+            export_parallel(self.pathname(), items,
+                            concurrency=concurrency, callback=done)
+        else:
+            for (pos, path) in items:
+                self.export(pos, path, overwrite=True)
+                done(pos, path)
+        return manifest
+
+    def flatten(self, output_path=None, fan_in=None, concurrency=1,
+                overwrite=False):
+        """Merge all documents in binder into a new document.
+
+        output_path (str) pathname of document;
+                    with no dir, create {binder dir}/{output_path}
+                    (None) create {binder dir}/{binder name}.xdw
+        fan_in      (int) max. number of documents to merge at once;
+                    None means to merge all at once; see merge()
+        concurrency (int) worker processes to export and merge documents;
+                    1 means to work in the caller's process
+        overwrite   (bool) overwrite existing file instead of creating
+                    a derivative e.g. {binder name}-2.xdw
+
+        Each document is exported into a temporary file and all of them
+        are merged with one XDW_MergeXdwFiles() call (or hierarchically
+        with fan_in), instead of appending documents one by one.  With
+        concurrency > 1, worker processes export documents from the
+        binder file as saved; save changes beforehand.
+
+        Returns the created pathname which may differ from output_path.
+        """
+        from .document import merge
+        if not self.documents:
+            raise ValueError("binder has no documents")
+        output_path = newpath(output_path or self.name + ".xdw",
+                              dir=self.dir, overwrite=overwrite)
+        with XDWTemp() as temp:
+            try:
+                paths = [os.path.join(temp.dir, f"{pos + 1:06d}.xdw")
+                         for pos in range(self.documents)]
+                if 1 < concurrency and 1 < self.documents:
+                    export_parallel(self.pathname(), enumerate(paths),
+                                    concurrency=concurrency)
+                else:
+                    for (pos, path) in enumerate(paths):
+                        self.export(pos, path, overwrite=True)
+                with replacing(output_path) as out:
+                    merge(paths, out, fan_in=fan_in, concurrency=concurrency,
+                          derive=False)
+                return output_path
+            finally:
+                shutil.rmtree(temp.dir, ignore_errors=True)
+
     def view(self, light=False, wait=True, page=0, fullscreen=False, zoom=0):
         """View binder with DocuWorks Viewer (Light).
 
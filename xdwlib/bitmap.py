@@ -76,10 +76,36 @@ class Bitmap(object):
         memmove(pointer(self.header),
                 bitmap_info_header_p,
                 sizeof(self.header))
+        p = bitmap_info_header_p + sizeof(self.header)
+        # Color table follows the header for 1, 4 and 8 bpp.
+        self.palette = string_at(p, self._palette_size(self.header))
+        p += len(self.palette)
+        if not self.header.biSizeImage:  # allowed for BI_RGB
+            self.header.biSizeImage = self._stride(
+                    self.header.biWidth, self.header.biBitCount) * \
+                    abs(self.header.biHeight)
         self.data = create_string_buffer(self.header.biSizeImage)
-        memmove(pointer(self.data),
-                bitmap_info_header_p + sizeof(self.header),
-                self.header.biSizeImage)
+        memmove(pointer(self.data), p, self.header.biSizeImage)
+
+    @staticmethod
+    def _from_parts(header, palette, data):
+        bitmap = object.__new__(Bitmap)
+        bitmap.header = header
+        bitmap.palette = palette
+        bitmap.data = create_string_buffer(data, len(data))
+        return bitmap
+
+    @staticmethod
+    def _palette_size(header):
+        colors = header.biClrUsed
+        if not colors and header.biBitCount <= 8:
+            colors = 1 << header.biBitCount
+        return colors * 4  # RGBQUAD
+
+    @staticmethod
+    def _stride(width, depth):
+        """Bytes per row, padded to DWORD boundary."""
+        return ((width * depth + 31) // 32) * 4
 
     def __getattribute__(self, name):
         self_header = object.__getattribute__(self, "header")
@@ -107,10 +133,10 @@ class Bitmap(object):
         ihs = sizeof(BitmapInfoHeader)
         s = []
         s.extend(b"BM")
-        s.extend(self._pack32(fhs + ihs + self.data_size))
+        s.extend(self._pack32(fhs + ihs + len(self.palette) + self.data_size))
         s.extend(self._pack16(0))
         s.extend(self._pack16(0))
-        s.extend(self._pack32(fhs + ihs))
+        s.extend(self._pack32(fhs + ihs + len(self.palette)))
         return bytes(s)
 
     def info_header(self):
@@ -120,7 +146,54 @@ class Bitmap(object):
         return header.raw
 
     def octet_stream(self):
-        return self.file_header() + self.info_header() + self.data.raw
+        return (self.file_header() + self.info_header() + self.palette +
+                self.data.raw)
+
+    def crop(self, rect):
+        """Get a part of bitmap as a new Bitmap without re-encoding.
+
+        rect    (sequence of 4 int) left, top, right and bottom in pixels
+                from top-left corner; right and bottom are exclusive
+
+        Region outside of bitmap is ignored.  Rows are copied as they are
+        for 8, 16, 24 and 32 bpp, or shifted bitwise for 1 and 4 bpp.
+        Color table and resolution are inherited.  Only uncompressed
+        (BI_RGB) bitmap is supported.
+        """
+        if self.compression != 0:
+            raise NotImplementedError("compressed bitmap is not supported")
+        width, height = self.width, abs(self.height)
+        depth = self.depth
+        l, t, r, b = (int(v) for v in rect)
+        l, t, r, b = max(0, l), max(0, t), min(width, r), min(height, b)
+        if r <= l or b <= t:
+            raise ValueError(f"no region to crop in {rect}")
+        stride = self._stride(width, depth)
+        new_width = r - l
+        new_stride = self._stride(new_width, depth)
+        bits = new_width * depth
+        pad = -bits % 8
+        raw = self.data.raw
+        bottom_up = 0 < self.height
+        rows = []
+        for y in range(t, b):
+            if bottom_up:
+                y = height - 1 - y
+            row = raw[y * stride:(y + 1) * stride]
+            if depth % 8 == 0:
+                row = row[l * depth // 8:r * depth // 8]
+            else:
+                n = int.from_bytes(row, "big") >> (stride * 8 - r * depth)
+                n = (n & ((1 << bits) - 1)) << pad
+                row = n.to_bytes((bits + pad) // 8, "big")
+            rows.append(row.ljust(new_stride, b"\0"))
+        if bottom_up:
+            rows.reverse()
+        header = BitmapInfoHeader.from_buffer_copy(bytes(self.header))
+        header.biWidth = new_width
+        header.biHeight = (b - t) if bottom_up else (t - b)
+        header.biSizeImage = new_stride * (b - t)
+        return Bitmap._from_parts(header, self.palette, b"".join(rows))
 
     def save(self, stream):
         if hasattr(stream, "write"):
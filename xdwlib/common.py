@@ -18,7 +18,10 @@ import re
 import base64
 import time
 import datetime
+import threading
 from functools import reduce
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from winreg import QueryValueEx, OpenKey, HKEY_LOCAL_MACHINE
 
 from .xdwapi import *
@@ -37,7 +40,9 @@ __all__ = (
         "mm2in", "in2mm", "mm2px", "px2mm",
         "environ", "get_viewer",
         "inner_attribute_name", "outer_attribute_name",
-        "adjust_path", "cp", "uc", "derivative_path", "newpath",
+        "adjust_path", "cp", "uc", "derivative_path", "newpath", "replacing",
+        "run_pipeline",
+        "NameAllocator", "name_allocator",
         "joinf", "flagvalue", "typevalue", "makevalue", "scale", "unpack",
         "charset_to_codepage", "codepage_to_charset",
         "set_ansi_charset", "set_oem_charset",
@@ -260,25 +265,109 @@ def uc(s):
     raise TypeError(f"str or bytes expected, {s.__class__} given")
 
 
+class NameAllocator(object):
+
+    """Allocator of unique pathnames for output.
+
+    Each directory is scanned once, and pathnames are reserved in memory
+    as they are handed out, so that allocating many derivatives of the
+    same name e.g. somedocument-2.xdw, somedocument-3.xdw, ... does not
+    probe the filesystem repeatedly.  Allocation is atomic among threads
+    in a process, and a reserved pathname is never handed out again, even
+    to the same thread, until the file is found created or release() is
+    called.
+
+    Names found on disk are checked again as they are allocated, so
+    a removed file gives its name back.  Derivative numbers below the
+    last one handed out are not probed again; call forget() to rescan
+    a directory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {dir: {name: (dir, root, ext) if reserved, None if found on disk}}
+        self._names = dict()
+        self._next = dict()  # {(dir, root, ext): next derivative number}
+
+    @staticmethod
+    def _scan(dir):
+        # NB. FileNotFoundError here is the one of xdwapi, not builtins.
+        if not os.path.isdir(dir):
+            return dict()
+        return dict.fromkeys(os.path.normcase(name)
+                             for name in os.listdir(dir))
+
+    def allocate(self, path):
+        """Reserve a pathname which is path itself or its derivative."""
+        dir, basename = os.path.split(os.path.abspath(path))
+        dkey = os.path.normcase(dir)
+        with self._lock:
+            names = self._names.get(dkey)
+            if names is None:
+                names = self._names[dkey] = self._scan(dir)
+            root, ext = os.path.splitext(basename)
+            nkey = (dkey, os.path.normcase(root), os.path.normcase(ext))
+            n = None  # Try basename first.
+            candidate = basename
+            while True:
+                name = os.path.normcase(candidate)
+                # Files made or removed by others are detected here.
+                if not os.path.exists(os.path.join(dir, candidate)):
+                    if names.get(name) is None:
+                        break
+                else:
+                    names[name] = None  # Reservation is over if any.
+                n = self._next.get(nkey, 2) if n is None else n + 1
+                candidate = f"{root}-{n}{ext}"
+            names[name] = nkey
+            if n is not None:
+                self._next[nkey] = n + 1
+        return os.path.join(os.path.split(path)[0], candidate)
+
+    def release(self, path):
+        """Drop reservation of path e.g. when output is abandoned."""
+        dir, basename = os.path.split(os.path.abspath(path))
+        dkey = os.path.normcase(dir)
+        with self._lock:
+            nkey = self._names.get(dkey, dict()).pop(
+                    os.path.normcase(basename), None)
+            if nkey and not os.path.exists(path):
+                # Let lower numbers be probed again.
+                self._next.pop(nkey, None)
+
+    def forget(self, dir=None):
+        """Drop reservations for dir, or all directories if None."""
+        with self._lock:
+            if dir is None:
+                self._names.clear()
+                self._next.clear()
+                return
+            dkey = os.path.normcase(os.path.abspath(dir))
+            self._names.pop(dkey, None)
+            for nkey in [k for k in self._next if k[0] == dkey]:
+                del self._next[nkey]
+
+
+name_allocator = NameAllocator()
+
+
 def derivative_path(path):
     """Convert pathname to n-th derivative e.g. somedocument-2.xdw or so.
 
     Addtional number (2, 3, ...) is determined automatically.
-    If pathname given does not exist, original pathname is returned.
+    If pathname given is not used yet, original pathname is returned.
+    The pathname returned is reserved by name_allocator.
     """
-    if not os.path.exists(path):
-        return path
-    root, ext = os.path.splitext(path)
-    n = 2
-    derivative = f"{root}-{n}{ext}"
-    while os.path.exists(derivative):
-        n += 1
-        derivative = f"{root}-{n}{ext}"
-    return derivative
+    return name_allocator.allocate(path)
 
 
-def newpath(path, dir="", ext=".xdw", coding=None):
-    """Build a new pathname available for output."""
+def newpath(path, dir="", ext=".xdw", coding=None, overwrite=False):
+    """Build a new pathname available for output.
+
+    overwrite   (bool) return the pathname even if it exists, instead of
+                deriving a new name; write it through replacing() so that
+                the existing file is kept until the new one is complete
+    """
     def eval(path): return path() if callable(path) else path
     if not path:
         path = adjust_path(eval(path), dir=dir, ext=ext, coding=coding)
@@ -286,9 +375,93 @@ def newpath(path, dir="", ext=".xdw", coding=None):
         path = adjust_path(eval(path), dir=dir)
     else:
         path = adjust_path(eval(path))
+    if overwrite:
+        return path
     return derivative_path(path)
 
 
+@contextmanager
+def replacing(path):
+    """Write a file in place of another atomically.
+
+    Yields path itself if it does not exist, or a temporary pathname in
+    the same directory otherwise, which replaces path when the block ends
+    without error.  On error the temporary file is removed and path is
+    left as it was, or the reservation of path by newpath() is dropped.
+
+    Example:
+
+        path = newpath(path, overwrite=True)
+        with replacing(path) as out:
+            XDW_GetPageW(handle, page, out)
+    """
+    if not os.path.exists(path):
+        try:
+            yield path
+        except BaseException:
+            name_allocator.release(path)
+            raise
+        return
+    dir, name = os.path.split(path)
+    temp = os.path.join(dir, f"~{os.getpid()}-{threading.get_ident()}-{name}")
+    try:
+        yield temp
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    os.replace(temp, path)
+
+
+def run_pipeline(items, prepare, work, finish, concurrency=8,
+                 executor=ThreadPoolExecutor):
+    """Run jobs concurrently, keeping preparation and finishing serial.
+
+    items       iterable of job keys e.g. page numbers or file indices
+    prepare     function(item) --> argument for work();
+                called in the caller's thread just before submitting a job
+    work        function(argument) --> result;
+                called in a worker thread, or a worker process with
+                ProcessPoolExecutor
+    finish      function(item, result, error) where error is an exception
+                raised by prepare() or work(), or None;
+                called in the caller's thread as each job is done
+    executor    class of concurrent.futures.Executor; ProcessPoolExecutor
+                for work() which opens files by itself, or is CPU-bound,
+                and must be picklable then
+
+    At most concurrency jobs are in flight at a time, so prepared arguments
+    e.g. page images are not held in memory all at once.  Documents opened
+    in the caller must be accessed only in prepare() and finish(), since
+    XDWAPI is not thread-safe; work() in worker processes may open files
+    by pathnames given by prepare() instead.
+    """
+    items = iter(items)
+    with executor(max_workers=concurrency) as executor:
+        pending = dict()
+
+        def submit():
+            for item in items:
+                try:
+                    arg = prepare(item)
+                except Exception as e:
+                    finish(item, None, e)
+                    continue
+                pending[executor.submit(work, arg)] = item
+                return True
+            return False
+
+        while len(pending) < concurrency and submit():
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                finish(item, None if error else future.result(), error)
+                submit()
+
+
 def flagvalue(table, value, store=True):
     """Sum up flag values according to XDWConst table."""
     if store and isinstance(value, (int, float)):
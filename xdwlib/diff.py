@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""diff.py -- differences of annotations between documents
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import hashlib
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .common import run_pipeline
+
+
+__all__ = ("diff_annotations", "AnnotationDiff", "AnnotationChange",
+           "fingerprint")
+
+
+# Attributes which determine where an annotation is, not what it is.
+GEOMETRY = ("position", "size", "points")
+
+AnnotationChange = namedtuple("AnnotationChange", "kind page a b")
+AnnotationChange.__doc__ = """\
+A difference of an annotation.
+
+kind    'ADDED' | 'REMOVED' | 'MOVED' | 'CHANGED'
+page    (int) page number; starts with 0
+a       (AnnotationCache) annotation in old document, or None if added
+b       (AnnotationCache) annotation in new document, or None if removed
+"""
+
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def fingerprint(ann, digits=2):
+    """Get fingerprints of an annotation.
+
+    ann     (AnnotationCache)
+    digits  (int) digits after decimal point (in mm) to compare geometry
+
+    Returns (content, geometry) where content is a hex digest of type,
+    attributes other than geometry and content of child annotations, and
+    geometry is a tuple of rounded position, size and points.
+    """
+    attrs = ann.attributes()
+    content = [ann.type]
+    content.extend(sorted((k, _hashable(v)) for (k, v) in attrs.items()
+                          if k not in GEOMETRY))
+    content.extend(fingerprint(child, digits=digits)
+                   for child in ann.children)
+    content = hashlib.sha1(repr(content).encode("utf-8")).hexdigest()
+    geometry = []
+    for k in GEOMETRY:
+        v = attrs.get(k)
+        if v is None:
+            continue
+        if k == "points":
+            v = [c for p in v for c in p]
+        geometry.append(tuple(round(c, digits) for c in v))
+    return (content, tuple(geometry))
+
+
+def _match(fp_a, fp_b, key):
+    """Pair items by key of fingerprints; returns pairs and the rest.
+
+    fp_a, fp_b  (dict) {index: fingerprint}
+    key         function(fingerprint) --> hashable key
+
+    Returns ([(index_a, index_b), ...], rest of fp_a, rest of fp_b).
+    """
+    table = dict()
+    for (i, fp) in fp_a.items():
+        table.setdefault(key(fp), deque()).append(i)
+    pairs = []
+    rest_b = dict()
+    for (j, fp) in fp_b.items():
+        candidates = table.get(key(fp))
+        if candidates:
+            pairs.append((candidates.popleft(), j))
+        else:
+            rest_b[j] = fp
+    paired = set(i for (i, _) in pairs)
+    rest_a = dict((i, fp) for (i, fp) in fp_a.items() if i not in paired)
+    return (pairs, rest_a, rest_b)
+
+
+def diff_page(args):
+    """Compare annotations on a page.
+
+    args    (page, anns_a, anns_b, digits) where anns_a and anns_b are
+            lists of AnnotationCache
+
+    Annotations are paired in three passes by hashing: first the same
+    content at the same place (unchanged), then the same content at
+    another place (MOVED), and finally the same type at the same place
+    with another content (CHANGED).  The rest are REMOVED or ADDED.
+
+    Returns (list of AnnotationChange, number of unchanged annotations).
+    """
+    page, anns_a, anns_b, digits = args
+    fp_a = dict((i, (a.type,) + fingerprint(a, digits=digits))
+                for (i, a) in enumerate(anns_a))
+    fp_b = dict((j, (b.type,) + fingerprint(b, digits=digits))
+                for (j, b) in enumerate(anns_b))
+    same, fp_a, fp_b = _match(fp_a, fp_b, lambda fp: fp)
+    moved, fp_a, fp_b = _match(fp_a, fp_b, lambda fp: fp[1])
+    changed, fp_a, fp_b = _match(fp_a, fp_b, lambda fp: (fp[0], fp[2]))
+    changes = [AnnotationChange("MOVED", page, anns_a[i], anns_b[j])
+               for (i, j) in moved]
+    changes.extend(AnnotationChange("CHANGED", page, anns_a[i], anns_b[j])
+                   for (i, j) in changed)
+    changes.extend(AnnotationChange("REMOVED", page, anns_a[i], None)
+                   for i in fp_a)
+    changes.extend(AnnotationChange("ADDED", page, None, anns_b[j])
+                   for j in fp_b)
+    return (changes, len(same))
+
+
+class AnnotationDiff(object):
+
+    """Differences of annotations between two documents.
+
+    ATTRIBUTES
+    ----------
+
+    changes     (list of AnnotationChange) in order of page
+    unchanged   (int) number of annotations unchanged
+    """
+
+    def __init__(self, changes=(), unchanged=0):
+        self.changes = list(changes)
+        self.unchanged = unchanged
+
+    def __repr__(self):
+        return "{cls}({counts}, unchanged={unchanged})".format(
+                cls=self.__class__.__name__,
+                counts=", ".join(f"{k.lower()}={len(self.of(k))}" for k
+                                 in ("ADDED", "REMOVED", "MOVED", "CHANGED")),
+                unchanged=self.unchanged)
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def of(self, kind):
+        """Get changes of kind; 'ADDED', 'REMOVED', 'MOVED' or 'CHANGED'."""
+        kind = kind.upper()
+        return [c for c in self.changes if c.kind == kind]
+
+    @property
+    def added(self):
+        return self.of("ADDED")
+
+    @property
+    def removed(self):
+        return self.of("REMOVED")
+
+    @property
+    def moved(self):
+        return self.of("MOVED")
+
+    @property
+    def changed(self):
+        return self.of("CHANGED")
+
+    def pages(self):
+        """Get page numbers with changes."""
+        return sorted(set(c.page for c in self.changes))
+
+
+def diff_annotations(doc_a, doc_b, digits=2, concurrency=1):
+    """Compare annotations of two documents page by page.
+
+    doc_a       (BaseDocument or str) old document or its pathname
+    doc_b       (BaseDocument or str) new document or its pathname
+    digits      (int) digits after decimal point (in mm) to compare geometry
+    concurrency (int) processes to compare pages in parallel;
+                1 means to compare in the caller's process
+
+    Annotations are read page by page in one pass, and compared by
+    fingerprint() in O(n) per page through hashing.  Child annotations
+    are not compared individually but as part of their parents.  With
+    concurrency > 1, reading next pages goes on while worker processes
+    compare the pages already read.
+
+    Pages only in either document have all their annotations ADDED or
+    REMOVED.
+
+    Returns an AnnotationDiff object.
+    """
+    from .xdwfile import xdwopen
+    opened = []
+    if isinstance(doc_a, str):
+        doc_a = xdwopen(doc_a, readonly=True)
+        opened.append(doc_a)
+    if isinstance(doc_b, str):
+        doc_b = xdwopen(doc_b, readonly=True)
+        opened.append(doc_b)
+    result = AnnotationDiff()
+    results = dict()  # {page: changes}
+
+    def snapshot(doc, pos):
+        if doc.pages <= pos:
+            return []
+        return doc.page(pos).snapshot_annotations()
+
+    def prepare(pos):
+        return (pos, snapshot(doc_a, pos), snapshot(doc_b, pos), digits)
+
+    def finish(pos, res, error):
+        if error:
+            raise error
+        results[pos], unchanged = res
+        result.unchanged += unchanged
+
+    try:
+        pages = range(max(doc_a.pages, doc_b.pages))
+        if concurrency <= 1:
+            for pos in pages:
+                finish(pos, diff_page(prepare(pos)), None)
+        else:
+            run_pipeline(pages, prepare, diff_page, finish,
+                         concurrency=concurrency,
+                         executor=ProcessPoolExecutor)
+    finally:
+        for doc in opened:
+            doc.close()
+    for pos in sorted(results):
+        result.changes.extend(results[pos])
+    return result
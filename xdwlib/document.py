@@ -15,11 +15,14 @@ FOR A PARTICULAR PURPOSE.
 
 import os
 import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 from .xdwapi import *
 from .common import *
 from .struct import Point
-from .xdwfile import XDWFile
+from .xdwtemp import XDWTemp
+from .xdwfile import XDWFile, export_parallel
 from .basedocument import BaseDocument
 
 
@@ -33,26 +36,35 @@ __all__ = (
         )
 
 
-def create(input_path=None, output_path=None, **kw):
+def create(input_path=None, output_path=None, derive=True, **kw):
     """The XDW generator.
 
+    derive      (bool) create a derivative e.g. {name}-2.xdw instead of
+                output_path if it exists; False means output_path has
+                been allocated by newpath() etc. already
+
     Returns the created pathname which may differ from output_path.
     """
     input_path = adjust_path(input_path)
     root, ext = os.path.splitext(input_path)
     output_path = adjust_path(output_path or root, ext=".xdw")
     if input_path:
-        output_path = derivative_path(output_path)
+        if derive:
+            output_path = derivative_path(output_path)
         if ext.upper() == ".PDF":
-            return create_from_pdf(input_path, output_path, **kw)
+            return create_from_pdf(input_path, output_path, derive=False,
+                                   **kw)
         if ext.upper() in (".BMP", ".JPG", ".JPEG", ".TIF", ".TIFF"):
             try:
-                return create_from_image(input_path, output_path, **kw)
+                return create_from_image(input_path, output_path,
+                                         derive=False, **kw)
             except Exception as e:
                 pass  # fall through; processed by respective apps.
-        return create_from_app(input_path, output_path, **kw)
+        return create_from_app(input_path, output_path, derive=False, **kw)
     # input_path==None means generating single blank page.
-    output_path = derivative_path(adjust_path(output_path or "blank.xdw"))
+    output_path = adjust_path(output_path or "blank.xdw")
+    if derive:
+        output_path = derivative_path(output_path)
     with open(output_path, "wb") as f:
         f.write(BLANKPAGE)
     return output_path
@@ -65,6 +77,7 @@ def create_from_image(input_path, output_path=None,
         size=Point(0, 0),  # Point (in mm), int or str; 1,2..10=A3R,A3..B5
         align=("CENTER", "CENTER"),  # LEFT/CENTER/RIGHT, TOP/CENTER/BOTTOM
         maxpapersize="DEFAULT",
+        derive=True,
         ):
     """XDW generator from image file.
 
@@ -82,13 +95,16 @@ def create_from_image(input_path, output_path=None,
                         horiz   'CENTER' | 'LEFT' | 'RIGHT'
                         vert    'CENTER' | 'TOP' | 'BOTTOM'
     maxpapersize    'DEFAULT' | 'A3' | '2A0'
+    derive          (bool) derive a new name if output_path exists;
+                    see create()
 
     Returns the created pathname which may differ from output_path.
     """
     input_path = adjust_path(input_path)
     root, ext = os.path.splitext(input_path)
     output_path = adjust_path(output_path or root, ext=".xdw")
-    output_path = derivative_path(output_path)
+    if derive:
+        output_path = derivative_path(output_path)
     opt = XDW_CREATE_OPTION_EX2()
     opt.nFitImage = XDW_CREATE_FITIMAGE.normalize(fitimage)
     opt.nCompress = XDW_COMPRESS.normalize(compress)
@@ -111,37 +127,43 @@ def create_from_image(input_path, output_path=None,
     return output_path
 
 
-def create_from_pdf(input_path, output_path=None):
+def create_from_pdf(input_path, output_path=None, derive=True):
     """XDW generator from image PDF file.
 
+    derive      (bool) derive a new name if output_path exists; see create()
+
     Returns the created pathname which may differ from output_path.
     """
     input_path = adjust_path(input_path)
     root, ext = os.path.splitext(input_path)
     output_path = adjust_path(output_path or root, ext=".xdw")
-    output_path = derivative_path(output_path)
+    if derive:
+        output_path = derivative_path(output_path)
     try:
         XDW_CreateXdwFromImagePdfFile(cp(input_path), cp(output_path))
     except Exception as e:
         # If PDF is not compatible with DocuWorks, try to handle it
         # with the system-defined application program.
-        create_from_app(input_path, output_path, timeout=3600)
+        create_from_app(input_path, output_path, timeout=3600,
+                        derive=False)
     return output_path
 
 
 def create_from_app(input_path, output_path=None,
-        attachment=False, timeout=0):
+        attachment=False, timeout=0, derive=True):
     """Create document through other app with optional attachment.
 
     attachment  (bool) attach original data file (given by input_path) or not
     timeout     (int) max seconds to wait until application printing is done
+    derive      (bool) derive a new name if output_path exists; see create()
 
     Returns the created pathname which may differ from output_path.
     """
     input_path = adjust_path(input_path)
     root, ext = os.path.splitext(input_path)
     output_path = adjust_path(output_path or root, ext=".xdw")
-    output_path = derivative_path(output_path)
+    if derive:
+        output_path = derivative_path(output_path)
     if XDWVER < 8:
         handle = XDW_BeginCreationFromAppFile(
                 cp(input_path), cp(output_path), bool(attachment))
@@ -165,22 +187,129 @@ def create_from_app(input_path, output_path=None,
     return output_path
 
 
-def merge(input_paths, output_path=None):
+def _merge(args):
+    """Merge XDW's at once; args is (input_paths, output_path)."""
+    input_paths, output_path = args
+    if XDWVER < 8:
+        XDW_MergeXdwFiles([cp(path) for path in input_paths], cp(output_path))
+    else:
+        XDW_MergeXdwFilesW(input_paths, output_path)
+    return os.path.getsize(output_path)
+
+
+def merge(input_paths, output_path=None, fan_in=None, concurrency=1,
+          budget=None, callback=None, derive=True):
     """Merge XDW's into a new XDW.
 
+    input_paths (sequence of str) XDW's to merge
+    output_path (str) pathname of the new XDW
+    fan_in      (int) max. number of files to merge at once;
+                None means to merge all the files at once
+    concurrency (int) worker processes to merge chunks in parallel;
+                1 means to merge in the caller's process
+    budget      (int) approx. max. bytes of intermediate files at a time;
+                None means unlimited
+    callback    function(done, total) called as each merge is done
+    derive      (bool) create a derivative e.g. {name}-2.xdw instead of
+                output_path if it exists; False means output_path has
+                been allocated by newpath() etc. already
+
+    With more input files than fan_in, the files are merged in chunks of
+    fan_in into intermediate files, which are in turn merged in chunks
+    of fan_in, and so on.  Chunks are consecutive, so the pages are in
+    the order of input_paths whichever chunk is merged first.
+    Intermediate files are removed as soon as they are merged, and no
+    more chunks are started while the intermediate files would exceed
+    budget, though at least one chunk is always in progress.
+
     Returns the created pathname which may differ from output_path.
     """
     input_paths = [adjust_path(path) for path in input_paths]
     root, ext = os.path.splitext(input_paths[0])
     output_path = adjust_path(output_path or root, ext=".xdw")
-    output_path = derivative_path(output_path)
-    if XDWVER < 8:
-        XDW_MergeXdwFiles([cp(path) for path in input_paths], cp(output_path))
-    else:
-        XDW_MergeXdwFilesW(input_paths, output_path)
+    if derive:
+        output_path = derivative_path(output_path)
+    if not fan_in or len(input_paths) <= fan_in:
+        _merge((input_paths, output_path))
+        if callback:
+            callback(1, 1)
+        return output_path
+    _merge_tree(input_paths, output_path, max(2, fan_in),
+                concurrency, budget, callback)
     return output_path
 
 
+def _merge_tree(input_paths, output_path, fan_in, concurrency, budget,
+                callback):
+    """Merge XDW's hierarchically; see merge()."""
+    # Each level is a list of (path, size, XDWTemp or None for input).
+    level = [(path, os.path.getsize(path), None) for path in input_paths]
+    total, n = 0, len(level)
+    while 1 < n:
+        n = (n + fan_in - 1) // fan_in
+        total += n
+    done = 0
+    usage = 0  # bytes of intermediate files incl. those being created
+    executor = None
+    if 1 < concurrency:
+        executor = ProcessPoolExecutor(max_workers=concurrency)
+    temps = []
+    try:
+        while 1 < len(level):
+            chunks = [level[i:i + fan_in]
+                      for i in range(0, len(level), fan_in)]
+            last = len(chunks) == 1
+            results = [None] * len(chunks)
+            pending = dict()  # {future: (index, estimate)}
+
+            def complete(index, estimate, size):
+                nonlocal done, usage
+                for (_, sz, temp) in chunks[index]:
+                    if temp:
+                        temp.close()
+                        usage -= sz
+                path, _, temp = results[index]
+                results[index] = (path, size, temp)
+                if temp:
+                    usage += size - estimate
+                done += 1
+                if callback:
+                    callback(done, total)
+
+            def collect():
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, estimate = pending.pop(future)
+                    complete(index, estimate, future.result())
+
+            for (index, chunk) in enumerate(chunks):
+                if last:
+                    path, temp, estimate = output_path, None, 0
+                else:
+                    temp = XDWTemp()
+                    temps.append(temp)
+                    path, estimate = temp.path, sum(sz for (_, sz, _) in chunk)
+                    while pending and budget and budget < usage + estimate:
+                        collect()
+                    usage += estimate
+                results[index] = (path, estimate, temp)
+                args = ([p for (p, _, _) in chunk], path)
+                if executor:
+                    pending[executor.submit(_merge, args)] = (index, estimate)
+                    while concurrency <= len(pending):
+                        collect()
+                else:
+                    complete(index, estimate, _merge(args))
+            while pending:
+                collect()
+            level = results
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+        for temp in temps:
+            temp.close()
+
+
 class Document(BaseDocument, XDWFile):
 
     """DocuWorks document (XDW)."""
@@ -216,6 +345,73 @@ class Document(BaseDocument, XDWFile):
         """Concrete method over dirname()."""
         return self.dir
 
+    def split_to_binder(self, ranges=None, output_path=None,
+                        concurrency=1, overwrite=False):
+        """Split document into a new binder.
+
+        ranges      (sequence of int or (start, stop)) pages of documents
+                    in binder; int means a single page and (start, stop)
+                    is half-open like slice; starts with 0
+                    (None) every page makes a document
+        output_path (str) pathname of binder;
+                    with no dir, create {document dir}/{output_path}
+                    (None) create {document dir}/{document name}.xbd
+        concurrency (int) worker processes to export pages;
+                    1 means to export in the caller's process
+        overwrite   (bool) overwrite existing file instead of creating
+                    a derivative e.g. {document name}-2.xbd
+
+        Each page is exported into a temporary file only once, pages of
+        each range are merged in one call, and the binder is saved once
+        at the end.  With concurrency > 1, worker processes export pages
+        from the document file as saved; save changes beforehand.
+
+        Returns the created pathname which may differ from output_path.
+        """
+        from .binder import create_binder
+        if ranges is None:
+            ranges = range(self.pages)
+        ranges = [(self._pos(r), self._pos(r) + 1) if isinstance(r, int)
+                  else tuple(r) for r in ranges]
+        ranges = [(self._pos(start), self._pos(stop, append=True))
+                  for (start, stop) in ranges]
+        if any(stop <= start for (start, stop) in ranges):
+            raise ValueError("empty range given")
+        output_path = newpath(output_path or self.name + ".xbd",
+                              dir=self.dir, ext=".xbd", overwrite=overwrite)
+        with XDWTemp() as temp:
+            try:
+                pages = sorted(set(pos for (start, stop) in ranges
+                                   for pos in range(start, stop)))
+                paths = dict((pos, os.path.join(temp.dir, f"P{pos + 1}.xdw"))
+                             for pos in pages)
+                if 1 < concurrency and 1 < len(pages):
+                    export_parallel(self.pathname(), sorted(paths.items()),
+                                    concurrency=concurrency)
+                else:
+                    for pos in pages:
+                        self.export(pos, paths[pos], overwrite=True)
+                parts = []
+                for (i, (start, stop)) in enumerate(ranges):
+                    # Name of document in binder comes from its file name.
+                    name = f"{self.name}_P{start + 1}"
+                    if 1 < stop - start:
+                        name += f"-{stop}"
+                    dir = os.path.join(temp.dir, str(i))
+                    os.mkdir(dir)
+                    part = os.path.join(dir, name + ".xdw")
+                    if stop - start == 1:
+                        shutil.copyfile(paths[start], part)
+                    else:
+                        _merge(([paths[pos] for pos in range(start, stop)],
+                                part))
+                    parts.append(part)
+                with replacing(output_path) as out:
+                    create_binder(out, documents=parts, derive=False)
+            finally:
+                shutil.rmtree(temp.dir, ignore_errors=True)
+        return output_path
+
 
 class Container(Document):
 
@@ -236,7 +432,7 @@ class Container(Document):
     def insert_image(self, *args, **kw):
         raise InvalidOperationError
 
-    def export(self, pos, path=None):
+    def export(self, pos, path=None, overwrite=False):
         raise InvalidOperationError
 
     def delete(self, pos):
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""markup.py -- AnnotationMarkup, annotations detached from documents
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import json
+import base64
+import hashlib
+import warnings
+
+try:
+    import msgpack
+    MSGPACK_ENABLED = True
+except ImportError:
+    MSGPACK_ENABLED = False
+
+from .xdwapi import *
+from .common import *
+from .xdwtemp import XDWTemp
+from .struct import Point, Rect
+from .annotation import AnnotationSpec
+
+
+__all__ = ("AnnotationMarkup", "MSGPACK_ENABLED")
+
+
+MARKUP_FORMAT = "xdwlib-annotations"
+MARKUP_VERSION = 1
+
+# Not reproducible through XDWAPI; see Annotatable.copy_annotation().
+UNSUPPORTED = ("PAGEFORM", "OLE", "RECEIVEDSTAMP", "CUSTOM")
+
+
+def plain(value):
+    """Convert Point, Rect or tuple into list recursively for serialisers."""
+    if isinstance(value, (tuple, list)):
+        return [plain(v) for v in value]
+    return value
+
+
+class AnnotationMarkup(object):
+
+    """Annotations detached from documents.
+
+    An AnnotationMarkup object holds annotation trees of one or more pages
+    in plain data i.e. types, geometry, attributes and child annotations,
+    and can be saved as JSON or MessagePack and pasted on other pages.
+    Images of BITMAP annotations are stored once per distinct content,
+    keyed by SHA-256 digest, however many times they appear.
+
+    Annotations are compiled into AnnotationSpec objects and bitmaps are
+    written to temporary files on the first paste, and reused thereafter,
+    so that a markup loaded once can be applied to many documents.
+
+    Example:
+
+        markup = doc.export_annotations("markup.json")
+        for path in paths:
+            with xdwopen(path) as other:
+                other.import_annotations(markup)
+
+    Serialised form is:
+
+        {"format": "xdwlib-annotations", "version": 1,
+         "pages": [[annotation, ...], ...],
+         "bitmaps": {digest: image_data, ...}}
+
+    where each annotation is:
+
+        {"type": "TEXT", "position": [x, y], "size": [w, h],
+         "attributes": {"text": "...", ...}, "children": [...],
+         "bitmap": digest}  # BITMAP only
+
+    with lengths in mm.  Image data is a Windows Bitmap (BMP) file cropped
+    from the page, base64-encoded in JSON.
+    """
+
+    def __init__(self, pages=(), bitmaps=None):
+        """Initiator.
+
+        pages       (list) annotation lists, one per page
+        bitmaps     (dict) {digest: image data (bytes)}
+        """
+        self.pages = [list(anns) for anns in pages]
+        self.bitmaps = dict(bitmaps or {})
+        self._specs = dict()  # {page index: [(spec, children), ...]}
+        self._temps = dict()  # {digest: XDWTemp}
+
+    def __repr__(self):
+        return ("{cls}(pages={pages}, annotations={anns}, "
+                "bitmaps={bmps})").format(
+                cls=self.__class__.__name__,
+                pages=len(self.pages),
+                anns=sum(len(anns) for anns in self.pages),
+                bmps=len(self.bitmaps))
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Remove temporary bitmap files and discard compiled specs."""
+        for temp in self._temps.values():
+            temp.close()
+        self._temps.clear()
+        self._specs.clear()
+
+    # Export
+
+    @staticmethod
+    def from_pages(pages):
+        """Read annotations on pages.
+
+        pages   (sequence of Page)
+
+        Returns an AnnotationMarkup object.
+        """
+        markup = AnnotationMarkup()
+        for pg in pages:
+            renders = dict()  # page image to crop bitmaps from, if any
+            markup.pages.append([d for d in (
+                    markup._read(pg, cache, renders)
+                    for cache in pg.snapshot_annotations()) if d])
+        return markup
+
+    def _read(self, pg, cache, renders):
+        if cache.type in UNSUPPORTED:
+            warnings.warn(
+                    f"exporting {cache.type} annotation is not supported",
+                    UserWarning, stacklevel=3)
+            return None
+        attrs = dict((k, plain(v)) for (k, v) in cache.attributes().items()
+                     if v is not None and k not in ("position", "size"))
+        d = dict(type=cache.type,
+                 position=plain(cache.position),
+                 size=plain(cache.size),
+                 attributes=attrs)
+        if cache.type == "BITMAP":
+            data = pg.bitmap(rect=cache.rect(), renders=renders).octet_stream()
+            digest = hashlib.sha256(data).hexdigest()
+            self.bitmaps.setdefault(digest, data)
+            d["bitmap"] = digest
+        children = [c for c in (self._read(pg, child, renders)
+                                for child in cache.children) if c]
+        if children:
+            d["children"] = children
+        return d
+
+    # Serialisation
+
+    def to_dict(self):
+        """Get plain data to serialise; bitmaps are given in bytes."""
+        return dict(format=MARKUP_FORMAT, version=MARKUP_VERSION,
+                    pages=self.pages, bitmaps=self.bitmaps)
+
+    @staticmethod
+    def from_dict(data):
+        """Get an AnnotationMarkup object from to_dict() result."""
+        if data.get("format") != MARKUP_FORMAT:
+            raise ValueError("not an xdwlib annotation markup")
+        if MARKUP_VERSION < data.get("version", 0):
+            raise ValueError(
+                    f"unsupported markup version {data.get('version')}")
+        bitmaps = dict()
+        for (digest, v) in data.get("bitmaps", {}).items():
+            bitmaps[digest] = base64.b64decode(v) if isinstance(v, str) else v
+        return AnnotationMarkup(data.get("pages", ()), bitmaps)
+
+    def dumps(self, format="json"):
+        """Serialise into bytes.
+
+        format      'json' | 'msgpack'
+        """
+        format = format.lower()
+        data = self.to_dict()
+        if format == "msgpack":
+            if not MSGPACK_ENABLED:
+                raise NotImplementedError("install msgpack to use MessagePack")
+            return msgpack.packb(data, use_bin_type=True)
+        if format != "json":
+            raise ValueError(f"illegal format '{format}'")
+        data["bitmaps"] = dict((k, base64.b64encode(v).decode("ascii"))
+                               for (k, v) in self.bitmaps.items())
+        return json.dumps(data, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def loads(data):
+        """Deserialise from bytes given by dumps().
+
+        Format is detected automatically.
+        """
+        if data[:1] == b"{":
+            return AnnotationMarkup.from_dict(json.loads(data.decode("utf-8")))
+        if not MSGPACK_ENABLED:
+            raise NotImplementedError("install msgpack to use MessagePack")
+        return AnnotationMarkup.from_dict(msgpack.unpackb(data, raw=False))
+
+    def save(self, path, format=None, overwrite=False):
+        """Save to file.
+
+        path        (str) pathname to save
+        format      'json' | 'msgpack' | None
+                    None means to infer from extension; '.msgpack' or
+                    '.mpk' for MessagePack and JSON for others
+        overwrite   (bool) overwrite existing file instead of saving to
+                    a derivative e.g. {path}-2.json
+
+        Returns the saved pathname which may differ from path.
+        """
+        if not format:
+            ext = os.path.splitext(path)[1].lower()
+            format = "msgpack" if ext in (".msgpack", ".mpk") else "json"
+        data = self.dumps(format=format)
+        path = newpath(path, overwrite=overwrite)
+        with replacing(path) as out:
+            with open(out, "wb") as f:
+                f.write(data)
+        return path
+
+    @staticmethod
+    def load(path):
+        """Load from file saved by save()."""
+        with open(path, "rb") as f:
+            return AnnotationMarkup.loads(f.read())
+
+    @staticmethod
+    def get(source):
+        """Get an AnnotationMarkup object from various sources.
+
+        source      (AnnotationMarkup) returned as is
+                    (dict) result of to_dict()
+                    (str) pathname of file saved by save()
+        """
+        if isinstance(source, AnnotationMarkup):
+            return source
+        if isinstance(source, dict):
+            return AnnotationMarkup.from_dict(source)
+        return AnnotationMarkup.load(source)
+
+    # Import
+
+    def _bitmap_path(self, digest):
+        if digest not in self._temps:
+            temp = XDWTemp(suffix=".bmp")
+            with open(temp.path, "wb") as f:
+                f.write(self.bitmaps[digest])
+            self._temps[digest] = temp
+        return self._temps[digest].path
+
+    def _compile(self, d):
+        t = d["type"]
+        attrs = dict(d.get("attributes", {}))
+        attrs.pop("points", None)
+        position = Point(*d["position"])
+        size = Point(*d["size"])
+        geometry = dict(position=position)
+        if t in ("STICKEY", "RECTANGLE", "ARC"):
+            geometry["size"] = size
+        elif t in ("STRAIGHTLINE", "MARKER", "POLYGON"):
+            geometry = dict(points=d["attributes"]["points"])
+        elif t == "STAMP":
+            geometry["width"] = size.x
+        elif t == "TEXT":
+            if attrs.get("word_wrap") and not attrs.get("text_orientation"):
+                geometry["size"] = size
+        elif t == "LINK":
+            if not attrs.get("auto_resize"):
+                geometry["size"] = size
+        elif t == "BITMAP":
+            geometry["path"] = self._bitmap_path(d["bitmap"])
+        spec = AnnotationSpec(t, **dict(geometry, **attrs))
+        return (spec, [self._compile(c) for c in d.get("children", ())])
+
+    def specs(self, index=0):
+        """Get compiled annotations of page.
+
+        index   (int) page index in markup
+
+        Returns a list of (AnnotationSpec, children) where children is
+        a list of the same form.
+        """
+        if index not in self._specs:
+            self._specs[index] = [self._compile(d) for d in self.pages[index]]
+        return self._specs[index]
+
+    def paste(self, doc_handle, page, index=0):
+        """Paste annotations of a page in markup.
+
+        doc_handle  document handle
+        page        (int) absolute page number; starts with 1
+        index       (int) page index in markup
+
+        Returns the number of top-level annotations pasted.
+        """
+        def paste(specs, parent_handle=None):
+            for (spec, children) in specs:
+                handle = spec.paste(doc_handle, page, parent_handle)
+                paste(children, handle)
+
+        specs = self.specs(index)
+        paste(specs)
+        return len(specs)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""ocr.py -- OCR services over network
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from itertools import islice
+from urllib.request import Request, urlopen
+from urllib.parse import urlencode, urlparse, urlunparse
+from urllib.error import HTTPError
+
+try:
+    from google.cloud import vision
+    GCVISION = vision
+except ImportError:
+    GCVISION = None
+
+from .xdwapi import ApplicationFailedError
+
+
+__all__ = (
+        "ENV_AZURE_URL", "ENV_AZURE_KEY", "ENV_GCLOUD_CRED",
+        "NOLINEBREAKLANGUAGES", "GCVISION", "GCLOUD_MAX_IMAGES",
+        "azure_env", "AzureReadClient",
+        "gcloud_env", "gcloud_client", "gcloud_request", "gcloud_rtlist",
+        "OCRCache",
+        )
+
+ENV_AZURE_URL = "XDWLIB_OCR_AZURE_ENDPOINT"
+ENV_AZURE_KEY = "XDWLIB_OCR_AZURE_SUBSCRIPTION_KEY"
+ENV_GCLOUD_CRED = "GOOGLE_APPLICATION_CREDENTIALS"
+NOLINEBREAKLANGUAGES = "ja jpn zh chi zho th tha lo lao km khm kxm".split()
+
+# Values of vision.Feature.Type and vision.TextAnnotation.DetectedBreak.
+# BreakType, which are IntEnum's, so that fake clients can do without
+# google-cloud-vision.
+GCLOUD_DOCUMENT_TEXT_DETECTION = 11
+GCLOUD_SPACES = (1, 2)  # SPACE, SURE_SPACE
+GCLOUD_EOL_SURE_SPACE = 3
+GCLOUD_MAX_IMAGES = 16  # per batch_annotate_images request
+
+_gcloud_clients = dict()  # {(pid, credentials): ImageAnnotatorClient}
+_gcloud_lock = threading.Lock()
+
+
+def azure_env():
+    """Get default Azure OCR endpoint and subscription key."""
+    return (os.environ.get(ENV_AZURE_URL), os.environ.get(ENV_AZURE_KEY))
+
+
+class AzureReadClient(object):
+
+    """Client for Azure AI Vision Read API.
+
+    The client holds no connection, so a single client can be shared among
+    threads to process several images at once.
+
+    Example:
+
+        client = AzureReadClient(language="ja")
+        rtlist = client.analyze(jpeg_data)
+
+    ATTRIBUTES
+    ----------
+
+    endpoint            (str) Azure OCR endpoint
+    subscription_key    (str) Azure OCR subscription key
+    timeout             (float) seconds to wait for OCR result of an image
+    poll_interval       (float) seconds to wait before the first polling;
+                        doubled on each polling up to max_poll_interval
+    max_poll_interval   (float) max. seconds between pollings
+    retries             (int) max. retries on rate limitation (HTTP 429/503)
+    """
+
+    RETRY_STATUS = (429, 503)
+
+    def __init__(self,
+            endpoint="", subscription_key="",
+            version="3.2", model_version="latest", language=None,
+            timeout=60, poll_interval=1, max_poll_interval=8, retries=5,
+            ):
+        """Initiator.
+
+        endpoint        (str) Azure OCR endpoint e.g.:
+                              'https://yourproject.cognitiveservices.azure.com/'
+        subscription_key  (str) Azure OCR subscription key
+        version         (str) OCR engine version e.g. '3.2'
+        model_version   (str) see Azure Read API document e.g.:
+                              'latest', '2021-09-30-preview', or '2021-04-12'
+        language        (None) expect no specific language
+                        (str) 'ja', 'en', etc.
+        timeout         (float) seconds to wait for OCR result of an image
+        poll_interval   (float) initial seconds between pollings
+        max_poll_interval   (float) max. seconds between pollings
+        retries         (int) max. retries on rate limitation
+
+        Default endpoint and subscription_key can be set in environment
+        variables XDWLIB_OCR_AZURE_ENDPOINT and
+        XDWLIB_OCR_AZURE_SUBSCRIPTION_KEY.
+        """
+        url, key = azure_env()
+        self.endpoint = endpoint or url
+        self.subscription_key = subscription_key or key
+        if not (self.endpoint and self.subscription_key):
+            raise ValueError(f"{ENV_AZURE_URL} or {ENV_AZURE_KEY} is missing")
+        if str(version) != "3.2":
+            raise ValueError(f"unsupported Read API version '{version}'")
+        self.url = (self.endpoint.rstrip("/") +
+                    f"/vision/v{version}/read/analyze")
+        self.params = {"language": language or "",
+                       "model-version": model_version,
+                       "readingOrder": "natural"}
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.retries = retries
+
+    def _request(self, url, params=None, data=None, method="GET"):
+        """Send a request, waiting and retrying while rate-limited."""
+        headers = {"Ocp-Apim-Subscription-Key": self.subscription_key}
+        if data is not None:
+            headers["Content-Type"] = "application/octet-stream"
+        url = list(urlparse(url))
+        if params: url[4] = urlencode(params)
+        req = Request(urlunparse(url), data=data, headers=headers,
+                      method=method)
+        backoff = self.poll_interval
+        for retry in range(self.retries + 1):
+            try:
+                return urlopen(req, timeout=self.timeout)
+            except HTTPError as e:
+                if e.code not in self.RETRY_STATUS or self.retries <= retry:
+                    raise ApplicationFailedError(
+                            f"failure in Azure OCR, status={e.code}")
+                try:
+                    wait_ = float(e.headers.get("Retry-After"))
+                except (TypeError, ValueError):
+                    wait_ = 0
+                e.close()
+            time.sleep(max(wait_, backoff))
+            backoff = min(backoff * 2, self.max_poll_interval)
+
+    def analyze(self, data):
+        """Recognize text in an image.
+
+        data    (bytes) image data e.g. JPEG
+
+        Returns a list of (rect, text), where rect is a tuple of (left, top,
+        right, bottom) in pixels.
+        """
+        with self._request(self.url, params=self.params, data=data,
+                           method="POST") as res:
+            location = res.headers["Operation-Location"]
+        deadline = time.time() + self.timeout
+        interval = self.poll_interval
+        while True:
+            time.sleep(interval)
+            with self._request(location) as res:
+                result = json.loads(res.read().decode("utf-8"))
+            if result.get("status") == "failed":
+                raise ApplicationFailedError("failure in Azure OCR")
+            if "analyzeResult" in result:
+                break
+            if deadline <= time.time():
+                raise ApplicationFailedError("time out in Azure OCR")
+            interval = min(interval * 2, self.max_poll_interval,
+                           max(0, deadline - time.time()))
+        return self.rtlist(result)
+
+    @staticmethod
+    def rtlist(result):
+        """Convert Read API result into a list of (rect, text)."""
+        rtlist = []
+        for line in result["analyzeResult"]["readResults"][0]["lines"]:
+            x = list(islice(line["boundingBox"], 0, None, 2))
+            y = list(islice(line["boundingBox"], 1, None, 2))
+            rtlist.append(((min(x), min(y), max(x), max(y)), line["text"]))
+        return rtlist
+
+
+def gcloud_env():
+    """Get default Google Cloud credentials file."""
+    return os.environ.get(ENV_GCLOUD_CRED)
+
+
+def gcloud_client(credentials=None):
+    """Get a Google Cloud Vision client shared in the current process.
+
+    credentials     (str) path to service account key file
+                    (None) use $GOOGLE_APPLICATION_CREDENTIALS
+
+    Clients are pooled by credentials and never alter os.environ.  As gRPC
+    channels do not survive fork(), each process has its own pool.
+    """
+    if not GCVISION:
+        raise NotImplementedError("google-cloud-vision is not installed")
+    credentials = os.path.expanduser(credentials or gcloud_env() or "")
+    if not credentials:
+        raise ValueError(f"${ENV_GCLOUD_CRED} is not set")
+    key = (os.getpid(), credentials)
+    with _gcloud_lock:
+        client = _gcloud_clients.get(key)
+        if client is None:
+            client = GCVISION.ImageAnnotatorClient.from_service_account_file(
+                    credentials)
+            _gcloud_clients[key] = client
+    return client
+
+
+def gcloud_request(image):
+    """Make a request item for ImageAnnotatorClient.batch_annotate_images().
+
+    image       (bytes) image data e.g. JPEG
+    """
+    return dict(image=dict(content=image),
+                features=[dict(type_=GCLOUD_DOCUMENT_TEXT_DETECTION)])
+
+
+def gcloud_rtlist(response, language=None):
+    """Convert an AnnotateImageResponse into a list of (rect, text).
+
+    response    AnnotateImageResponse
+    language    (str) language e.g. 'ja', which determines whether words
+                are separated by spaces at line ends
+
+    Rects are tuples of (left, top, right, bottom) in pixels.
+    """
+    error = getattr(response, "error", None)
+    if error is not None and getattr(error, "code", 0):
+        raise ApplicationFailedError(
+                f"failure in Google Cloud OCR, {error.message}")
+    language = language and language.casefold()
+    linebreak = "" if language in NOLINEBREAKLANGUAGES else " "
+    rtlist = list()
+    for page in response.full_text_annotation.pages:  # 1 page only.
+        for block in page.blocks:
+            for para in block.paragraphs:
+                symbols = []
+                # Inserting spaces between words doesn't work in CJK.
+                for word in para.words:
+                    for symbol in word.symbols:
+                        symbols.append(symbol.text)
+                        brk = symbol.property.detected_break.type_
+                        if brk == GCLOUD_EOL_SURE_SPACE:
+                            symbols.append(linebreak)
+                        elif brk in GCLOUD_SPACES:
+                            symbols.append(" ")
+                x, y = zip(*[(getattr(v, "x", 0), getattr(v, "y", 0))
+                             for v in para.bounding_box.vertices])
+                rtlist.append(((min(x), min(y), max(x), max(y)),
+                               "".join(symbols).strip()))
+    return rtlist
+
+
+class OCRCache(object):
+
+    """LRU cache of OCR results keyed by page image.
+
+    A cache can be given to Page.ocr_azure(), Page.ocr_gcloud() and
+    BaseDocument.ocr_batch() so that pages once recognised e.g. those copied
+    or merged from other documents are not sent to OCR services again.
+    Cached results are replayed through Page.set_ocr_text().
+
+    Example:
+
+        cache = OCRCache(max_entries=4096)
+        for doc in docs:
+            doc.ocr_batch(cache=cache)
+        print(cache.stats())
+
+    ATTRIBUTES
+    ----------
+
+    max_entries     (int) max. number of results; 0 means unlimited
+    max_age         (float) seconds to keep each result; None means forever
+    hits            (int) number of lookups which found a result
+    misses          (int) number of lookups which found no result
+    evictions       (int) number of results dropped by max_entries or max_age
+    """
+
+    def __init__(self, max_entries=1024, max_age=None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # {key: (time, rtlist)}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def key(image, engine, **params):
+        """Make a cache key.
+
+        image       (bytes) page image sent to OCR service
+        engine      (str) OCR engine name e.g. 'azure'
+        **params    options which affect OCR result e.g. language
+        """
+        h = hashlib.sha256(image)
+        h.update(b"\0" + engine.encode("utf-8") + b"\0")
+        h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key):
+        """Get a cached list of (rect, text), or None if missing."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self.max_age is not None and \
+                    self.max_age < time.time() - entry[0]:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if not entry:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key, rtlist):
+        """Store a list of (rect, text)."""
+        rtlist = [(tuple(r), t) for (r, t) in rtlist]
+        with self._lock:
+            self._entries[key] = (time.time(), rtlist)
+            self._entries.move_to_end(key)
+            while self.max_entries and self.max_entries < len(self._entries):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all results and reset statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """Get statistics as a dict."""
+        return dict(entries=len(self), hits=self.hits, misses=self.misses,
+                    evictions=self.evictions, hit_rate=self.hit_rate)
@@ -18,28 +18,18 @@ import re
 import subprocess
 import itertools
 from functools import cmp_to_key
-from itertools import islice
 from os.path import abspath, split as splitpath, join as joinpath
 import codecs
-from urllib.request import Request, urlopen
-from urllib.parse import urlencode, urlparse, urlunparse
-import time
-import json
-
-try:
-    from google.cloud import vision
-    from google.cloud.vision_v1.types import TextAnnotation
-    BREAKTYPES = TextAnnotation.DetectedBreak.BreakType
-    GCVISION = vision
-except ImportError:
-    GCVISION = None
+from array import array
 
 from .xdwapi import *
 from .common import *
 from .xdwtemp import XDWTemp
 from .observer import *
-from .struct import Point, Rect
+from .struct import Point, Rect, Affine, RectArray
 from .annotatable import Annotatable
+from .spatial import SpatialIndex
+from .ocr import *
 
 
 __all__ = ("Page", "PageCollection")
@@ -69,10 +59,6 @@ OCR_LANGUAGES = {
         949: "KOREAN",
         1258: "VIETNAMESE",
         }
-NOLINEBREAKLANGUAGES = "ja jpn zh chi zho th tha lo lao km khm kxm".split()
-ENV_AZURE_URL = "XDWLIB_OCR_AZURE_ENDPOINT"
-ENV_AZURE_KEY = "XDWLIB_OCR_AZURE_SUBSCRIPTION_KEY"
-ENV_GCLOUD_CRED = "GOOGLE_APPLICATION_CREDENTIALS"
 
 
 class PageCollection(list):
@@ -185,10 +171,9 @@ class PageCollection(list):
         if not wait:
             return (proc, temp.path)
         from .xdwfile import xdwopen
-        from .annotation import AnnotationCache
         proc.wait()
         doc = xdwopen(temp.path)
-        r = [(p, [AnnotationCache(ann) for ann in doc.page(p)])
+        r = [(p, doc.page(p).snapshot_annotations())
                 for p in range(doc.pages) if doc.page(p).annotations]
         doc.close()
         temp.close()
@@ -211,7 +196,7 @@ class PageCollection(list):
         for g in itertools.groupby(self, lambda pg: pg.doc):
             yield PageCollection(g[1])
 
-    def export(self, path=None, flat=False, group=True):
+    def export(self, path=None, flat=False, group=True, overwrite=False):
         """Create a binder or document as a container for page collection.
 
         path    (str) export to {path};
@@ -220,6 +205,8 @@ class PageCollection(list):
         flat    (bool) create document instead of binder
         group   (bool) group continuous pages by original document,
                 i.e. create document-in-binder.
+        overwrite   (bool) overwrite existing file instead of exporting to
+                    a derivative e.g. {name}-2.xdw
 
         Returns the exported pathname which may differ from path.
         """
@@ -227,34 +214,35 @@ class PageCollection(list):
         from .binder import create_binder
         from .xdwfile import xdwopen
         path = newpath(path or self[0].doc.name + (".xdw" if flat else ".xbd"),
-                       dir=self[0].doc.dirname())
-        if flat:
-            path = create_document(output_path=path)
-        else:
-            path = create_binder(path)
-        with xdwopen(path) as doc:
-            with XDWTemp() as temp:
-                if flat:
-                    for pg in self:
-                        tmp = joinpath(temp.dir, pg.doc.name + ".xdw")
-                        tmp = pg.export(tmp)
-                        doc.append(tmp)
-                        os.remove(tmp)
-                    del doc[0]  # Delete the initial blank page.
-                elif group:
-                    for pc in self.group():
-                        tmp = joinpath(temp.dir, pc[0].doc.name + ".xdw")
-                        tmp = pc.export(tmp, flat=True)
-                        doc.append(tmp)
-                        os.remove(tmp)
-                else:
-                    for pos, pg in enumerate(self):
-                        tmp = joinpath(temp.dir,
-                                f"{pg.doc.name}_P{pg.pos + 1}.xdw")
-                        tmp = pg.export(tmp)
-                        doc.append(tmp)
-                        os.remove(tmp)
-            doc.save()
+                       dir=self[0].doc.dirname(), overwrite=overwrite)
+        with replacing(path) as out:
+            if flat:
+                create_document(output_path=out, derive=False)
+            else:
+                create_binder(out, derive=False)
+            with xdwopen(out) as doc:
+                with XDWTemp() as temp:
+                    if flat:
+                        for pg in self:
+                            tmp = joinpath(temp.dir, pg.doc.name + ".xdw")
+                            tmp = pg.export(tmp)
+                            doc.append(tmp)
+                            os.remove(tmp)
+                        del doc[0]  # Delete the initial blank page.
+                    elif group:
+                        for pc in self.group():
+                            tmp = joinpath(temp.dir, pc[0].doc.name + ".xdw")
+                            tmp = pc.export(tmp, flat=True)
+                            doc.append(tmp)
+                            os.remove(tmp)
+                    else:
+                        for pos, pg in enumerate(self):
+                            tmp = joinpath(temp.dir,
+                                    f"{pg.doc.name}_P{pg.pos + 1}.xdw")
+                            tmp = pg.export(tmp)
+                            doc.append(tmp)
+                            os.remove(tmp)
+                doc.save()
         return path
 
 
@@ -302,6 +290,8 @@ class Page(Annotatable, Observer):
         Annotatable.__init__(self)
         Observer.__init__(self, doc, EV_PAGE_INSERTED)
         self.doc = doc
+        self._index = None
+        self._index_dirty = set()
         self.reset_attr()
 
     def absolute_page(self, append=False):
@@ -460,13 +450,250 @@ class Page(Annotatable, Observer):
         return XDW_GetPageTextToMemoryW(
                 self.doc.handle, self.absolute_page() + 1)
 
-    def bitmap(self):
-        """Returns page image with annotations as a Bitmap object."""
-        opt = XDW_IMAGE_OPTION()
-        opt.nDpi = int(max(10, min(600, max(self.resolution))))
-        opt.nColor = XDW_IMAGE_COLORSCHEME.normalize(self.color_scheme())
-        return XDW_ConvertPageToImageHandle(self.doc.handle,
-                                            self.absolute_page() + 1, opt)
+    def annotation_index(self, cell=10.0):
+        """Get spatial index of annotations including descendants.
+
+        cell    (float) grid cell size in mm, effective on the first call
+
+        Returns a SpatialIndex object which maps Annotation objects to their
+        bounding boxes i.e. Annotation.bbox() in page coordinate.  The index
+        is built on the first call and kept up to date as annotations are
+        added, deleted, moved or resized through xdwlib; moves and resizes
+        are applied when this method is called next, so get the index
+        through this method before each series of queries.  Call
+        Annotation.refresh() or reset_annotation_index() after changes by
+        other means.
+
+        Example:
+
+            index = page.annotation_index()
+            index.intersects(Rect(10, 10, 100, 50))  # overlapping ones
+            index.contains(Rect(10, 10, 100, 50))  # ones inside the rect
+            index.nearest(Point(50, 50), n=3)  # 3 nearest ones
+        """
+        if self._index is None:
+            index = SpatialIndex(cell=cell)
+
+            def walk(parent):
+                for ann in parent:
+                    index.insert(ann, ann.bbox())
+                    if ann.annotations:
+                        walk(ann)
+
+            walk(self)
+            self._index = index
+            self._index_dirty.clear()
+        elif self._index_dirty:
+            for ann in self._index_dirty:
+                if ann in self._index:
+                    self._index.update(ann, ann.bbox())
+            self._index_dirty.clear()
+        return self._index
+
+    def reset_annotation_index(self):
+        """Discard spatial index of annotations."""
+        self._index = None
+        self._index_dirty.clear()
+
+    def _annotation_added(self, ann):
+        if self._index is not None:
+            self._index.insert(ann, ann.bbox())
+
+    def _annotation_removed(self, ann):
+        if self._index is None:
+            return
+        def remove(ann):
+            self._index.remove(ann)
+            self._index_dirty.discard(ann)
+            for child in ann.observers.values():
+                remove(child)
+        remove(ann)
+
+    def _annotation_changed(self, ann):
+        if self._index is not None:
+            self._index_dirty.add(ann)
+
+    def transform_annotations(self, matrix, selection=None,
+                              orientation=False):
+        """Move, rotate and/or scale annotations at once.
+
+        matrix      (Affine, or 2x3 or 3x3 matrix) transformation in mm
+        selection   (sequence of Annotation) annotations to transform
+                    (Rect) annotations inside the region, in mm
+                    None means all annotations on page
+        orientation (bool) also rotate text of TEXT annotations
+
+        New geometry of all annotations is computed at once by
+        Affine.apply(), vectorised with NumPy if available, and applied
+        with as few XDWAPI calls as possible:
+
+            STICKEY, RECTANGLE, ARC     fit to the bounding box of
+                                        transformed corners
+            STRAIGHTLINE, MARKER,       moved for translation, otherwise
+            POLYGON                     recreated with transformed points
+                                        at the end of annotations
+            others                      moved; size is kept
+
+        Position or size is set only if it changes in 1/100 mm.  Child
+        annotations follow their parents, so only the topmost ones in
+        selection are transformed.  Line-type annotations with children
+        are moved without recreation to keep children.
+
+        Example:
+
+            # Rotate annotations with the page.
+            pg.transform_annotations(Affine.rotation(90) @
+                                     Affine.translation(0, -pg.size.y))
+
+        Returns a list of transformed annotations; recreated ones are
+        replaced with new Annotation objects.
+        """
+        from .annotation import AnnotationSpec, get_attributes
+        m = Affine.get(matrix)
+        if selection is None:
+            anns = list(self)
+        elif isinstance(selection, Rect):
+            anns = self.annotation_index().contains(selection)
+        else:
+            anns = list(selection)
+        ids = set(map(id, anns))
+
+        def nested(ann):
+            parent = ann.parent
+            while parent is not None:
+                if id(parent) in ids:
+                    return True
+                parent = parent.parent
+            return False
+
+        anns = [ann for ann in anns if not nested(ann)]
+        translation = m.is_translation()
+        shapes = ("STICKEY", "RECTANGLE", "ARC")
+        lines = ("STRAIGHTLINE", "MARKER", "POLYGON")
+        points = []
+        spans = []
+        for ann in anns:
+            start = len(points)
+            position, size = ann.position, ann.size
+            if ann.type in shapes:
+                points.extend([position,
+                               position + Point(size.x, 0),
+                               position + size,
+                               position + Point(0, size.y)])
+            elif ann.type in lines and not translation and \
+                    not ann.annotations:
+                points.extend(ann.points)
+            else:
+                points.append(position)
+            spans.append((start, len(points)))
+        mapped = m.apply(points)  # all at once
+
+        def changed(p, q):
+            return (int(round(p.x * 100)) != int(round(q.x * 100)) or
+                    int(round(p.y * 100)) != int(round(q.y * 100)))
+
+        result = []
+        for (ann, (i, j)) in zip(anns, spans):
+            new = mapped[i:j]
+            if ann.type in shapes:
+                xs, ys = [p.x for p in new], [p.y for p in new]
+                position = Point(min(xs), min(ys))
+                size = Point(max(xs), max(ys)) - position
+                if changed(position, ann.position):
+                    ann.position = position
+                if changed(size, ann.size):
+                    ann.size = size
+            elif len(new) == 1:
+                if changed(new[0], ann.position):
+                    ann.position = new[0]
+                if orientation and ann.type == "TEXT" and not translation:
+                    ann.text_orientation = \
+                            int(round(ann.text_orientation + m.angle())) % 360
+            else:
+                attrs, _ = get_attributes(ann.handle, ann.type)
+                attrs = dict((k, v) for (k, v) in attrs.items()
+                             if v is not None and k != "points")
+                parent = ann.parent or self
+                spec = AnnotationSpec(ann.type, points=new, **attrs)
+                copy = parent.add_many([spec], wrap=True)[0]
+                parent.delete(ann.pos)
+                ann = copy
+            result.append(ann)
+        return result
+
+    def snapshot_annotations(self):
+        """Returns a list of AnnotationCache objects of all annotations.
+
+        Unlike [AnnotationCache(ann) for ann in page], the annotation tree
+        is read in one pass including child annotations, which are given
+        in children attribute of each AnnotationCache object.  Only the
+        attributes valid for each annotation type are read, and no
+        Annotation object is created.  Results are picklable so that they
+        can be passed to other processes.
+        """
+        from .annotation import snapshot
+        return snapshot(self.doc.handle, self.absolute_page() + 1,
+                        None, self.annotations)
+
+    def export_annotations(self, path=None, format=None, overwrite=False):
+        """Export annotations into an AnnotationMarkup object.
+
+        path        (str) pathname to save markup; None means not to save
+        format      'json' | 'msgpack' | None; see AnnotationMarkup.save()
+        overwrite   (bool) overwrite existing file
+
+        Returns an AnnotationMarkup object.
+        """
+        from .markup import AnnotationMarkup
+        markup = AnnotationMarkup.from_pages([self])
+        if path:
+            markup.save(path, format=format, overwrite=overwrite)
+        return markup
+
+    def import_annotations(self, markup, index=0):
+        """Paste annotations in markup given by export_annotations().
+
+        markup      (AnnotationMarkup, dict or str) markup, or pathname
+                    of saved markup
+        index       (int) page index in markup
+
+        Returns the number of top-level annotations pasted.
+        """
+        from .markup import AnnotationMarkup
+        markup = AnnotationMarkup.get(markup)
+        count = markup.paste(self.doc.handle, self.absolute_page() + 1,
+                             index=index)
+        self.annotations += count
+        self.reset_annotation_index()
+        return count
+
+    def bitmap(self, rect=None, renders=None):
+        """Returns page image with annotations as a Bitmap object.
+
+        rect        (Rect, unit=mm) region to crop; None means whole page
+        renders     (dict) page images to share among calls
+
+        Page is rendered in its resolution up to 600 dpi.  To crop many
+        regions e.g. for bitmap annotations, pass the same dict as renders
+        so that each page is rendered only once; cropping does not
+        re-encode the image.
+        """
+        key = (id(self.doc), self.absolute_page())
+        image = renders.get(key) if renders is not None else None
+        if image is None:
+            opt = XDW_IMAGE_OPTION()
+            opt.nDpi = int(max(10, min(600, max(self.resolution))))
+            opt.nColor = XDW_IMAGE_COLORSCHEME.normalize(self.color_scheme())
+            image = XDW_ConvertPageToImageHandle(self.doc.handle,
+                                                 self.absolute_page() + 1, opt)
+            if renders is not None:
+                renders[key] = image
+        if rect is None:
+            return image
+        sx = image.width / self.size.x
+        sy = abs(image.height) / self.size.y
+        return image.crop([int(round(v * s)) for (v, s)
+                           in zip(rect, (sx, sy, sx, sy))])
 
     def rasterize(self, direct=False):
         """Rasterize; convert an application page into DocuWorks image page.
@@ -525,6 +752,7 @@ class Page(Annotatable, Observer):
             insert_space=False,
             verbose=False,
             failover=True,
+            cache=None,
             ):
         """Process page with OCR engine.
 
@@ -551,6 +779,9 @@ class Page(Annotatable, Observer):
         insert_space    (bool) insert spaces for blanks
         verbose         (bool) show progress banner
         failover        (bool) do ocr_azure() if ocr() failed
+        cache           (OCRCache) cache for ocr_azure() and ocr_gcloud()
+                        on failover; results of DocuWorks OCR are not
+                        cached since their rects are unavailable
 
         CAUTION: To do ocr_azure(), enable internet connection and set
         environment variables XDWLIB_OCR_AZURE_ENDPOINT and
@@ -560,9 +791,9 @@ class Page(Annotatable, Observer):
             raise TypeError("OCR is available for image pages")
         if not OCRENABLED:
             if all(self.azure_env()):
-                return self.ocr_azure()
+                return self.ocr_azure(cache=cache)
             if self.gcloud_env():
-                return self.ocr_gcloud()
+                return self.ocr_gcloud(cache=cache)
             raise AccessDeniedError("OCR is out of service")
         en = XDW_OCR_ENGINE.normalize(engine)
         if en == XDW_OCR_ENGINE_WRP:
@@ -619,14 +850,12 @@ class Page(Annotatable, Observer):
             else: return 0
         rtlist.sort(key=cmp_to_key(cmp))
 
-    @staticmethod
-    def azure_env():
-        return (os.environ.get(ENV_AZURE_URL), os.environ.get(ENV_AZURE_KEY))
+    azure_env = staticmethod(azure_env)
 
     def ocr_azure(self,
             language=None, charset="DEFAULT", errors="replace", timeout=60,
             endpoint="", subscription_key="",
-            version="3.2", model_version="latest",
+            version="3.2", model_version="latest", cache=None,
             ):
         """Process page with Azure OCR.
 
@@ -647,108 +876,69 @@ class Page(Annotatable, Observer):
         version         (str) OCR engine version e.g. '3.2'
         model_version   (str) see Azure Read API document e.g.:
                               'latest', '2021-09-30-preview', or '2021-04-12'
+        cache           (OCRCache) reuse OCR result for identical page image
 
         Notes: Default endpoint and subscription_key can be set in environment
         variables XDWLIB_OCR_AZURE_ENDPOINT and
         XDWLIB_OCR_AZURE_SUBSCRIPTION_KEY.
         """
-        url, key = self.azure_env()
-        url = endpoint or url
-        key = subscription_key or key
-        if not (url and key):
-            raise ValueError(f"{ENV_AZURE_URL} or {ENV_AZURE_KEY} is missing")
+        image = self._ocr_image()
+        if cache is not None:
+            key = cache.key(image, "azure", version=version,
+                            model_version=model_version, language=language)
+            rtlist = cache.get(key)
+        if cache is None or rtlist is None:
+            client = AzureReadClient(endpoint=endpoint,
+                    subscription_key=subscription_key, version=version,
+                    model_version=model_version, language=language,
+                    timeout=timeout)
+            rtlist = client.analyze(image)
+            self.sort_rtlist(rtlist)
+            if cache is not None:
+                cache.put(key, rtlist)
+        self.set_ocr_text(rtlist, charset=charset, errors=errors, unit="px")
+
+    def _ocr_image(self):
+        """Get page image in JPEG to send to OCR services."""
         with XDWTemp(suffix=".jpg") as temp:
             self.export_image(path=temp.path, format="JPEG",
                               dpi=self.resolution.x)
             with open(temp.path, "rb") as in_:
-                data = in_.read()
-        assert str(version) == "3.2"
-        url = url.rstrip("/") + f"/vision/v{version}/read/analyze"
-        headers = {"Ocp-Apim-Subscription-Key": key,
-                   "Content-Type": "application/octet-stream"}
-        params = {"language": language or "",
-                  "model-version": model_version,
-                  "readingOrder": "natural"}
-        def build_req(url, headers=None, params=None, method="GET"):
-            url = list(urlparse(url))
-            if params: url[4] = urlencode(params)
-            return Request(urlunparse(url), headers=headers, method=method)
-        req = build_req(url, headers=headers, params=params, method="POST")
-        res = urlopen(req, data=data)
-        if not str(res.status).startswith("2"):
-            raise ApplicatonFailedError(
-                    f"falure in Azure OCR, status={result.status}")
-        req = build_req(res.headers["Operation-Location"], headers=headers)
-        tick = 3
-        for elapsed in range(0, timeout, tick):
-            res = urlopen(req)
-            result = json.loads(res.read().decode("utf-8"))
-            if result.get("status") == "failed":
-                raise ApplicatonFailedError("failure in Azure OCR")
-            if "analyzeResult" in result:
-                break
-            time.sleep(tick)
-        else:
-            raise ApplicatonFailedError("time out in Azure OCR")
-        lines = result["analyzeResult"]["readResults"][0]["lines"]
-        rtlist = []
-        for line in lines:
-            x = list(islice(line["boundingBox"], 0, None, 2))
-            y = list(islice(line["boundingBox"], 1, None, 2))
-            rtlist.append(((min(x), min(y), max(x), max(y)), line["text"]))
-        self.sort_rtlist(rtlist)
-        self.set_ocr_text(rtlist, charset=charset, errors=errors, unit="px")
+                return in_.read()
 
-    @staticmethod
-    def gcloud_env():
-        return os.environ.get(ENV_GCLOUD_CRED)
+    gcloud_env = staticmethod(gcloud_env)
 
     def ocr_gcloud(self,
             language=None, charset="DEFAULT", errors="replace",
-            credentials=None):
-        if not GCVISION:
+            credentials=None, cache=None, client=None):
+        """Process page with Google Cloud Vision OCR.
+
+        language        (None) expect no specific language
+                        (str) 'ja', 'en', etc.
+        charset         see ocr_azure()
+        errors          see ocr_azure()
+        credentials     (str) path to service account key file
+                        (None) use $GOOGLE_APPLICATION_CREDENTIALS
+        cache           (OCRCache) reuse OCR result for identical page image
+        client          (ImageAnnotatorClient) client to use instead of
+                        the one shared in the process
+        """
+        if not (GCVISION or client):
             raise NotImplementedError("google-cloud-vision is not installed")
-        oldcred = self.gcloud_env()
-        try:
-            language = language and language.casefold()
-            linebreak = "" if language in NOLINEBREAKLANGUAGES else " "
-            if credentials:
-                os.environ[ENV_GCLOUD_CRED] = os.path.expanduser(credentials)
-            elif not oldcred:
-                raise ValueError(f"${ENV_GCLOUD_CRED} is not set")
-            client = GCVISION.ImageAnnotatorClient()
-            with XDWTemp(suffix=".jpg") as temp:
-                self.export_image(path=temp.path, format="JPEG",
-                                  dpi=self.resolution.x)
-                with open(temp.path, "rb") as in_:
-                    data = in_.read()
-            image = GCVISION.Image(content=data)
-            response = client.document_text_detection(image=image)
-            rtlist = list()
-            for page in response.full_text_annotation.pages:  # 1 page only.
-                for block in page.blocks:
-                    for para in block.paragraphs:
-                        symbols = []
-                        # Inserting spaces between words doesn't work in CJK.
-                        for word in para.words:
-                            for symbol in word.symbols:
-                                symbols.append(symbol.text)
-                                brk = symbol.property.detected_break.type_
-                                if brk == BREAKTYPES.EOL_SURE_SPACE:
-                                    symbols.append(linebreak)
-                                elif brk in (BREAKTYPES.SPACE,
-                                             BREAKTYPES.SURE_SPACE,):
-                                    symbols.append(" ")
-                        x, y = zip(*[(getattr(v, "x", 0), getattr(v, "y", 0))
-                                     for v in para.bounding_box.vertices])
-                        r = Rect(min(x), min(y), max(x), max(y))
-                        t = "".join(symbols).strip()
-                        rtlist.append((r, t))
+        language = language and language.casefold()
+        image = self._ocr_image()
+        if cache is not None:
+            key = cache.key(image, "gcloud", language=language)
+            rtlist = cache.get(key)
+        if cache is None or rtlist is None:
+            client = client or gcloud_client(credentials)
+            response = client.batch_annotate_images(
+                    requests=[gcloud_request(image)])
+            rtlist = gcloud_rtlist(response.responses[0], language=language)
             self.sort_rtlist(rtlist)
-            self.set_ocr_text(rtlist, charset=charset, errors=errors, unit="px")
-        finally:
-            if oldcred:
-                os.environ[ENV_GCLOUD_CRED] = oldcred
+            if cache is not None:
+                cache.put(key, rtlist)
+        self.set_ocr_text(rtlist, charset=charset, errors=errors, unit="px")
 
     def clear_ocr_text(self):
         """Clear OCR text."""
@@ -763,6 +953,7 @@ class Page(Annotatable, Observer):
         rtlist      sequence of (rect, text), where:
                         rect    Rect
                         text    str
+                    or (RectArray, sequence of str)
         charset     'DEFAULT' | 'ANSI' | 'SYMBOL' | 'MAC' | 'SHIFTJIS'
                               | 'HANGEUL' | 'CHINESEBIG5' | 'GREEK' | 'TURKISH'
                               | 'BALTIC' | 'RUSSIAN' | 'EASTEUROPE' | 'OEM'
@@ -779,24 +970,22 @@ class Page(Annotatable, Observer):
         """
         if self.type != "IMAGE":
             raise TypeError("OCR text is available for image pages")
-        rects = (XDW_RECT * len(rtlist))()
         crlf = "\x0d\x0a"
-        text = []
+        if len(rtlist) == 2 and isinstance(rtlist[0], RectArray):
+            rects, text = rtlist
+        else:
+            rects = RectArray([r for (r, t) in rtlist])
+            text = [t for (r, t) in rtlist]
+        if len(rects) != len(text):
+            raise ValueError("numbers of rects and texts differ")
+        if half_open:
+            rects = rects.closed()
         if unit == "mm":
-            cx = lambda x: int(mm2px(x, self.resolution.x))
-            cy = lambda y: int(mm2px(y, self.resolution.y))
-        else:  # if unit == "px"
-            cx = cy = int
-        for i, (r, t) in enumerate(rtlist):
-            text.append(t)
-            if not isinstance(r, Rect):
-                r = Rect(*r)
-            if half_open:
-                r = r.closed()
-            rects[i].left = cx(r.left)
-            rects[i].top = cy(r.top)
-            rects[i].right = cx(r.right)
-            rects[i].bottom = cy(r.bottom)
+            dpi = self.resolution
+            rects = rects.convert(lambda x: mm2px(x, dpi.x),
+                                  lambda y: mm2px(y, dpi.y))
+        data = array("l", (int(v) for r in rects.int() for v in r))
+        rects = (XDW_RECT * len(text)).from_buffer_copy(data)
         info = XDW_OCR_TEXTINFO()
         if self.degree in (0, 180):
             info.nWidth = int(self.image_size.x)
@@ -807,25 +996,27 @@ class Page(Annotatable, Observer):
         info.charset = XDW_FONT_CHARSET.normalize(charset)
         encoding = f"cp{charset_to_codepage(info.charset)}"
         info.lpszText = crlf.join(text).encode(encoding, errors=errors) + b"\x00"
-        info.nLineRect = len(rtlist)
+        info.nLineRect = len(text)
         info.pLineRect = rects
         XDW_SetOcrData(self.doc.handle, self.absolute_page() + 1, info)
 
-    def export(self, path=None):
+    def export(self, path=None, overwrite=False):
         """Export page to another document.
 
         path    (str) export to {path};
                       with no dir, export to {document/binder dir}/{path}
                 (None) export to
                       {document/binder dir}/{document name}_P{num}.xdw
+        overwrite   (bool) overwrite existing file instead of exporting to
+                    a derivative e.g. {document name}_P{num}-2.xdw
 
         Returns the exported pathname which may differ from path.
         """
-        return self.doc.export(self.pos, path=path)
+        return self.doc.export(self.pos, path=path, overwrite=overwrite)
 
     def export_image(self,
             path=None, dpi=600, color="COLOR", format=None, compress="NORMAL",
-            direct=False):
+            direct=False, overwrite=False):
         """Export page to image file.
 
         path        (str) export to {path};
@@ -852,12 +1043,14 @@ class Page(Annotatable, Observer):
                         the exported image.  Image orientation depends
                         on the internal state, so check 'degree' attribute
                         of the page if needed.
+        overwrite   (bool) overwrite existing file instead of exporting to
+                    a derivative e.g. {document name}_P{num}-2.bmp
 
         Returns the exported pathname which may differ from path.
         """
         return self.doc.export_image(self.pos,
                 path=path, pages=1, dpi=dpi, color=color, format=format,
-                compress=compress, direct=direct)
+                compress=compress, direct=direct, overwrite=overwrite)
 
     def view(self, light=False, wait=True, fullscreen=False, zoom=0):
         """View page with DocuWorks Viewer (Light).
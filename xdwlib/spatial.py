@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""spatial.py -- spatial index for rectangular regions
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import math
+import heapq
+from itertools import count
+
+from .struct import Point, Rect
+
+
+__all__ = ("SpatialIndex",)
+
+
+class SpatialIndex(object):
+
+    """Uniform grid index of rectangles.
+
+    Each key is registered with a Rect to every grid cell it overlaps, so
+    that a query examines only the keys in the cells overlapping the query
+    region.  Page-sized regions with thousands of small annotations are
+    the expected use, for which a grid is as effective as an R-tree.
+
+    Example:
+
+        index = SpatialIndex(cell=10)
+        index.insert("a", Rect(10, 10, 20, 20))
+        index.insert("b", Rect(50, 50, 60, 70))
+        index.intersects(Rect(0, 0, 15, 15))  # --> ['a']
+        index.nearest(Point(55, 40))  # --> ['b']
+
+    Rects are treated as half-open i.e. right-bottom is outside.
+    """
+
+    def __init__(self, cell=10.0):
+        """Initiator.
+
+        cell    (float) width and height of grid cell e.g. in mm
+        """
+        self.cell = float(cell)
+        self._rects = dict()  # {key: Rect}
+        self._grid = dict()  # {(ix, iy): set of keys}
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __contains__(self, key):
+        return key in self._rects
+
+    def __iter__(self):
+        return iter(self._rects)
+
+    def _cells(self, rect):
+        c = self.cell
+        x0, x1 = int(math.floor(rect[0] / c)), int(math.floor(rect[2] / c))
+        y0, y1 = int(math.floor(rect[1] / c)), int(math.floor(rect[3] / c))
+        return [(ix, iy) for ix in range(x0, x1 + 1)
+                         for iy in range(y0, y1 + 1)]
+
+    def insert(self, key, rect):
+        """Register key with rect; replace the old rect if any."""
+        if key in self._rects:
+            self.remove(key)
+        rect = Rect(*rect)
+        self._rects[key] = rect
+        for cell in self._cells(rect):
+            self._grid.setdefault(cell, set()).add(key)
+
+    update = insert
+
+    def remove(self, key):
+        """Unregister key; ignored if not registered."""
+        rect = self._rects.pop(key, None)
+        if rect is None:
+            return
+        for cell in self._cells(rect):
+            keys = self._grid.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grid[cell]
+
+    def clear(self):
+        self._rects.clear()
+        self._grid.clear()
+
+    def rect(self, key):
+        """Get registered rect of key."""
+        return self._rects[key]
+
+    def _candidates(self, rect):
+        result = set()
+        for cell in self._cells(rect):
+            result.update(self._grid.get(cell, ()))
+        return result
+
+    def intersects(self, rect):
+        """Get keys whose rects share some region with rect."""
+        l, t, r, b = rect
+        result = []
+        for key in self._candidates(rect):
+            kl, kt, kr, kb = self._rects[key]
+            if kl < r and l < kr and kt < b and t < kb:
+                result.append(key)
+        return result
+
+    def contains(self, rect):
+        """Get keys whose rects are inside rect."""
+        l, t, r, b = rect
+        result = []
+        for key in self._candidates(rect):
+            kl, kt, kr, kb = self._rects[key]
+            if l <= kl and kr < r and t <= kt and kb < b:
+                result.append(key)
+        return result
+
+    def at(self, point):
+        """Get keys whose rects include point."""
+        x, y = point
+        return self.intersects(Rect(x, y, x + 1e-9, y + 1e-9))
+
+    def nearest(self, point, n=1):
+        """Get n keys in ascending order of distance from point.
+
+        Distance is 0 for rects including point.
+        """
+        if not self._rects:
+            return []
+        x, y = point
+        c = self.cell
+        cx, cy = int(math.floor(x / c)), int(math.floor(y / c))
+        xs, ys = zip(*self._grid)
+        maxring = max(abs(cx - min(xs)), abs(cx - max(xs)),
+                      abs(cy - min(ys)), abs(cy - max(ys)))
+        seen = set()
+        heap = []
+        tiebreak = count()
+        for ring in range(maxring + 1):
+            for cell in self._ring(cx, cy, ring):
+                for key in self._grid.get(cell, ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    d = self._distance(self._rects[key], x, y)
+                    heapq.heappush(heap, (d, next(tiebreak), key))
+            # Every rect not seen yet is farther than ring * cell.
+            if n <= len(heap) and heapq.nsmallest(n, heap)[-1][0] <= ring * c:
+                break
+        return [key for (_, _, key) in heapq.nsmallest(n, heap)]
+
+    @staticmethod
+    def _ring(cx, cy, ring):
+        if ring == 0:
+            return [(cx, cy)]
+        cells = []
+        for i in range(-ring, ring + 1):
+            cells.extend([(cx + i, cy - ring), (cx + i, cy + ring)])
+        for i in range(-ring + 1, ring):
+            cells.extend([(cx - ring, cy + i), (cx + ring, cy + i)])
+        return cells
+
+    @staticmethod
+    def _distance(rect, x, y):
+        l, t, r, b = rect
+        dx = max(l - x, 0, x - r)
+        dy = max(t - y, 0, y - b)
+        return math.hypot(dx, dy)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # vim: set fileencoding=utf-8 fileformat=unix expandtab :
 
-"""struct.py -- Point and Rect
+"""struct.py -- Point, Rect and their arrays
 
 Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
 
@@ -14,10 +14,19 @@ FOR A PARTICULAR PURPOSE.
 """
 
 from collections import namedtuple
+from itertools import repeat
+from array import array
 import math
 
+try:
+    import numpy
+    NUMPY_ENABLED = True
+except ImportError:
+    NUMPY_ENABLED = False
 
-__all__ = ("Point", "Rect", "EPSILON")
+
+__all__ = ("Point", "Rect", "Affine", "PointArray", "RectArray",
+           "EPSILON", "NUMPY_ENABLED")
 
 PI = math.pi
 EPSILON = 0.01  # mm
@@ -237,6 +246,507 @@ class Rect(_Rect):
         return Rect(p.rotate(degree, origin=origin) for p in self)
 
 
+_Affine = namedtuple("_Affine", "a b c d e f")
+
+
+class Affine(_Affine):
+
+    """Affine transformation on page coordinate (in mm).
+
+    A point (x, y) is mapped to (a * x + b * y + c, d * x + e * y + f).
+    Rotation is clockwise as Point.rotate() since y-axis goes downward.
+
+    >>> m = Affine.rotation(90, origin=Point(10, 10))
+    >>> m(Point(20, 10))
+    Point(10.00, 20.00)
+    >>> (Affine.translation(5, 0) @ Affine.scaling(2))(Point(1, 1))
+    Point(7.00, 2.00)
+    >>> Affine.scaling(2).apply([Point(1, 2), Point(3, 4)])
+    [Point(2.00, 4.00), Point(6.00, 8.00)]
+    >>> Affine.translation(5, 0).is_translation()
+    True
+    >>> Affine.get([[0, -1, 0], [1, 0, 0]]) == Affine.rotation(90).round()
+    True
+    """
+
+    def __str__(self):
+        return f"({', '.join(f'{x:.4f}' for x in self)})"
+
+    def __repr__(self):
+        return "Affine" + self.__str__()
+
+    @staticmethod
+    def identity():
+        return Affine(1, 0, 0, 0, 1, 0)
+
+    @staticmethod
+    def translation(dx, dy=0):
+        return Affine(1, 0, dx, 0, 1, dy)
+
+    @staticmethod
+    def rotation(degree, origin=None):
+        """Clockwise rotation around origin (None = (0, 0))."""
+        rad = PI * degree / 180.0
+        sin, cos = math.sin(rad), math.cos(rad)
+        return Affine(cos, -sin, 0, sin, cos, 0).around(origin)
+
+    @staticmethod
+    def scaling(sx, sy=None, origin=None):
+        """Scaling around origin (None = (0, 0))."""
+        return Affine(sx, 0, 0, 0, sx if sy is None else sy, 0).around(origin)
+
+    @staticmethod
+    def get(matrix):
+        """Get an Affine object from Affine, or 2x3 or 3x3 matrix."""
+        if isinstance(matrix, Affine):
+            return matrix
+        rows = [list(row) for row in matrix]
+        if not (2 <= len(rows) <= 3 and all(len(row) == 3 for row in rows)):
+            raise ValueError("2x3 or 3x3 matrix required")
+        return Affine(*(rows[0] + rows[1]))
+
+    def around(self, origin):
+        """Apply linear part around origin instead of (0, 0)."""
+        if origin is None:
+            return self
+        ox, oy = origin
+        return (Affine.translation(ox, oy) @ self @
+                Affine.translation(-ox, -oy))
+
+    def __matmul__(self, other):
+        """Composition; (m1 @ m2)(p) == m1(m2(p))."""
+        a, b, c, d, e, f = self
+        p, q, r, s, t, u = other
+        return Affine(a * p + b * s, a * q + b * t, a * r + b * u + c,
+                      d * p + e * s, d * q + e * t, d * r + e * u + f)
+
+    def __call__(self, point):
+        x, y = point
+        return Point(self.a * x + self.b * y + self.c,
+                     self.d * x + self.e * y + self.f)
+
+    def apply(self, points):
+        """Map a sequence of points at once; vectorised by PointArray."""
+        if not len(points):
+            return []
+        return PointArray(points).transform(self).tolist()
+
+    def is_translation(self):
+        return (abs(self.a - 1) < 1e-9 and abs(self.b) < 1e-9 and
+                abs(self.d) < 1e-9 and abs(self.e - 1) < 1e-9)
+
+    def scale(self):
+        """Scaling factors along x- and y-axis as a Point."""
+        return Point(math.hypot(self.a, self.d), math.hypot(self.b, self.e))
+
+    def angle(self):
+        """Clockwise rotation angle in degree."""
+        return math.degrees(math.atan2(self.d, self.a))
+
+    def round(self, places=9):
+        return Affine(*(round(v, places) + 0.0 for v in self))
+
+
+if NUMPY_ENABLED:
+    _minimum, _maximum = numpy.minimum, numpy.maximum
+    _floor, _trunc = numpy.floor, numpy.trunc
+else:
+    _minimum, _maximum = min, max
+    _floor, _trunc = math.floor, math.trunc
+
+
+def _vec(func, *args):
+    """Apply func on columns elementwise; numbers are broadcast.
+
+    func must consist of arithmetic, comparisons and _minimum() etc. so
+    that it works both on numbers and NumPy arrays.
+    """
+    if NUMPY_ENABLED:
+        return func(*args) + 0.0  # always float, never a view
+    n = max(len(a) for a in args if not isinstance(a, (int, float)))
+    args = [repeat(a, n) if isinstance(a, (int, float)) else a for a in args]
+    return array("d", map(func, *args))
+
+
+def _mask(func, *args):
+    """Apply a predicate on columns elementwise; returns a list of bool."""
+    if NUMPY_ENABLED:
+        return [bool(v) for v in func(*args)]
+    n = max(len(a) for a in args if not isinstance(a, (int, float)))
+    args = [repeat(a, n) if isinstance(a, (int, float)) else a for a in args]
+    return [bool(v) for v in map(func, *args)]
+
+
+class _GeometryArray(object):
+
+    """Base class of PointArray and RectArray.
+
+    Coordinates are held in columns, one per field of the item type, as
+    NumPy arrays if NumPy is available or array('d') otherwise.
+    """
+
+    _item = None  # Point or Rect
+
+    def __init__(self, items=()):
+        """Initiator.
+
+        items   (sequence of Point/Rect/tuple, or the same array type)
+        """
+        k = len(self._item._fields)
+        if isinstance(items, self.__class__):
+            self._cols = items._cols
+        elif NUMPY_ENABLED:
+            a = numpy.asarray(items, dtype=float).reshape(-1, k)
+            self._cols = tuple(a[:, i].copy() for i in range(k))
+        else:
+            cols = tuple(array("d") for _ in range(k))
+            for item in items:
+                if len(item) != k:
+                    raise ValueError(f"{k} coordinates required")
+                for (col, v) in zip(cols, item):
+                    col.append(v)
+            self._cols = cols
+
+    @classmethod
+    def _from_cols(cls, cols):
+        obj = cls.__new__(cls)
+        obj._cols = tuple(cols)
+        return obj
+
+    @staticmethod
+    def _operand(other, k):
+        """Get columns of array or coordinates of item to broadcast."""
+        if isinstance(other, _GeometryArray):
+            return other._cols
+        if len(other) != k:
+            raise ValueError(f"{k} coordinates required")
+        return tuple(other)
+
+    def __repr__(self):
+        return "{cls}([{items}])".format(
+                cls=self.__class__.__name__,
+                items=", ".join(str(item) for item in self))
+
+    def __len__(self):
+        return len(self._cols[0])
+
+    def __iter__(self):
+        item = self._item
+        return (item(*v) for v in zip(*(c.tolist() for c in self._cols)))
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return self._from_cols(c[pos] for c in self._cols)
+        return self._item(*(float(c[pos]) for c in self._cols))
+
+    def __eq__(self, other):
+        if not isinstance(other, self.__class__):
+            return NotImplemented
+        return self.tolist() == other.tolist()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        a = numpy.column_stack(self._cols)
+        return a if dtype is None else a.astype(dtype)
+
+    def tolist(self):
+        return list(self)
+
+    def int(self):
+        return self._from_cols(_vec(_trunc, c) for c in self._cols)
+
+    fix = int
+
+    def round(self, places=0):
+        """Round as Point.round() i.e. not to the nearest even number."""
+        f = math.pow(10, places)
+        return self._from_cols(_vec(lambda v: _floor(v * f + .5) / f, c)
+                               for c in self._cols)
+
+
+class PointArray(_GeometryArray):
+
+    """Sequence of Point with vectorised operations.
+
+    Coordinates are held as NumPy arrays if available, or array('d')
+    otherwise, and each operation works on all the points at once.
+
+    >>> a = PointArray([Point(0, 10), Point(20, 30)])
+    >>> a
+    PointArray([(0.00, 10.00), (20.00, 30.00)])
+    >>> a[1]
+    Point(20.00, 30.00)
+    >>> a + Point(5, 10)
+    PointArray([(5.00, 20.00), (25.00, 40.00)])
+    >>> a - a[0]
+    PointArray([(0.00, 0.00), (20.00, 20.00)])
+    >>> a * 2
+    PointArray([(0.00, 20.00), (40.00, 60.00)])
+    >>> a.rotate(30).round(2)
+    PointArray([(-5.00, 8.66), (2.32, 35.98)])
+    >>> a.bbox()
+    Rect(0.00, 10.00, 20.00, 30.00)
+    >>> a.within(Rect(0, 0, 20, 20))
+    [True, False]
+    """
+
+    _item = Point
+
+    def __bool__(self):
+        return 0 < len(self)
+
+    def __neg__(self):
+        return self._from_cols(_vec(lambda v: -v, c) for c in self._cols)
+
+    def __add__(self, pnt):
+        return self.shift(pnt)
+
+    def __sub__(self, pnt):
+        if isinstance(pnt, PointArray):
+            return self.shift(-pnt)
+        return self.shift(-Point(*pnt))
+
+    def __mul__(self, n):
+        if not isinstance(n, (int, float)):
+            raise NotImplementedError
+        return self._from_cols(_vec(lambda v: v * n, c) for c in self._cols)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, n):
+        if not isinstance(n, (int, float)):
+            raise NotImplementedError
+        return self._from_cols(_vec(lambda v: v / n, c) for c in self._cols)
+
+    def shift(self, pnt, _y=0):
+        """Shift by Point, or by PointArray elementwise."""
+        if isinstance(pnt, (int, float)) and isinstance(_y, (int, float)):
+            pnt = (pnt, _y)
+        elif not isinstance(pnt, (tuple, list, PointArray)):
+            raise NotImplementedError
+        dx, dy = self._operand(pnt, 2)
+        x, y = self._cols
+        return PointArray._from_cols((_vec(lambda a, b: a + b, x, dx),
+                                      _vec(lambda a, b: a + b, y, dy)))
+
+    def transform(self, matrix):
+        """Map points by Affine or 2x3 matrix."""
+        a, b, c, d, e, f = Affine.get(matrix)
+        x, y = self._cols
+        return PointArray._from_cols((
+                _vec(lambda x, y: a * x + b * y + c, x, y),
+                _vec(lambda x, y: d * x + e * y + f, x, y)))
+
+    def rotate(self, degree, origin=None):
+        return self.transform(Affine.rotation(degree, origin=origin))
+
+    def relative(self):
+        """Convert into xdwapi-style i.e. relative to the first point."""
+        if len(self) < 2:
+            return self
+        cols = []
+        for c in self._cols:
+            c0 = float(c[0])
+            c = _vec(lambda v: v - c0, c)
+            c[0] = c0
+            cols.append(c)
+        return PointArray._from_cols(cols)
+
+    def bbox(self):
+        """Get the smallest Rect (closed) which contains all points."""
+        if not len(self):
+            raise ValueError("no points")
+        x, y = self._cols
+        return Rect(float(min(x)), float(min(y)),
+                    float(max(x)), float(max(y)))
+
+    def within(self, rect):
+        """Test if points are in half-open Rect; returns a list of bool."""
+        left, top, right, bottom = rect
+        x, y = self._cols
+        return _mask(lambda x, y: (left <= x) & (x < right) &
+                                  (top <= y) & (y < bottom), x, y)
+
+
+class RectArray(_GeometryArray):
+
+    """Sequence of Rect with vectorised operations.
+
+    Coordinates are held as NumPy arrays if available, or array('d')
+    otherwise, and each operation works on all the rects at once.
+    Binary operations take either a Rect, which is applied to every
+    rect, or a RectArray of the same length, applied elementwise.
+
+    >>> a = RectArray([Rect(0, 10, 20, 30), Rect(10, 0, 40, 20)])
+    >>> a
+    RectArray([(0.00, 10.00, 20.00, 30.00), (10.00, 0.00, 40.00, 20.00)])
+    >>> a.shift(Point(15, 25))[0]
+    Rect(15.00, 35.00, 35.00, 55.00)
+    >>> (a * 2)[0]
+    Rect(0.00, 10.00, 40.00, 50.00)
+    >>> a.sizes()
+    PointArray([(20.00, 20.00), (30.00, 20.00)])
+    >>> a.contains(Point(15, 15))
+    [True, True]
+    >>> a.contains(Point(20, 15))
+    [False, True]
+    >>> a.intersects(Rect(30, 0, 50, 10))
+    [False, True]
+    >>> a.intersection(Rect(15, 5, 50, 25))
+    RectArray([(15.00, 10.00, 20.00, 25.00), (15.00, 5.00, 40.00, 20.00)])
+    >>> a.union()
+    Rect(0.00, 0.00, 40.00, 30.00)
+    """
+
+    _item = Rect
+
+    def __bool__(self):
+        return 0 < len(self)
+
+    def __mul__(self, n):
+        """Scale sizes keeping left-top as Rect does."""
+        if not isinstance(n, (int, float)):
+            raise NotImplementedError
+        left, top, right, bottom = self._cols
+        return RectArray._from_cols((left, top,
+                _vec(lambda l, r: l + (r - l) * n, left, right),
+                _vec(lambda t, b: t + (b - t) * n, top, bottom)))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, n):
+        if not isinstance(n, (int, float)):
+            raise NotImplementedError
+        return self * (1.0 / n)
+
+    def shift(self, pnt, _y=0):
+        """Shift by Point, or by PointArray elementwise."""
+        if isinstance(pnt, (int, float)) and isinstance(_y, (int, float)):
+            pnt = (pnt, _y)
+        elif not isinstance(pnt, (tuple, list, PointArray)):
+            raise NotImplementedError
+        dx, dy = self._operand(pnt, 2)
+        left, top, right, bottom = self._cols
+        add = lambda a, b: a + b
+        return RectArray._from_cols((_vec(add, left, dx), _vec(add, top, dy),
+                                     _vec(add, right, dx),
+                                     _vec(add, bottom, dy)))
+
+    def half_open(self):
+        """Get half-open version i.e. right-bottom is excluded."""
+        left, top, right, bottom = self._cols
+        return RectArray._from_cols((left, top,
+                                     _vec(lambda v: v + EPSILON, right),
+                                     _vec(lambda v: v + EPSILON, bottom)))
+
+    def closed(self):
+        """Get closed version i.e. right-bottom is included."""
+        left, top, right, bottom = self._cols
+        return RectArray._from_cols((left, top,
+                                     _vec(lambda v: v - EPSILON, right),
+                                     _vec(lambda v: v - EPSILON, bottom)))
+
+    def convert(self, fx, fy=None):
+        """Convert x- and y-coordinates by functions e.g. mm2px().
+
+        fx, fy  function(coordinate) --> coordinate; fy=None means fx.
+                Functions must consist of arithmetic so as to work both
+                on numbers and NumPy arrays.
+        """
+        fy = fy or fx
+        left, top, right, bottom = self._cols
+        return RectArray._from_cols((_vec(fx, left), _vec(fy, top),
+                                     _vec(fx, right), _vec(fy, bottom)))
+
+    def positions(self):
+        return PointArray._from_cols(self._cols[:2])
+
+    def sizes(self):
+        left, top, right, bottom = self._cols
+        return PointArray._from_cols((_vec(lambda l, r: r - l, left, right),
+                                      _vec(lambda t, b: b - t, top, bottom)))
+
+    def transform(self, matrix):
+        """Get bounding boxes of rects mapped by Affine or 2x3 matrix."""
+        left, top, right, bottom = self._cols
+        corners = [PointArray._from_cols(xy).transform(matrix)._cols
+                   for xy in ((left, top), (right, top),
+                              (right, bottom), (left, bottom))]
+        xs = [xy[0] for xy in corners]
+        ys = [xy[1] for xy in corners]
+        lo = lambda a, b, c, d: _minimum(_minimum(a, b), _minimum(c, d))
+        hi = lambda a, b, c, d: _maximum(_maximum(a, b), _maximum(c, d))
+        return RectArray._from_cols((_vec(lo, *xs), _vec(lo, *ys),
+                                     _vec(hi, *xs), _vec(hi, *ys)))
+
+    def rotate(self, degree, origin=None):
+        """Get bounding boxes of rotated rects."""
+        return self.transform(Affine.rotation(degree, origin=origin))
+
+    def contains(self, obj):
+        """Test if rects contain Point or Rect; returns a list of bool.
+
+        Rects are half-open, so the right-bottom edge of a Point is
+        outside while a Rect with the same right-bottom is inside.
+        """
+        left, top, right, bottom = self._cols
+        if len(obj) == 2:
+            x, y = obj
+            return _mask(lambda l, t, r, b: (l <= x) & (x < r) &
+                                            (t <= y) & (y < b),
+                         left, top, right, bottom)
+        L, T, R, B = obj
+        return _mask(lambda l, t, r, b: (l <= L) & (R <= r) &
+                                        (t <= T) & (B <= b),
+                     left, top, right, bottom)
+
+    def intersects(self, rect):
+        """Test if rects overlap with Rect or RectArray elementwise."""
+        L, T, R, B = self._operand(rect, 4)
+        left, top, right, bottom = self._cols
+        return _mask(lambda l, t, r, b, L, T, R, B:
+                             (l < R) & (L < r) & (t < B) & (T < b),
+                     left, top, right, bottom, L, T, R, B)
+
+    def intersection(self, rect):
+        """Get intersections with Rect or RectArray elementwise.
+
+        Where rects do not overlap, empty rects i.e. those of width or
+        height 0 are given; see also intersects().
+        """
+        L, T, R, B = self._operand(rect, 4)
+        left, top, right, bottom = self._cols
+        left = _vec(_maximum, left, L)
+        top = _vec(_maximum, top, T)
+        right = _vec(lambda l, r, R: _maximum(l, _minimum(r, R)),
+                     left, right, R)
+        bottom = _vec(lambda t, b, B: _maximum(t, _minimum(b, B)),
+                      top, bottom, B)
+        return RectArray._from_cols((left, top, right, bottom))
+
+    def union(self, rect=None):
+        """Get bounding boxes with Rect or RectArray elementwise.
+
+        rect    (Rect or RectArray) or None to get the Rect which
+                bounds all the rects
+        """
+        left, top, right, bottom = self._cols
+        if rect is None:
+            if not len(self):
+                raise ValueError("no rects")
+            return Rect(float(min(left)), float(min(top)),
+                        float(max(right)), float(max(bottom)))
+        L, T, R, B = self._operand(rect, 4)
+        return RectArray._from_cols((
+                _vec(_minimum, left, L), _vec(_minimum, top, T),
+                _vec(_maximum, right, R), _vec(_maximum, bottom, B)))
+
+
 if __name__ == "__main__":
 
     import doctest
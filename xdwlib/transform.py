@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""transform.py -- TransformPipeline, chained whole-file transforms
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import time
+from collections import namedtuple
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from .common import *
+from .xdwtemp import XDWTemp
+from .xdwfile import optimize, protect, unprotect, sign, ProtectionPolicy
+from .xdwfile import PageFormTemplate
+
+
+__all__ = ("TransformPipeline", "TransformResult", "protect_many",
+           "unprotect_many", "configure_pageforms")
+
+
+XDW_EXTENSIONS = (".xdw", ".xbd", ".xct")
+
+TRANSFORMS = dict(optimize=optimize, protect=protect, unprotect=unprotect,
+                  sign=sign)
+
+TransformResult = namedtuple("TransformResult",
+                             "input_path output_path timings error")
+TransformResult.__doc__ = """\
+Result of TransformPipeline for a file.
+
+input_path  (str) pathname of source file
+output_path (str) pathname of created file, or None if failed
+timings     (list) [(step name, seconds), ...] for steps done
+error       (Exception) raised by a step, or None on success
+"""
+
+
+class TransformPipeline(object):
+
+    """Sequence of whole-file transforms i.e. optimize, protect, unprotect
+    and sign.
+
+    Each transform of xdwlib reads a file and writes another.  A pipeline
+    passes intermediate files through the temporary workspace (see
+    XDWWorkspace), and only the last step writes the output file, so
+    that neither documents are reopened nor output names are allocated
+    between steps.
+
+    Example:
+
+        pipeline = TransformPipeline().optimize().sign(type="STAMP")
+        pipeline.run("a.xdw", "a-signed.xdw")
+        for result in pipeline.run_many(paths, dir="out", concurrency=4):
+            print(result.input_path, result.timings)
+
+    or for an opened document, doc.transform(pipeline).
+
+    Steps are kept as names and keyword arguments, so a pipeline can be
+    passed to worker processes.
+    """
+
+    def __init__(self, steps=()):
+        """Initiator.
+
+        steps   (sequence of (name, kw)) where name is 'optimize' |
+                'protect' | 'unprotect' | 'sign' and kw is a dict of
+                arguments for the function of the same name in xdwfile
+                except input_path and output_path
+        """
+        self.steps = []
+        for (name, kw) in steps:
+            self.add(name, **kw)
+
+    def __repr__(self):
+        return "{cls}({steps})".format(
+                cls=self.__class__.__name__,
+                steps=" > ".join(name for (name, _) in self.steps))
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add(self, name, **kw):
+        """Append a step; returns self to chain."""
+        name = name.lower()
+        if name not in TRANSFORMS:
+            raise ValueError(f"illegal transform '{name}'")
+        if "input_path" in kw or "output_path" in kw:
+            raise ValueError("pathnames are given on run")
+        self.steps.append((name, kw))
+        return self
+
+    def optimize(self):
+        """Append optimize step; see xdwfile.optimize()."""
+        return self.add("optimize")
+
+    def protect(self, **kw):
+        """Append protect step; see xdwfile.protect()."""
+        return self.add("protect", **kw)
+
+    def unprotect(self, **kw):
+        """Append unprotect step; see xdwfile.unprotect()."""
+        return self.add("unprotect", **kw)
+
+    def sign(self, **kw):
+        """Append sign step; see xdwfile.sign()."""
+        return self.add("sign", **kw)
+
+    def run(self, input_path, output_path=None, timings=None):
+        """Apply steps to a file.
+
+        input_path  (str) pathname of document/binder
+        output_path (str) pathname of the result;
+                    None means a derivative of input_path
+        timings     (list) if given, (step name, seconds) is appended for
+                    each step done
+
+        Returns the created pathname which may differ from output_path.
+        """
+        if not self.steps:
+            raise ValueError("no steps in pipeline")
+        input_path = adjust_path(input_path)
+        root, ext = os.path.splitext(input_path)
+        path, temp = input_path, None
+        try:
+            for (i, (name, kw)) in enumerate(self.steps):
+                if i < len(self.steps) - 1:
+                    out = XDWTemp(suffix=ext)
+                    dest = out.path
+                else:
+                    out, dest = None, output_path or root
+                t0 = time.perf_counter()
+                path = TRANSFORMS[name](path, output_path=dest, **kw)
+                if timings is not None:
+                    timings.append((name, time.perf_counter() - t0))
+                if temp:
+                    temp.close()  # Previous intermediate file.
+                temp = out
+        finally:
+            if temp:
+                temp.close()
+        return path
+
+    def run_many(self, input_paths, dir=None, concurrency=4, callback=None):
+        """Apply steps to many files in worker processes.
+
+        input_paths (sequence of str) pathnames of documents/binders
+        dir         (str) directory for the results;
+                    None means the directory of each source file
+        concurrency (int) worker processes; 1 means the caller's process
+        callback    function(TransformResult) called as each file is done
+
+        Output pathnames are allocated in the caller's process.  A file
+        which fails does not stop the others.
+
+        Returns a list of TransformResult in order of input_paths.
+        """
+        input_paths = [adjust_path(path) for path in input_paths]
+        results = dict()  # {index: TransformResult}
+        used = set()  # output names handed out in this call
+
+        def prepare(index):
+            # Workers create files later, so names must differ even for
+            # sources of the same name e.g. a/x.xdw and b/x.xdw with dir.
+            path = input_paths[index]
+            output_path = newpath(os.path.basename(path),
+                                  dir=dir or os.path.dirname(path))
+            while os.path.normcase(output_path) in used:
+                output_path = derivative_path(output_path)
+            used.add(os.path.normcase(output_path))
+            return (self, path, output_path)
+
+        def finish(index, result, error):
+            if error:
+                result = TransformResult(input_paths[index], None, [], error)
+            results[index] = result
+            if callback:
+                callback(result)
+
+        indices = range(len(input_paths))
+        if concurrency <= 1:
+            for index in indices:
+                try:
+                    arg = prepare(index)
+                except Exception as e:
+                    finish(index, None, e)
+                    continue
+                finish(index, _run(arg), None)
+        else:
+            run_pipeline(indices, prepare, _run, finish,
+                         concurrency=concurrency,
+                         executor=ProcessPoolExecutor)
+        return [results[index] for index in indices]
+
+
+def _run(args):
+    """Run pipeline on a file; args is (pipeline, input_path, output_path).
+
+    output_path has been allocated by the caller; the result is written
+    to a temporary name and renamed as _apply() does.
+
+    Returns a TransformResult; errors of steps are returned, not raised.
+    """
+    pipeline, input_path, output_path = args
+    dir, filename = os.path.split(output_path)
+    temp = os.path.join(dir, f"~{os.getpid()}-{filename}")
+    timings = []
+    try:
+        temp = pipeline.run(input_path, temp, timings=timings)
+        os.replace(temp, output_path)
+    except Exception as e:
+        if os.path.exists(temp):
+            os.remove(temp)
+        return TransformResult(input_path, None, timings, e)
+    return TransformResult(input_path, output_path, timings, None)
+
+
+def _walk(paths, base=None):
+    """Expand directories into DocuWorks files under them.
+
+    Returns (base, [pathname, ...]) where base is the directory to which
+    the output tree is relative; by default the common directory of paths.
+    """
+    files = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for (dirpath, dirnames, filenames) in os.walk(path):
+            dirnames.sort()
+            files.extend(os.path.join(dirpath, name)
+                         for name in sorted(filenames)
+                         if os.path.splitext(name)[1].lower()
+                         in XDW_EXTENSIONS)
+    if base is None and files:
+        base = os.path.commonpath([os.path.dirname(p) for p in files])
+    return (os.path.abspath(base or os.curdir), files)
+
+
+def _apply(args):
+    """Apply a transform and rename the result atomically; run in a worker.
+
+    args    (name, func, input_path, output_path) where name is the name
+            of step for timings and func is
+            function(input_path, output_path) --> created pathname
+
+    The result is written to a temporary name in the directory of
+    output_path and renamed to output_path only on success, so that
+    output_path never holds a partial file.
+    """
+    name, func, input_path, output_path = args
+    dir, filename = os.path.split(output_path)
+    temp = os.path.join(dir, f"~{os.getpid()}-{filename}")
+    t0 = time.perf_counter()
+    try:
+        temp = func(input_path, temp)
+        os.replace(temp, output_path)
+    except Exception as e:
+        if os.path.exists(temp):
+            os.remove(temp)
+        return TransformResult(input_path, None, [], e)
+    return TransformResult(input_path, output_path,
+                           [(name, time.perf_counter() - t0)], None)
+
+
+def _apply_many(name, func, paths, output_dir, base=None, overwrite=False,
+                concurrency=4, callback=None):
+    base, input_paths = _walk(paths, base=base)
+    results = dict()  # {index: TransformResult}
+
+    def prepare(index):
+        path = input_paths[index]
+        output_path = os.path.join(os.path.abspath(output_dir),
+                                   os.path.relpath(path, base))
+        if output_path == path:
+            raise ValueError(f"output overwrites input: {path}")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if not overwrite:
+            output_path = derivative_path(output_path)
+        return (name, func, path, output_path)
+
+    def finish(index, result, error):
+        if error:
+            result = TransformResult(input_paths[index], None, [], error)
+        results[index] = result
+        if callback:
+            callback(result)
+
+    indices = range(len(input_paths))
+    if concurrency <= 1:
+        for index in indices:
+            try:
+                arg = prepare(index)
+            except Exception as e:
+                finish(index, None, e)
+                continue
+            finish(index, _apply(arg), None)
+    else:
+        run_pipeline(indices, prepare, _apply, finish,
+                     concurrency=concurrency,
+                     executor=ProcessPoolExecutor)
+    return [results[index] for index in indices]
+
+
+def protect_many(paths, policy, output_dir, base=None, overwrite=False,
+                 concurrency=4, callback=None):
+    """Protect many documents/binders in worker processes.
+
+    paths       (sequence of str) pathnames of documents/binders, or
+                directories to find them in recursively
+    policy      (ProtectionPolicy)
+    output_dir  (str) root directory of the output tree
+    base        (str) directory which output pathnames are made relative
+                to; None means the common directory of input files
+    overwrite   (bool) replace existing files in the output tree instead
+                of deriving new names
+    concurrency (int) worker processes; 1 means the caller's process
+    callback    function(TransformResult) called as each file is done
+
+    Each result is written under a temporary name and renamed when
+    complete.  A file which fails does not stop the others; see error of
+    TransformResult.
+
+    Returns a list of TransformResult in order of files found.
+    """
+    if not isinstance(policy, ProtectionPolicy):
+        raise TypeError("policy must be a ProtectionPolicy")
+    return _apply_many("protect", policy.apply, paths, output_dir, base=base,
+                       overwrite=overwrite, concurrency=concurrency,
+                       callback=callback)
+
+
+def unprotect_many(paths, output_dir, auth="NODIALOGUE", base=None,
+                   overwrite=False, concurrency=4, callback=None):
+    """Release protection on many documents/binders in worker processes.
+
+    auth        'NODIALOGUE' | 'CONDITIONAL'
+
+    See protect_many() for other arguments and the result.
+    """
+    return _apply_many("unprotect", partial(unprotect, auth=auth), paths,
+                       output_dir, base=base, overwrite=overwrite,
+                       concurrency=concurrency, callback=callback)
+
+
+def _configure(args):
+    """Apply PageFormTemplate to a file in place; run in a worker.
+
+    args    (template, path)
+    """
+    from .xdwfile import xdwopen
+    template, path = args
+    t0 = time.perf_counter()
+    try:
+        doc = xdwopen(path)
+        try:
+            template.apply(doc)
+            doc.save()
+        finally:
+            doc.close()
+    except Exception as e:
+        return TransformResult(path, None, [], e)
+    return TransformResult(path, path,
+                           [("pageform", time.perf_counter() - t0)], None)
+
+
+def configure_pageforms(paths, template, concurrency=4, callback=None):
+    """Apply page forms i.e. header/footer to many documents/binders.
+
+    paths       (sequence of str) pathnames of documents/binders, or
+                directories to find them in recursively
+    template    (PageFormTemplate)
+    concurrency (int) worker processes; 1 means the caller's process
+    callback    function(TransformResult) called as each file is done
+
+    Files are modified in place, each with a single update of page forms
+    and a single save.  A file which fails does not stop the others.
+
+    Returns a list of TransformResult in order of files found.
+    """
+    if not isinstance(template, PageFormTemplate):
+        raise TypeError("template must be a PageFormTemplate")
+    _, input_paths = _walk(paths)
+    results = dict()  # {index: TransformResult}
+
+    def finish(index, result, error):
+        if error:
+            result = TransformResult(input_paths[index], None, [], error)
+        results[index] = result
+        if callback:
+            callback(result)
+
+    indices = range(len(input_paths))
+    if concurrency <= 1:
+        for index in indices:
+            finish(index, _configure((template, input_paths[index])), None)
+    else:
+        run_pipeline(indices, lambda index: (template, input_paths[index]),
+                     _configure, finish, concurrency=concurrency,
+                     executor=ProcessPoolExecutor)
+    return [results[index] for index in indices]
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# vim: set fileencoding=utf-8 fileformat=unix expandtab :
+
+"""verify.py -- batch verification of signatures
+
+Copyright (C) 2010 HAYASHI Hideki <hideki@hayasix.com>  All rights reserved.
+
+This software is subject to the provisions of the Zope Public License,
+Version 2.1 (ZPL). A copy of the ZPL should accompany this distribution.
+THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+FOR A PARTICULAR PURPOSE.
+"""
+
+import os
+import time
+import threading
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from .common import run_pipeline
+
+
+__all__ = ("verify_signatures", "SignatureStatus", "SignatureReport",
+           "SignatureCache")
+
+
+# Statuses regarded as valid.
+VALID_STATUS = dict(STAMP=("TRUSTED",), PKI=("OK",))
+VALID_DOC_STATUS = ("NOEDIT", "GOOD", "GOOD_TRUSTED")
+
+SignatureStatus = namedtuple("SignatureStatus",
+        "path pos type page signer signed verification status doc_status "
+        "error")
+SignatureStatus.__doc__ = """\
+Result of verification of a signature.
+
+path            (str) pathname of document/binder
+pos             (int) position in signature list; starts with 0
+type            'STAMP' | 'PKI'
+page            (int) page number signed; starts with 0
+signer          (str) owner name of stamp, or subject of certificate
+signed          (datetime.datetime) signed datetime
+verification    'LOW' | 'MID_LOCAL' | ... for PKI, or None for STAMP
+status          status of stamp or certificate; see StampSignature and
+                PKISignature
+doc_status      'NONE' | 'NOEDIT' | 'EDIT' | 'BAD' for STAMP, or
+                'UNKNOWN' | 'GOOD' | 'MODIFIED' | 'BAD' | 'GOOD_TRUSTED' |
+                'MODIFIED_TRUSTED' for PKI
+error           error status of XDW_UpdateSignatureStatus e.g. 'OK'
+"""
+
+
+def is_valid(result):
+    """Test if SignatureStatus shows a valid signature on intact file."""
+    return (result.error == "OK" and
+            result.status in VALID_STATUS.get(result.type, ()) and
+            result.doc_status in VALID_DOC_STATUS)
+
+
+def is_volatile(result):
+    """Test if SignatureStatus may change without the file modified.
+
+    Status of PKI signatures depends on certificate stores and revocation
+    lists, while that of stamps depends only on the file.
+    """
+    return result.type == "PKI"
+
+
+def _verify(args):
+    """Verify signatures of a file; run in a worker.
+
+    args    (path, positions) where positions is a list of signature
+            positions to verify, or None for all
+
+    Returns (number of signatures, [SignatureStatus, ...]).
+    """
+    from .xdwfile import xdwopen
+    path, positions = args
+    doc = xdwopen(path, readonly=True)
+    try:
+        count = doc.signatures
+        if positions is None:
+            positions = range(count)
+        results = []
+        for pos in positions:
+            sig, _ = doc._signature(pos)
+            _, error = sig.update()
+            sig, docsts = doc._signature(pos)  # Status after update.
+            pki = hasattr(sig, "verification_type")
+            results.append(SignatureStatus(
+                    path, pos, "PKI" if pki else "STAMP", sig.pagepos,
+                    sig.subject if pki else sig.owner_name, sig.dt,
+                    sig.verification_type if pki else None,
+                    sig.status, docsts, error))
+    finally:
+        doc.close()
+    return (count, results)
+
+
+class SignatureCache(object):
+
+    """Cache of signature verification keyed by (path, mtime, position).
+
+    Results of a file are kept until the file is modified i.e. its mtime
+    changes.  Results regarded as volatile by is_volatile() e.g. those of
+    PKI signatures, which depend on revocation status, are also dropped
+    after ttl seconds.
+
+    Example:
+
+        cache = SignatureCache(ttl=3600)
+        report = verify_signatures(paths, cache=cache)
+        ...
+        report = verify_signatures(paths, cache=cache)  # Only changed.
+        print(cache.stats())
+
+    ATTRIBUTES
+    ----------
+
+    max_entries     (int) max. number of files; 0 means unlimited
+    ttl             (float) seconds to keep volatile results;
+                    None means forever
+    hits            (int) number of signatures found valid in cache
+    misses          (int) number of signatures to be verified
+    evictions       (int) number of files dropped by max_entries
+    """
+
+    def __init__(self, max_entries=4096, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # {(path, mtime): (count, {pos: (time, SignatureStatus)})}
+        self._entries = OrderedDict()
+        self._latest = dict()  # {path: key}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(path):
+        """Make a cache key for a file; (path, mtime in ns)."""
+        path = os.path.abspath(path)
+        return (path, os.stat(path).st_mtime_ns)
+
+    def get(self, key):
+        """Look up results of a file.
+
+        Returns (cached, stale) where cached is a list of SignatureStatus
+        still valid and stale is a list of positions to be verified,
+        or (None, None) if the file is not known.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return (None, None)
+            self._entries.move_to_end(key)
+            count, results = entry
+            cached, stale = [], []
+            for pos in range(count):
+                t, result = results.get(pos, (None, None))
+                if result and not (is_volatile(result) and
+                        self.ttl is not None and self.ttl < now - t):
+                    cached.append(result)
+                else:
+                    stale.append(pos)
+            self.hits += len(cached)
+            self.misses += len(stale)
+            return (cached, stale)
+
+    def put(self, key, count, results):
+        """Store number of signatures and results of a file."""
+        now = time.time()
+        with self._lock:
+            old = self._latest.get(key[0])
+            if old and old != key:
+                self._entries.pop(old, None)
+            self._latest[key[0]] = key
+            entry = self._entries.setdefault(key, (count, dict()))
+            if entry[0] != count:
+                entry = self._entries[key] = (count, dict())
+            entry[1].update((r.pos, (now, r)) for r in results)
+            self._entries.move_to_end(key)
+            while self.max_entries and self.max_entries < len(self._entries):
+                old, _ = self._entries.popitem(last=False)
+                del self._latest[old[0]]
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all results and reset statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Get statistics as a dict."""
+        return dict(entries=len(self._entries), hits=self.hits,
+                    misses=self.misses, evictions=self.evictions)
+
+
+class SignatureReport(object):
+
+    """Report of verify_signatures().
+
+    ATTRIBUTES
+    ----------
+
+    results     (list of SignatureStatus) in order of files and positions
+    failures    (dict) {path: exception} for files which failed to verify
+    verified    (int) number of signatures verified actually
+    cached      (int) number of signatures taken from cache
+    """
+
+    def __init__(self):
+        self.results = []
+        self.failures = dict()
+        self.verified = 0
+        self.cached = 0
+
+    def __repr__(self):
+        return ("{cls}(valid={valid}, invalid={invalid}, "
+                "failures={failures})").format(
+                cls=self.__class__.__name__,
+                valid=len(self.results) - len(self.invalid()),
+                invalid=len(self.invalid()),
+                failures=len(self.failures))
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __bool__(self):
+        """True if all signatures are valid and no file failed."""
+        return not self.failures and not self.invalid()
+
+    def invalid(self):
+        """Get results which is_valid() rejects."""
+        return [r for r in self.results if not is_valid(r)]
+
+    def of(self, path):
+        """Get results of a file."""
+        path = os.path.abspath(path)
+        return [r for r in self.results if r.path == path]
+
+    def rows(self):
+        """Get results as a list of dicts e.g. for csv or json.
+
+        Datetimes are converted into ISO 8601 strings, and 'valid' is
+        added to each row.  Failed files are given with 'error' only.
+        """
+        rows = []
+        for r in self.results:
+            row = r._asdict()
+            row["signed"] = r.signed.isoformat() if r.signed else None
+            row["valid"] = is_valid(r)
+            rows.append(row)
+        for (path, e) in self.failures.items():
+            rows.append(dict(path=path, valid=False,
+                             error=f"{e.__class__.__name__}: {e}"))
+        return rows
+
+
+def verify_signatures(paths, concurrency=4, cache=None, callback=None):
+    """Verify all signatures of many documents/binders.
+
+    paths       (sequence of str) pathnames of documents/binders
+    concurrency (int) worker processes; 1 means the caller's process
+    cache       (SignatureCache) to skip signatures verified before
+    callback    function(path, results, error) called as each file is
+                done, where results is a list of SignatureStatus
+
+    Files are opened read-only in worker processes, and each signature is
+    updated by BaseSignature.update() which may take a while for PKI
+    signatures with revocation check.  Signatures of files found in cache
+    are not verified again unless the files are modified or the results
+    expire.
+
+    Returns a SignatureReport object.
+    """
+    paths = [os.path.abspath(path) for path in paths]
+    report = SignatureReport()
+    done = dict()  # {index: results}
+    todo = []  # [(index, key, positions to verify, cached results)]
+    for (index, path) in enumerate(paths):
+        try:
+            key = cache.key(path) if cache is not None else None
+        except OSError as e:
+            report.failures[path] = e
+            if callback:
+                callback(path, [], e)
+            continue
+        cached, stale = (None, None) if key is None else cache.get(key)
+        if cached is not None and not stale:
+            done[index] = cached
+            report.cached += len(cached)
+            if callback:
+                callback(path, cached, None)
+            continue
+        todo.append((index, key, stale, cached or []))
+
+    def prepare(job):
+        index, key, stale, cached = job
+        return (paths[index], stale)
+
+    def finish(job, res, error):
+        index, key, stale, cached = job
+        path = paths[index]
+        if error:
+            report.failures[path] = error
+            if callback:
+                callback(path, [], error)
+            return
+        count, results = res
+        if cache is not None:
+            cache.put(key, count, results)
+        report.verified += len(results)
+        report.cached += len(cached)
+        results = sorted(cached + results, key=lambda r: r.pos)
+        done[index] = results
+        if callback:
+            callback(path, results, None)
+
+    if concurrency <= 1:
+        for job in todo:
+            try:
+                res, error = _verify(prepare(job)), None
+            except Exception as e:
+                res, error = None, e
+            finish(job, res, error)
+    else:
+        run_pipeline(todo, prepare, _verify, finish,
+                     concurrency=concurrency,
+                     executor=ProcessPoolExecutor)
+    for index in sorted(done):
+        report.results.extend(done[index])
+    return report
@@ -13,23 +13,29 @@ WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
 FOR A PARTICULAR PURPOSE.
 """
 
+import io
 import os
 import datetime
 import shutil
 import atexit
+import hashlib
+import pickle
 
 from .xdwapi import *
 from .common import *
 from .struct import Point
 from .timezone import *
 from .observer import *
+from .xdwtemp import XDWTemp
 
 
 __all__ = (
-        "XDWFile", "PageForm", "AttachmentList", "Attachment",
+        "XDWFile", "PageForm", "PageFormTemplate",
+        "AttachmentList", "Attachment", "AttachmentStream",
         "StampSignature", "PKISignature",
         "xdwopen", "create_sfx", "extract_sfx", "optimize", "copy",
         "protection_info", "protect", "unprotect", "sign",
+        "ProtectionPolicy",
         "VALID_DOCUMENT_HANDLES",
         )
 
@@ -114,6 +120,48 @@ def xdwopen(path, readonly=False, authenticate=True, autosave=False):
     return doc
 
 
+EXPORT_CHUNK_SIZE = 32  # max. items exported by a worker at a time
+
+
+def _export_chunk(args):
+    """Export pages of document or documents in binder; run in a worker.
+
+    args    (path, [(pos, output_path), ...])
+    """
+    path, items = args
+    doc = xdwopen(path, readonly=True)
+    try:
+        for (pos, output_path) in items:
+            doc.export(pos, output_path, overwrite=True)
+    finally:
+        doc.close()
+    return items
+
+
+def export_parallel(path, items, concurrency=4, callback=None):
+    """Export pages of document or documents in binder in worker processes.
+
+    path        (str) pathname of document or binder
+    items       (sequence of (pos, output_path)) what to export where
+    concurrency (int) worker processes
+    callback    function(pos, output_path) called as each item is done
+
+    Each worker opens the file read-only and exports up to
+    EXPORT_CHUNK_SIZE consecutive items at a time, so unsaved changes
+    are not reflected.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    items = list(items)
+    size = max(1, min(EXPORT_CHUNK_SIZE, -(-len(items) // concurrency)))
+    chunks = [(path, items[i:i + size]) for i in range(0, len(items), size)]
+    with ProcessPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_export_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            for (pos, output_path) in future.result():
+                if callback:
+                    callback(pos, output_path)
+
+
 def create_sfx(input_path, output_path=None):
     """Create self-extract executable file.
 
@@ -210,6 +258,142 @@ def protection_info(path):
     return (protect_type, permission)
 
 
+# ctypes objects built by copies of ProtectionPolicy or PageFormTemplate
+# unpickled in a process, e.g. for each task in a worker, to share them.
+_BUILT = dict()  # {digest: built objects}
+
+
+def _digest(*values):
+    """Get a digest of picklable values to identify equivalent objects."""
+    return hashlib.sha1(pickle.dumps(values)).hexdigest()
+
+
+class ProtectionPolicy(object):
+
+    """Protection settings applicable to many files.
+
+    ctypes structures passed to XDW_ProtectDocument(), including DER
+    certificate arrays for PKI, are built once on first use and reused
+    for every file protected with the policy.
+
+    Example:
+
+        policy = ProtectionPolicy("PASSWORD128", password="secret",
+                                  permission="PRINT")
+        for path in paths:
+            policy.apply(path)
+
+    A policy can be passed to worker processes e.g. by protect_many(),
+    where copies unpickled for each file share the structures built
+    once per process.  Do not apply
+    a policy in multiple threads at a time, since XDWAPI writes error
+    status into the shared structure.
+    """
+
+    def __init__(self, protect_type="PASSWORD", auth="NONE", **options):
+        """Initiator.
+
+        See protect() for arguments.
+        """
+        self.protect_type = XDW_PROTECT.normalize(protect_type)
+        self.auth = XDW_AUTH.normalize(auth)
+        self.options = options
+        if self.protect_type in (XDW_PROTECT_STAMP,
+                                 XDW_PROTECT_CONTEXT_SERVICE):
+            raise NotImplementedError(
+                    "only password- or PKI-based protection is available")
+        if self.protect_type not in (XDW_PROTECT_PSWD,
+                                     XDW_PROTECT_PSWD128,
+                                     XDW_PROTECT_PSWD256,
+                                     XDW_PROTECT_PKI,
+                                     XDW_PROTECT_PKI256):
+            raise ValueError(
+                    "protect_type must be PASSWORD, PASSWORD128 or PKI")
+        if self.pki and not options.get("certificates"):
+            raise ValueError("a list of certificate(s) is required")
+        self._structs = None
+        self._digest = None  # given to copies by pickling
+
+    def __repr__(self):
+        return "{cls}({type}, auth={auth})".format(
+                cls=self.__class__.__name__,
+                type=XDW_PROTECT[self.protect_type],
+                auth=XDW_AUTH[self.auth])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_structs"] = None  # ctypes pointers are not picklable.
+        state["_digest"] = _digest(self.protect_type, self.auth,
+                                   sorted(self.options.items()))
+        return state
+
+    @property
+    def pki(self):
+        return self.protect_type in (XDW_PROTECT_PKI, XDW_PROTECT_PKI256)
+
+    def _build(self):
+        """Build (module option, protect option, buffers to keep alive)."""
+        protect_option = XDW_PROTECT_OPTION()
+        protect_option.nAuthMode = self.auth
+        o = lambda s: self.options.get(s)
+        buffers = []
+        if not self.pki:
+            opt = XDW_SECURITY_OPTION_PSWD()
+            opt.nPermission = flagvalue(XDW_PERM, o("permission"), store=True)
+            opt.szOpenPswd = (o("password") or "").encode()
+            opt.szFullAccessPswd = (o("fullaccess") or "").encode()
+            encoding = ("utf-8" if self.protect_type == XDW_PROTECT_PSWD256
+                        else "ascii")
+            opt.lpszComment = (o("comment") or "").encode(encoding)
+        else:
+            opt = XDW_SECURITY_OPTION_PKI()
+            opt.nPermission = flagvalue(XDW_PERM, o("permission"), store=True)
+            certificates = list(o("certificates"))
+            fullaccesscerts = list(o("fullaccesscerts") or [])
+            opt.nCertsNum = len(certificates) + len(fullaccesscerts)
+            opt.nFullAccessCertsNum = len(fullaccesscerts)
+            ders = (XDW_DER_CERTIFICATE * opt.nCertsNum)()
+            for (der, cert) in zip(ders, fullaccesscerts + certificates):
+                buf = create_string_buffer(cert, len(cert))
+                der.pCert = cast(buf, c_void_p)
+                der.nCertSize = len(cert)
+                buffers.append(buf)
+            opt.lpxdcCerts = ders
+            buffers.append(ders)
+        return (opt, protect_option, buffers)
+
+    def apply(self, input_path, output_path=None):
+        """Generate protected document/binder.
+
+        Returns the created pathname which may differ from output_path.
+        """
+        input_path = adjust_path(input_path)
+        root, ext = os.path.splitext(input_path)
+        output_path = adjust_path(output_path or root, ext=ext)
+        output_path = derivative_path(output_path)
+        if not self._structs:
+            self._structs = _BUILT.get(self._digest) or self._build()
+            if self._digest:
+                _BUILT[self._digest] = self._structs
+        opt, protect_option, _ = self._structs
+        if self.pki:
+            opt.nErrorStatus = 0
+            opt.nFirstErrorCert = -1
+        try:
+            if XDWVER < 8:
+                XDW_ProtectDocument(cp(input_path), cp(output_path),
+                        self.protect_type, opt, protect_option)
+            else:
+                XDW_ProtectDocumentW(input_path, output_path,
+                        self.protect_type, opt, protect_option)
+        except ProtectModuleError as e:
+            msg = XDW_SECURITY_PKI_ERROR[opt.nErrorStatus]
+            if 0 <= opt.nFirstErrorCert:
+                msg += " in cert[%d]" % opt.nFirstErrorCert
+            raise ProtectModuleError(msg)
+        return output_path
+
+
 def protect(input_path,
         output_path=None,
         protect_type="PASSWORD",
@@ -232,61 +416,15 @@ def protect(input_path,
     **options for PKI:
     permission      allowed operation(s); comma separated list of
                     'EDIT_DOCUMENT', 'EDIT_ANNOTATION', 'PRINT' and 'COPY'
-    certificates    list of certificates in DER (RFC3280) formatted str
-    fullaccesscerts list of certificates in DER (RFC3280) formatted str
+    certificates    list of certificates in DER (RFC3280) formatted bytes
+    fullaccesscerts list of certificates in DER (RFC3280) formatted bytes
+
+    To protect many files in the same way, use ProtectionPolicy.
 
     Returns the created pathname which may differ from output_path.
     """
-    input_path = adjust_path(input_path)
-    root, ext = os.path.splitext(input_path)
-    output_path = adjust_path(output_path or root, ext=ext)
-    output_path = derivative_path(output_path)
-    protect_option = XDW_PROTECT_OPTION()
-    protect_option.nAuthMode = XDW_AUTH.normalize(auth)
-    protect_type = XDW_PROTECT.normalize(protect_type)
-    o = lambda s: options.get(s)
-    if protect_type in (XDW_PROTECT_PSWD,
-                        XDW_PROTECT_PSWD128,
-                        XDW_PROTECT_PSWD256):
-        opt = XDW_SECURITY_OPTION_PSWD()
-        opt.nPermission = flagvalue(XDW_PERM, o("permission"), store=True)
-        opt.szOpenPswd = (o("password") or "").encode()
-        opt.szFullAccessPswd = (o("fullaccess") or "").encode()
-        encoding = "utf-8" if protect_type == XDW_PROTECT_PSWD256 else "ascii"
-        opt.lpszComment = (o("comment") or "").encode(encoding)
-    elif protect_type in (XDW_PROTECT_PKI, XDW_PROTECT_PKI256):
-        opt = XDW_SECURITY_OPTION_PKI()
-        opt.nPermission = flagvalue(XDW_PERM, o("permission"), store=True)
-        certificates = o("certificates")
-        if not certificates:
-            raise ValueError("a list of certificate(s) is required")
-        fullaccesscerts = o("fullacccesscerts")
-        opt.nCertsNum = len(certificates) + len(fullaccesscerts)
-        opt.nFullAccessCertsNum = len(fullaccesscerts)
-        certs = fullaccesscerts + certificates
-        ders = (XDW_DER_CERTIFICATE * opt.nCertsNum)()
-        for i in range(opt.nCertsNum):
-            ders[i].pCert = pointer(certs[i])
-            ders[i].nCertSize = len(certs[i])
-        opt.lpxdcCerts = byref(ders)
-    elif protect_type in (XDW_PROTECT_STAMP, XDW_PROTECT_CONTEXT_SERVICE):
-        raise NotImplementedError(
-                "only password- or PKI-based protection is available")
-    else:
-        raise ValueError("protect_type must be PASSWORD, PASSWORD128 or PKI")
-    try:
-        if XDWVER < 8:
-            XDW_ProtectDocument(cp(input_path), cp(output_path),
-                    protect_type, opt, protect_option)
-        else:
-            XDW_ProtectDocumentW(input_path, output_path,
-                    protect_type, opt, protect_option)
-    except ProtectModuleError as e:
-        msg = XDW_SECURITY_PKI_ERROR[opt.nErrorStatus]
-        if 0 <= opt.nFirstErrorCert:
-            msg += " in cert[%d]" % opt.nFirstErrorCert
-        raise ProtectModuleError(msg)
-    return output_path
+    policy = ProtectionPolicy(protect_type=protect_type, auth=auth, **options)
+    return policy.apply(input_path, output_path=output_path)
 
 
 def unprotect(input_path, output_path=None, auth="NONE"):
@@ -345,8 +483,8 @@ def sign(input_path,
         modopt = None
     else:  # opt.nSignatureType == XDW_SIGNATURE_PKI
         modopt = XDW_SIGNATURE_MODULE_OPTION_PKI()
-        modopt.pSignerCert = ptr(cert)
-        modopt.nSignerCertSize = len(cert)
+        modopt.pSignerCert = ptr(certificate)
+        modopt.nSignerCertSize = len(certificate)
     if XDWVER < 8:
         XDW_SignDocument(cp(input_path), cp(output_path), opt, modopt)
     else:
@@ -354,6 +492,44 @@ def sign(input_path,
     return output_path
 
 
+CHUNK_SIZE = 1 << 20  # to read attachments
+
+
+def file_digest(f, algorithm="sha256"):
+    """Get hex digest of a binary stream or a file given by pathname."""
+    if isinstance(f, str):
+        with open(f, "rb") as f:
+            return file_digest(f, algorithm=algorithm)
+    h = hashlib.new(algorithm)
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+
+class AttachmentStream(io.BufferedReader):
+
+    """Readable binary stream of an attachment aka original data.
+
+    The attachment is extracted into a temporary file in the workspace
+    (see XDWWorkspace), which is removed when the stream is closed.
+    """
+
+    def __init__(self, temp):
+        """Initiator.
+
+        temp    (XDWTemp) temporary file holding the attachment
+        """
+        io.BufferedReader.__init__(self, io.FileIO(temp.path, "rb"),
+                                   buffer_size=CHUNK_SIZE)
+        self.temp = temp
+
+    def close(self):
+        try:
+            io.BufferedReader.close(self)
+        finally:
+            self.temp.close()
+
+
 class AttachmentList(Subject):
 
     """Collection of Attachments aka original data."""
@@ -409,6 +585,35 @@ class AttachmentList(Subject):
         att = self.attachment(pos)
         self.attach(att, EV_ATT_INSERTED)
 
+    def extend(self, paths, pos=None):
+        """Insert attachments, aka original data, in one pass.
+
+        paths   (sequence of str) pathnames of files to insert
+        pos     position to insert; starts with 0
+                None means to append at the end of XDW/XBD
+
+        Unlike repeated insert(), Attachment objects are not created for
+        the inserted files, and positions of existing Attachment objects
+        are updated only once at the end.  Save the document afterwards
+        to store them all at once.
+
+        Returns the number of inserted attachments.
+        """
+        pos = self._pos(self.size if pos is None else pos, append=True)
+        count = 0
+        try:
+            for path in paths:
+                XDW_InsertOriginalData(self.doc.handle, pos + count + 1,
+                                       cp(path))
+                count += 1
+        finally:
+            if count:
+                self.size += count
+                self.shift_keys(pos - 1, count=count)
+                self.notify(event=Notification(EV_ATT_INSERTED, pos - 1,
+                                               count))
+        return count
+
     def delete(self, pos):
         """Remove an attachment, aka original data."""
         pos = self._pos(pos)
@@ -420,6 +625,51 @@ class AttachmentList(Subject):
     def __delitem__(self, pos):
         self.delete(pos)
 
+    def extract_all(self, dir=None, overwrite=False, algorithm=None,
+                    concurrency=1):
+        """Save all attachments.
+
+        dir         (str) directory to save to;
+                    None means {document/binder dir}
+        overwrite   (bool) overwrite existing files instead of saving to
+                    derivatives e.g. {stored filename}-2.{ext}
+        algorithm   (str) hash algorithm e.g. 'sha256' to compute digests
+                    of saved files, which are kept for Attachment.digest();
+                    None means not to compute
+        concurrency (int) threads to compute digests
+
+        Attachments are extracted one by one in the caller's thread since
+        XDWAPI is not thread-safe, while digests of extracted files are
+        computed in worker threads in parallel with further extraction.
+
+        Returns a list of saved pathnames.
+        """
+        dir = dir or self.doc.dirname()
+        paths = dict()  # {pos: path}
+
+        def prepare(att):
+            path = att.save(os.path.join(dir, att.name), overwrite=overwrite)
+            paths[att.pos] = path
+            return path
+
+        def work(path):
+            return file_digest(path, algorithm=algorithm)
+
+        def finish(att, digest, error):
+            if error:
+                raise error
+            att._digests[algorithm] = digest
+
+        if algorithm and 1 < concurrency:
+            run_pipeline(self, prepare, work, finish,
+                         concurrency=concurrency)
+        else:
+            for att in self:
+                path = prepare(att)
+                if algorithm:
+                    finish(att, work(path), None)
+        return [paths[pos] for pos in sorted(paths)]
+
 
 class Attachment(Observer):
 
@@ -428,12 +678,34 @@ class Attachment(Observer):
     def __init__(self, doc, pos):
         self.doc = doc
         self.pos = pos
-        info, text_type = XDW_GetOriginalDataInformationW(
-                doc.handle, pos + 1, codepage=CP)
-        self.text_type = XDW_TEXT_TYPE[text_type]
-        self.size = info.nDataSize
-        self.datetime = fromunixtime(info.nDate)
-        self.name = info.szName
+        self._info = None  # read on demand
+        self._digests = dict()  # {algorithm: hex digest}
+
+    def _get_info(self):
+        if self._info is None:
+            info, text_type = XDW_GetOriginalDataInformationW(
+                    self.doc.handle, self.pos + 1, codepage=CP)
+            self._info = dict(text_type=XDW_TEXT_TYPE[text_type],
+                              size=info.nDataSize,
+                              datetime=fromunixtime(info.nDate),
+                              name=info.szName)
+        return self._info
+
+    @property
+    def text_type(self):
+        return self._get_info()["text_type"]
+
+    @property
+    def size(self):
+        return self._get_info()["size"]
+
+    @property
+    def datetime(self):
+        return self._get_info()["datetime"]
+
+    @property
+    def name(self):
+        return self._get_info()["name"]
 
     def name_compat(self, encoding, errors="ignore"):
         info = XDW_GetOriginalDataInformation(
@@ -449,25 +721,64 @@ class Attachment(Observer):
                 self.pos -= 1
         elif event.type == EV_ATT_INSERTED:
             if event.para[0] < self.pos:
-                self.pos += 1
+                self.pos += event.para[1] if 1 < len(event.para) else 1
         else:
             raise ValueError(f"Illegal event type: {event.type}")
 
-    def save(self, path=None):
+    def save(self, path=None, overwrite=False):
         """Save attached file.
 
         path    (str) save to {path};
                       with no dir, save to {document/binder dir}/{path}
                 (None) save to {document/binder dir}/{stored filename}
+        overwrite   (bool) overwrite existing file instead of saving to
+                    a derivative e.g. {stored filename}-2.{ext}
 
         Returns the saved pathname which may differ from path.
         """
-        path = newpath(path or self.name, dir=self.doc.dirname())
+        path = newpath(path or self.name, dir=self.doc.dirname(),
+                       overwrite=overwrite)
+        with replacing(path) as out:
+            self._extract(out)
+        return path
+
+    def _extract(self, path):
         if XDWVER < 8:
             XDW_GetOriginalData(self.doc.handle, self.pos + 1, cp(path))
         else:
             XDW_GetOriginalDataW(self.doc.handle, self.pos + 1, path)
-        return path
+
+    def open(self):
+        """Open attached file as a readable binary stream.
+
+        The attached file is extracted into a temporary file, which is
+        removed as the stream is closed.  Use in with-statement:
+
+            with att.open() as f:
+                upload(f)
+
+        Returns an AttachmentStream object.
+        """
+        temp = XDWTemp(suffix=os.path.splitext(self.name)[1])
+        try:
+            self._extract(temp.path)
+            return AttachmentStream(temp)
+        except:
+            temp.close()
+            raise
+
+    def digest(self, algorithm="sha256"):
+        """Get hex digest of attached file.
+
+        algorithm   (str) any algorithm supported by hashlib.new()
+
+        Digests are computed once per algorithm and kept thereafter,
+        since attached files cannot be modified.
+        """
+        if algorithm not in self._digests:
+            with self.open() as f:
+                self._digests[algorithm] = file_digest(f, algorithm=algorithm)
+        return self._digests[algorithm]
 
 
 class XDWFile(object):
@@ -759,8 +1070,9 @@ class XDWFile(object):
 
     def pageform_text(self):
         """Get all text in page form."""
-        return ASEP.join(self.pageform(form).text
-                for form in ("header", "footer"))
+        return ASEP.join(
+                uc(XDW_GetPageFormAttribute(self.handle, form, XDW_ATN_Text))
+                for form in (XDW_PAGEFORM_HEADER, XDW_PAGEFORM_FOOTER))
 
     def update_pageform(self, sync=False):
         """Update page form.
@@ -785,7 +1097,14 @@ class XDWFile(object):
         """Get signature information.
 
         Returns StampSignature or PKISignature object.
+
+        N.B. self.status is altered.
         """
+        sig, self.status = self._signature(pos)
+        return sig
+
+    def _signature(self, pos):
+        """Get signature and document verification status by it."""
         siginfo, modinfo = XDW_GetSignatureInformation(self.handle, pos + 1)
         if siginfo.nSignatureType == XDW_SIGNATURE_STAMP:
             sts = XDW_SIGNATURE_STAMP_STAMP[modinfo.nStampVerificationStatus]
@@ -803,7 +1122,6 @@ class XDWFile(object):
                     memo=modinfo.lpszRemarks,
                     status=sts,
                     )
-            self.status = docsts
         else:  # siginfo.nSignatureType == XDW_SIGNATURE_PKI
 
             def parsedt(s):
@@ -834,8 +1152,7 @@ class XDWFile(object):
                     verification_type=ver,
                     status=sts,
                     )
-            self.status = docsts
-        return sig
+        return (sig, docsts)
 
     def _process(self, meth, *args, **kw):
         selfpath = self.pathname()
@@ -922,6 +1239,22 @@ class XDWFile(object):
         """
         return self._process(optimize, output_path=output_path)
 
+    def transform(self, pipeline, output_path=None):
+        """Apply TransformPipeline i.e. chained optimize/protect/sign etc.
+
+        pipeline        (TransformPipeline)
+        output_path     (str) pathname of the result
+
+        Intermediate files are left in the temporary workspace, and self
+        is reopened only once after all steps.
+
+        Returns the created pathname which may differ from output_path,
+        if called with output_path specified.
+
+        NB. self.save() is performed internally.
+        """
+        return self._process(pipeline.run, output_path=output_path)
+
 
 class BaseSignature(object):
 
@@ -1117,11 +1450,12 @@ class PageForm(object):
     def form(self, value):
         object.__setattr__(self, "form", XDW_PAGEFORM.normalize(value))
 
-    def __setattr__(self, name, value):
+    @staticmethod
+    def _encode(name, value):
+        """Convert attribute into (inner name, attribute type, value)."""
         attrname = inner_attribute_name(name)
         if attrname not in XDW_ANNOTATION_ATTRIBUTE:
-            object.__setattr__(self, name, value)
-            return
+            raise AttributeError(f"illegal pageform attribute '{name}'")
         special = isinstance(XDW_ANNOTATION_ATTRIBUTE[attrname][1], XDWConst)
         if special or isinstance(value, (int, float)):
             value = int(scale(attrname, value, store=True))
@@ -1145,16 +1479,11 @@ class PageForm(object):
         # TODO: XDW_ATYPE_OTHER should also be valid.
         else:
             raise TypeError("illegal value " + repr(value))
-        XDW_SetPageFormAttribute(self.doc.handle, self.form,
-                cp(attrname), attribute_type, value)
+        return (attrname, attribute_type, value)
 
-    def __getattribute__(self, name):
-        attrname = inner_attribute_name(name)
-        if attrname not in XDW_ANNOTATION_ATTRIBUTE:
-            return object.__getattribute__(self, name)
-        self_doc = object.__getattribute__(self, "doc")
-        self_form = object.__getattribute__(self, "form")
-        value = XDW_GetPageFormAttribute(self_doc.handle, self_form, cp(attrname))
+    @staticmethod
+    def _decode(attrname, value):
+        """Convert value got from XDWAPI into Python object."""
         attribute_type = XDW_ANNOTATION_ATTRIBUTE[attrname][0]
         if attribute_type == 1:  # string
             return uc(value)
@@ -1163,6 +1492,64 @@ class PageForm(object):
             value -= 1  # 0-based
         return scale(attrname, value, store=False)
 
+    def _set_encoded(self, encoded):
+        """Set attributes converted by _encode() already."""
+        handle = self.doc.handle
+        form = self.form
+        for (attrname, attribute_type, value) in encoded:
+            XDW_SetPageFormAttribute(handle, form, attrname, attribute_type,
+                                     value)
+
+    def __setattr__(self, name, value):
+        attrname = inner_attribute_name(name)
+        if attrname not in XDW_ANNOTATION_ATTRIBUTE:
+            object.__setattr__(self, name, value)
+            return
+        self._set_encoded([self._encode(attrname, value)])
+
+    def __getattribute__(self, name):
+        attrname = inner_attribute_name(name)
+        if attrname not in XDW_ANNOTATION_ATTRIBUTE:
+            return object.__getattribute__(self, name)
+        self_doc = object.__getattribute__(self, "doc")
+        self_form = object.__getattribute__(self, "form")
+        value = XDW_GetPageFormAttribute(self_doc.handle, self_form, attrname)
+        return PageForm._decode(attrname, value)
+
+    def configure(self, **attrs):
+        """Set attributes at once.
+
+        Example:
+
+            doc.pageform("header").configure(text="CONFIDENTIAL",
+                    font_size=12, alignment="CENTER")
+
+        Each attribute still costs an XDWAPI call.  To apply the same
+        definition to many documents, use PageFormTemplate, which converts
+        values only once.
+        """
+        self._set_encoded([self._encode(k, v) for (k, v) in attrs.items()])
+
+    def read_all(self, names=None):
+        """Get attributes at once.
+
+        names   (sequence of str) attribute names; None means all
+
+        Returns a dict {attribute name: value}, which can be given to
+        configure() as is.
+        """
+        handle = self.doc.handle
+        form = self.form
+        result = dict()
+        for name in (names or PAGEFORM_ATTRIBUTES):
+            attrname = inner_attribute_name(name)
+            if attrname not in XDW_ANNOTATION_ATTRIBUTE:
+                raise AttributeError(f"illegal pageform attribute '{name}'")
+            value = XDW_GetPageFormAttribute(handle, form, attrname)
+            result[outer_attribute_name(attrname)] = \
+                    self._decode(attrname, value)
+        return result
+
     def update(self, sync=False):
         """Update page form.
 
@@ -1178,3 +1565,84 @@ class PageForm(object):
         """
         sync = XDW_PAGEFORM_REMOVE if sync else XDW_PAGEFORM_STAY
         XDW_RemovePageForm(self.doc.handle, sync)
+
+
+# Attributes of PageForm available through XDWAPI.
+PAGEFORM_ATTRIBUTES = tuple(name for name in PageForm.all_attributes()
+        if inner_attribute_name(name) in XDW_ANNOTATION_ATTRIBUTE)
+
+
+class PageFormTemplate(object):
+
+    """Definition of page forms i.e. header/footer for many documents.
+
+    Example:
+
+        template = PageFormTemplate(
+                header=dict(text="CONFIDENTIAL", alignment="CENTER"),
+                footer=dict(text="Page ", page_range="ALL"))
+        for path in paths:
+            with xdwopen(path, autosave=True) as doc:
+                template.apply(doc)
+
+    or in worker processes, configure_pageforms(paths, template).
+
+    Attribute values are converted for XDWAPI once on first use, which
+    copies unpickled in a worker process share, and page forms are
+    updated only once per document.
+    """
+
+    def __init__(self, sync=False, **forms):
+        """Initiator.
+
+        sync    (bool) also update pageforms for documents in binder
+        forms   dict of attributes (see PageForm.configure()) for
+                header, footer, topimage, bottomimage and pagenumber
+        """
+        self.sync = sync
+        self.forms = dict()
+        for (form, attrs) in forms.items():
+            if form.upper() not in XDW_PAGEFORM.values():
+                raise ValueError(f"illegal pageform '{form}'")
+            self.forms[XDW_PAGEFORM.normalize(form.upper())] = dict(attrs)
+        self._encoded = None
+        self._digest = None  # given to copies by pickling
+
+    def __repr__(self):
+        return "{cls}({forms})".format(
+                cls=self.__class__.__name__,
+                forms=", ".join(XDW_PAGEFORM[f].lower() for f in self.forms))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_encoded"] = None  # ctypes objects are not picklable.
+        state["_digest"] = _digest(self.sync, sorted(
+                (form, sorted(attrs.items()))
+                for (form, attrs) in self.forms.items()))
+        return state
+
+    @classmethod
+    def from_document(cls, doc, forms=("header", "footer"), sync=False):
+        """Make a template from page forms of a document.
+
+        doc     (XDWFile) document/binder
+        forms   (sequence of str) page forms to copy
+        sync    (bool) also update pageforms for documents in binder
+        """
+        return cls(sync=sync, **dict((form, doc.pageform(form).read_all())
+                                     for form in forms))
+
+    def apply(self, doc):
+        """Configure page forms of doc and update them once."""
+        if self._encoded is None and self._digest:
+            self._encoded = _BUILT.get(self._digest)
+        if self._encoded is None:
+            self._encoded = dict(
+                    (form, [PageForm._encode(k, v) for (k, v)
+                            in attrs.items()])
+                    for (form, attrs) in self.forms.items())
+            if self._digest:
+                _BUILT[self._digest] = self._encoded
+        for (form, encoded) in self._encoded.items():
+            doc.pageform(form)._set_encoded(encoded)
+        doc.update_pageform(sync=self.sync)
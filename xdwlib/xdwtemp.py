@@ -15,10 +15,137 @@ FOR A PARTICULAR PURPOSE.
 
 import sys
 import os
-from tempfile import mkstemp, mkdtemp
+import atexit
+import shutil
+import threading
+from itertools import count
+from tempfile import mkdtemp
 
 
-__all__ = ("XDWTemp",)
+__all__ = ("XDWTemp", "XDWWorkspace", "workspace", "ENV_TEMPDIR")
+
+ENV_TEMPDIR = "XDWLIB_TEMPDIR"
+
+
+class XDWWorkspace(object):
+
+    """Per-process root directory for temporary files.
+
+    The root directory is created on first use in dir, $XDWLIB_TEMPDIR or
+    the standard temporary directory in this order, and removed with all
+    its contents at exit.  Pathnames under the root are allocated by
+    a counter without probing the filesystem.  A forked process gets its
+    own root on first use.  After relocate(), new pathnames are allocated
+    under a new root while the former root is kept until exit.
+
+    Example:
+
+        workspace.relocate("/dev/shm")  # Use tmpfs.
+        with XDWTemp() as temp:  # Allocates {root}/000001.xdw
+            some_xdw_page.export(temp.path)
+        print(workspace.stats())
+
+    ATTRIBUTES
+    ----------
+
+    dir             (str) parent directory of root; None means default
+    files_created   (int) number of pathnames allocated for temporary files
+    files_removed   (int) number of temporary files removed by discard()
+    bytes_written   (int) total size of temporary files removed
+    """
+
+    def __init__(self, dir=None):
+        self.dir = dir
+        self._root = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._counter = count(1)
+        self._atexit = False
+        self._retired = []  # [(pid, root), ...] to remove at exit
+        self.files_created = self.files_removed = 0
+        self.bytes_written = 0
+
+    @property
+    def root(self):
+        """Root directory, which is created if not yet."""
+        pid = os.getpid()
+        if self._pid != pid or not self._root:
+            with self._lock:
+                if self._pid != pid or not self._root:
+                    dir = self.dir or os.environ.get(ENV_TEMPDIR) or None
+                    if self._pid != pid:
+                        self.files_created = self.files_removed = 0
+                        self.bytes_written = 0
+                    self._root = mkdtemp(prefix="xdwlib-", dir=dir)
+                    self._pid = pid
+                    self._counter = count(1)
+                    if not self._atexit:
+                        atexit.register(self.cleanup)
+                        self._atexit = True
+        return self._root
+
+    def _name(self, suffix="", prefix=""):
+        root = self.root
+        return os.path.join(root, f"{prefix}{next(self._counter):06d}{suffix}")
+
+    def allocate(self, suffix="", prefix=""):
+        """Allocate a new pathname under root without creating it."""
+        path = self._name(suffix=suffix, prefix=prefix)
+        with self._lock:
+            self.files_created += 1
+        return path
+
+    def mkdir(self, prefix=""):
+        """Create a new directory under root and return its pathname."""
+        path = self._name(prefix=prefix)
+        os.mkdir(path)
+        return path
+
+    def discard(self, path):
+        """Remove a temporary file, counting it if it exists."""
+        try:
+            size = os.stat(path).st_size
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.files_removed += 1
+            self.bytes_written += size
+
+    def cleanup(self):
+        """Remove root, former roots and everything under them."""
+        pid = os.getpid()
+        with self._lock:
+            if self._root and self._pid == pid:
+                self._retired.append((pid, self._root))
+            for (owner, root) in self._retired:
+                if owner == pid:
+                    shutil.rmtree(root, ignore_errors=True)
+            self._retired = []
+            self._root = self._pid = None
+
+    def relocate(self, dir=None):
+        """Allocate pathnames under a new parent directory e.g. on tmpfs.
+
+        dir     (str) new parent directory; None means default
+
+        Temporary files allocated so far stay in the current root, which
+        is removed by cleanup() i.e. at exit.
+        """
+        with self._lock:
+            if self._root and self._pid == os.getpid():
+                self._retired.append((self._pid, self._root))
+                self._root = None
+            self.dir = dir
+
+    def stats(self):
+        """Get statistics as a dict."""
+        return dict(root=self._root, files_created=self.files_created,
+                    files_removed=self.files_removed,
+                    bytes_written=self.bytes_written)
+
+
+workspace = XDWWorkspace()
 
 
 class XDWTemp(object):
@@ -30,18 +157,19 @@ class XDWTemp(object):
     does not supply an existing file is that DocuWorks cannot handle
     shared files, even if it gets the write access.
 
-    Technically, XDWTemp() creates a temporary directory in the standard
-    temporary directory, like $TEMP or %TEMP%, creates a temporary file,
-    delete the file immediately and returns the pathname of the deleted
-    temporary file.  Uniqueness of the pathname of the temporary file is
-    assured by its parent directory name.
+    Technically, XDWTemp() allocates a unique pathname in the per-process
+    root directory maintained by workspace, an XDWWorkspace object.
+    Neither file nor directory is created for each XDWTemp object; if
+    a private directory is needed, dir attribute creates one on first
+    access.  With autoclose=False, XDWTemp() creates a private directory
+    outside the workspace at once so that it survives the process.
 
     Example:
 
-        temp = XDWTemp()  # Creates $TEMP/tmp-dir
-        some_xdw_page.export(temp.path)  # Creates $TEMP/tmp-dir/tmp-file
+        temp = XDWTemp()  # Allocates {root}/tmp-file
+        some_xdw_page.export(temp.path)  # Creates {root}/tmp-file
         do_some_work(temp.path)
-        temp.close()  # Deletes $TEMP/tmp-dir/tmp-file and $TEMP/tmp-dir
+        temp.close()  # Deletes {root}/tmp-file
 
     or shortly,
 
@@ -50,14 +178,14 @@ class XDWTemp(object):
             do_some_work(temp.path)
 
     By default, each XDWTemp object is purged with the associated
-    temporary directory and file deleted automatically (auto-close).
+    temporary file (and directory) deleted automatically (auto-close).
     To avoid this action, specify autoclose=False on generation.
 
     ATTRIBUTES
     ----------
 
     path        (str) pathname of temporary file
-    dir         (str) temporary directory name = os.path.split(path)[0]
+    dir         (str) private temporary directory, created on first access
     autoclose   (bool) call close() automatically before destruction
     """
 
@@ -68,28 +196,41 @@ class XDWTemp(object):
         prefix      (str) prefix of temporary file name
         autoclose   (bool) call close() automatically before destruction
         """
-        fd, path = mkstemp(suffix=suffix, prefix=prefix, dir=mkdtemp())
-        os.close(fd)
-        os.remove(path)  # Directory is not removed.
-        self.path = path
-        self.dir = os.path.split(path)[0]
+        if autoclose:
+            self.path = workspace.allocate(suffix=suffix, prefix=prefix)
+            self._dir = None
+        else:
+            # Outlive the workspace, e.g. for a file opened by a viewer.
+            self._dir = mkdtemp()
+            self.path = os.path.join(self._dir, f"{prefix}tmp{suffix}")
         self.autoclose = autoclose
+        self.closed = False
+
+    @property
+    def dir(self):
+        if not self._dir:
+            self._dir = workspace.mkdir(prefix="d")
+        return self._dir
 
     def __del__(self):
-        if self.autoclose and os.path.exists(self.dir):
+        if self.autoclose and not self.closed:
             self.close()
 
     def close(self):
         """Remove temporary file and directory."""
-        if os.path.exists(self.path):
-            os.remove(self.path)
+        self.closed = True
+        workspace.discard(self.path)
+        if not self._dir:
+            return
         try:
-            os.rmdir(self.dir)
+            os.rmdir(self._dir)
+        except FileNotFoundError:
+            pass
         except Exception as e:
             import time
             sys.stderr.write("""\
 {0}:xdwlib:can't delete temporary directory '{1}'\n""".format(
-time.strftime("%Y-%m-%d %H:%M:%S"), self.dir))
+time.strftime("%Y-%m-%d %H:%M:%S"), self._dir))
 
     def __enter__(self):
         return self